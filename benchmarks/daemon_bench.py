@@ -0,0 +1,143 @@
+"""
+Times the state daemon on generated stores.
+
+    python -m benchmarks.daemon_bench [--sizes 10000,100000] [--clients 1,4] [--backend journal] [--output report.json]
+
+Reports what a new window pays to get at the tasks (loading the store
+itself versus attaching to a running daemon), and the latency and total
+throughput of small batches (add a task, fetch the next one) from several
+concurrent clients. The daemon runs in its own process, like
+"python main.py --serve".
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from typing import List
+
+from benchmarks.report import make_report, print_table, write_report
+from benchmarks.store_bench import BACKENDS, _time_once, _time_repeated
+from benchmarks.tree_gen import generate_tree, write_store
+from src.core.state_client import StateClient
+from src.core.state_daemon import DEFAULT_WRITE_BEHIND, StateDaemon
+from src.core.state_manager import StateManager
+
+
+def _run_daemon(data_file: str, journaled: bool, socket_path: str, ready):
+    state_manager = StateManager(data_file, journaled=journaled, write_behind_delay=DEFAULT_WRITE_BEHIND)
+    # Loaded before clients attach, as in a daemon that has been up for a while
+    state_manager.get_next_actionable_task()
+    daemon = StateDaemon(state_manager, socket_path)
+
+    async def main():
+        await daemon.start()
+        ready.set()
+        await daemon.serve_forever()
+
+    try:
+        asyncio.run(main())
+    finally:
+        daemon.close()
+        state_manager.close()
+
+
+def _batch(client: StateClient, i: int):
+    client.batch([("add_task", {"title": f"Bench task {i}"}), ("get_next_actionable_task", {})])
+
+
+def bench_size(directory: str, backend: str, size: int, client_counts: List[int], max_ops: int,
+               budget_s: float, seed: int) -> List[dict]:
+    file_name, journaled = BACKENDS[backend]
+    data_file = os.path.join(directory, f"{backend}-{size}-{file_name}")
+    socket_path = os.path.join(directory, "state.sock")
+    write_store(data_file, generate_tree(size, completed=0.5, seed=seed), journaled)
+    results = []
+
+    def record(op: str, stats: dict):
+        results.append(dict(bench="daemon", backend=backend, size=size, op=op, **stats))
+
+    def load_locally():
+        manager = StateManager(data_file, journaled=journaled)
+        manager.get_next_actionable_task()
+        return manager
+
+    load_ms, manager = _time_once(load_locally)
+    record("first_task_local_load", {"ms": load_ms})
+    manager.close()
+
+    ready = multiprocessing.Event()
+    process = multiprocessing.Process(target=_run_daemon, args=(data_file, journaled, socket_path, ready))
+    process.start()
+    try:
+        if not ready.wait(600):
+            raise RuntimeError("State daemon did not start")
+
+        def attach():
+            client = StateClient(socket_path)
+            client.get_next_actionable_task()
+            return client
+
+        attach_ms, client = _time_once(attach)
+        record("first_task_attached", {"ms": attach_ms})
+        client.close()
+
+        for count in client_counts:
+            clients = [StateClient(socket_path, subscribe=False) for _ in range(count)]
+            stats = [None] * count
+
+            def run(index: int):
+                stats[index] = _time_repeated(lambda i: _batch(clients[index], i), max_ops, budget_s)
+
+            threads = [threading.Thread(target=run, args=(index,)) for index in range(count)]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+            batches = sum(s["n"] for s in stats)
+            record(f"batch_{count}_clients", {
+                "ms": sum(s["ms"] * s["n"] for s in stats) / batches,
+                "p95": max(s["p95"] for s in stats),
+                "n": batches,
+                "batches_per_s": round(batches / elapsed),
+            })
+            for client in clients:
+                client.close()
+    finally:
+        process.terminate()
+        process.join()
+    for path in os.listdir(directory):
+        os.remove(os.path.join(directory, path))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10000,100000")
+    parser.add_argument("--clients", default="1,4")
+    parser.add_argument("--backend", default="journal", choices=list(BACKENDS))
+    parser.add_argument("--ops", type=int, default=2000)
+    parser.add_argument("--budget", type=float, default=5.0, help="seconds per client count")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="-", help="report path, '-' for stdout")
+    args = parser.parse_args()
+
+    client_counts = [int(c) for c in args.clients.split(",")]
+    results: List[dict] = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size in (int(s) for s in args.sizes.split(",")):
+            size_results = bench_size(directory, args.backend, size, client_counts, args.ops, args.budget,
+                                      args.seed)
+            print_table(size_results)
+            results += size_results
+
+    params = {k: v for k, v in vars(args).items() if k != "output"}
+    write_report(make_report("daemon_bench", params, results), args.output)
+
+
+if __name__ == "__main__":
+    main()
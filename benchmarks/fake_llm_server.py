@@ -0,0 +1,171 @@
+"""
+A local OpenAI-compatible chat completions endpoint for exercising the LLM
+code paths without a network: configurable latency, failures and stalls,
+with or without streaming.
+
+    python -m benchmarks.fake_llm_server [--port 8765] [--latency 0.2] [--fail-rate 0.1]
+
+Then point config.json at it:
+
+    "openai_api_key": "test", "llm_base_url": "http://127.0.0.1:8765/v1"
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeLLMSettings:
+    def __init__(self, latency: float = 0.2, jitter: float = 0.0, fail_rate: float = 0.0,
+                 stall_rate: float = 0.0, stall_seconds: float = 60.0, chunk_delay: float = 0.02):
+        self.latency = latency
+        self.jitter = jitter
+        self.fail_rate = fail_rate
+        self.stall_rate = stall_rate
+        self.stall_seconds = stall_seconds
+        self.chunk_delay = chunk_delay
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def count(self) -> int:
+        with self._lock:
+            self.requests += 1
+            return self.requests
+
+
+def fake_steps(prompt: str):
+    """
+    A breakdown that depends on the prompt, so cached and fresh answers differ
+    between tasks. Batched prompts get one entry per task number.
+    """
+    if "Tasks: " in prompt:
+        try:
+            items = json.loads(prompt.split("Tasks: ", 1)[1])
+            return {item["n"]: fake_steps(item["title"])["steps"] for item in items}
+        except (ValueError, KeyError, TypeError):
+            pass
+    quoted = re.search(r'"([^"]+)"', prompt)
+    topic = quoted.group(1) if quoted else (" ".join(prompt.split()[:4]) or "task")
+    return {"steps": [{"title": f"Step {i} of {topic}", "description": f"Fake step {i}"} for i in range(1, 4)]}
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    settings = FakeLLMSettings()
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        try:
+            self._answer()
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up (deadline, or a hedge that lost)
+            pass
+
+    def _answer(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_error(404)
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        number = self.settings.count()
+
+        roll = random.random()
+        if roll < self.settings.stall_rate:
+            time.sleep(self.settings.stall_seconds)
+        elif roll < self.settings.stall_rate + self.settings.fail_rate:
+            self._send_json(503, {"error": {"message": "fake outage", "type": "server_error"}})
+            return
+        time.sleep(max(0.0, self.settings.latency + random.uniform(-1, 1) * self.settings.jitter))
+
+        prompt = body.get("messages", [{}])[-1].get("content", "")
+        prompt_chars = sum(len(m.get("content", "")) for m in body.get("messages", []))
+        content = json.dumps(fake_steps(prompt))
+        completion_id = f"chatcmpl-fake-{number}"
+        if body.get("stream"):
+            self._stream(completion_id, body.get("model", "fake"), content)
+        else:
+            self._send_json(200, {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "fake"),
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": content}}],
+                "usage": {"prompt_tokens": prompt_chars // 4, "completion_tokens": len(content) // 4,
+                          "total_tokens": (prompt_chars + len(content)) // 4},
+            })
+
+    def _send_json(self, status: int, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream(self, completion_id: str, model: str, content: str):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        for start in range(0, len(content), 16):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "finish_reason": None,
+                             "delta": {"content": content[start:start + 16]}}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+            time.sleep(self.settings.chunk_delay)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+class FakeLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 drops connections under concurrent load,
+    # which shows up as one-second SYN retries in the timings
+    request_queue_size = 128
+
+
+def start_server(port: int = 0, settings: FakeLLMSettings = None) -> ThreadingHTTPServer:
+    """
+    Starts the server on a background thread; port 0 picks a free one
+    (server.server_address[1]). Stop it with server.shutdown().
+    """
+    handler = type("Handler", (FakeLLMHandler,), {"settings": settings or FakeLLMSettings()})
+    server = FakeLLMServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, name="fake-llm", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--stall-rate", type=float, default=0.0)
+    parser.add_argument("--stall-seconds", type=float, default=60.0)
+    parser.add_argument("--chunk-delay", type=float, default=0.02, help="seconds between streamed chunks")
+    args = parser.parse_args()
+
+    settings = FakeLLMSettings(args.latency, args.jitter, args.fail_rate, args.stall_rate, args.stall_seconds,
+                               args.chunk_delay)
+    server = start_server(args.port, settings)
+    print(f"Fake LLM listening on http://127.0.0.1:{server.server_address[1]}/v1")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
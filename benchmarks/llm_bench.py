@@ -0,0 +1,112 @@
+"""
+Times LLMService end to end against the local fake endpoint
+(benchmarks.fake_llm_server), through llm_base_url like a real deployment.
+
+    python -m benchmarks.llm_bench [--latency 0.2] [--jitter 0.05] [--chunk-delay 0.02]
+                                   [--requests 20] [--output report.json]
+
+Needs the openai package.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import List
+
+from benchmarks.fake_llm_server import FakeLLMSettings, start_server
+from benchmarks.report import make_report, print_table, write_report
+from src.core.llm_cache import LLMCache
+from src.core.llm_executor import LLMExecutor
+from src.core.llm_service import LLMService
+
+
+def _stats(op: str, samples: List[float], **extra) -> dict:
+    samples = sorted(samples)
+    return dict(bench="llm", op=op, ms=sum(samples) / len(samples), p50=samples[len(samples) // 2],
+                p95=samples[min(len(samples) - 1, int(len(samples) * 0.95))], n=len(samples), **extra)
+
+
+def _timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def run(service: LLMService, settings: FakeLLMSettings, requests: int) -> List[dict]:
+    results = []
+
+    samples = [_timed(lambda: service.break_down_task(f"Sequential task {i}", use_cache=False))
+               for i in range(requests)]
+    results.append(_stats("break_down_sync", samples))
+
+    service.break_down_task("Cached task")
+    samples = [_timed(lambda: service.break_down_task("Cached task")) for _ in range(requests)]
+    results.append(_stats("break_down_cached", samples))
+
+    executor = LLMExecutor()
+    try:
+        # The async client is built on first use; keep that out of the timings
+        executor.run_sync(service.abreak_down_task("Warm-up task", use_cache=False))
+
+        async def fan_out():
+            await asyncio.gather(*(service.abreak_down_task(f"Concurrent task {i}", use_cache=False)
+                                   for i in range(requests)))
+        wall = _timed(lambda: executor.run_sync(fan_out()))
+        results.append(dict(bench="llm", op="break_down_concurrent", ms=wall, n=requests))
+
+        first_steps: List[float] = []
+        totals: List[float] = []
+        for i in range(requests):
+            service.time_to_first_step.clear()
+            totals.append(_timed(lambda: executor.run_sync(
+                service.astream_resolve_block(f"Streamed task {i}", "too tired", use_cache=False))))
+            if service.time_to_first_step:
+                first_steps.append(service.time_to_first_step[0] * 1000)
+        results.append(_stats("resolve_block_stream", totals))
+        if first_steps:
+            results.append(_stats("time_to_first_step", first_steps))
+    finally:
+        executor.run_sync(service.aclose())
+        executor.shutdown()
+
+    tasks = [(str(i), f"Batched task {i}", "") for i in range(requests)]
+    before = settings.requests
+    wall = _timed(lambda: service.break_down_tasks(tasks, use_cache=False))
+    results.append(dict(bench="llm", op="break_down_batch", ms=wall, n=requests,
+                        http_requests=settings.requests - before))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--chunk-delay", type=float, default=0.02)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--output", default="-", help="report path, '-' for stdout")
+    args = parser.parse_args()
+
+    settings = FakeLLMSettings(latency=args.latency, jitter=args.jitter, chunk_delay=args.chunk_delay)
+    server = start_server(0, settings)
+    with tempfile.TemporaryDirectory() as directory:
+        config_path = os.path.join(directory, "config.json")
+        with open(config_path, "w") as f:
+            json.dump({"openai_api_key": "benchmark",
+                       "llm_base_url": f"http://127.0.0.1:{server.server_address[1]}/v1"}, f)
+        service = LLMService(config_path, cache=LLMCache(None))
+        if not service.client:
+            print("The openai package is required for this benchmark.", file=sys.stderr)
+            sys.exit(1)
+        results = run(service, settings, args.requests)
+    server.shutdown()
+
+    print_table(results)
+    params = {k: v for k, v in vars(args).items() if k != "output"}
+    write_report(make_report("llm_bench", params, results), args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Machine-readable benchmark reports, and comparing two of them.
+
+    python -m benchmarks.report compare baseline.json current.json [--threshold 0.10] [--min-delta-ms 0.05]
+
+A report is a JSON object with the environment (commit, python, platform),
+the parameters the benchmark ran with and a list of results. Each result
+is identified by its "bench", "op" and any of "backend"/"size", and holds
+timings in milliseconds ("ms", plus "p95" etc. where measured).
+Comparison exits with status 1 when any "ms" got slower by more than the
+threshold (and by more than --min-delta-ms, to ignore microsecond noise),
+so it can gate CI.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+KEY_FIELDS = ("bench", "backend", "size", "op")
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def make_report(name: str, params: dict, results: List[dict]) -> dict:
+    return {
+        "name": name,
+        "commit": git_revision(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": params,
+        "results": results,
+    }
+
+
+def write_report(report: dict, path: Optional[str]) -> None:
+    """
+    Writes the report to `path`, or to stdout when path is None or "-".
+    """
+    text = json.dumps(report, indent=2)
+    if not path or path == "-":
+        print(text)
+        return
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        f.write(text + "\n")
+    print(f"Report written to {path}")
+
+
+def print_table(results: List[dict]) -> None:
+    for result in results:
+        label = " ".join(str(result[field]) for field in KEY_FIELDS if result.get(field) is not None)
+        extra = "".join(f" {k}={v:.2f}" for k, v in result.items()
+                        if k not in KEY_FIELDS and k != "ms" and isinstance(v, float))
+        print(f"{label:<48} {result['ms']:12.3f} ms{extra}", file=sys.stderr)
+
+
+def _key(result: dict) -> Tuple:
+    return tuple(result.get(field) for field in KEY_FIELDS)
+
+
+def compare(baseline: dict, current: dict, threshold: float = 0.10,
+            min_delta_ms: float = 0.05) -> List[Tuple[Tuple, float, float]]:
+    """
+    Returns (key, baseline ms, current ms) for every result that got slower
+    by more than `threshold` (a fraction) and by at least min_delta_ms.
+    """
+    before: Dict[Tuple, dict] = {_key(r): r for r in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        old = before.get(_key(result))
+        if old is None or not old.get("ms"):
+            continue
+        if result["ms"] > old["ms"] * (1 + threshold) and result["ms"] - old["ms"] >= min_delta_ms:
+            regressions.append((_key(result), old["ms"], result["ms"]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    sub = parser.add_subparsers(dest="command", required=True)
+    compare_parser = sub.add_parser("compare")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.10)
+    compare_parser.add_argument("--min-delta-ms", type=float, default=0.05)
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    regressions = compare(baseline, current, args.threshold, args.min_delta_ms)
+    print(f"{baseline.get('commit')} -> {current.get('commit')}: "
+          f"{len(regressions)} regression(s) over {args.threshold:.0%}")
+    for key, old, new in regressions:
+        label = " ".join(str(part) for part in key if part is not None)
+        print(f"  {label:<48} {old:10.3f} -> {new:10.3f} ms ({new / old - 1:+.0%})")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
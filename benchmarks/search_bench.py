@@ -0,0 +1,80 @@
+"""
+Times the full-text search index on generated stores with word titles.
+
+    python -m benchmarks.search_bench [--sizes 10000,100000,1000000] [--backend journal] [--output report.json]
+
+Reports building the index from the store (in the background on the
+first search), loading the persisted index after a restart, typeahead
+queries as the user types, multi-word and status-filtered queries, and
+the cost of keeping the index current on add_task.
+"""
+import argparse
+import gc
+import os
+import tempfile
+from typing import List
+
+from benchmarks.report import make_report, print_table, write_report
+from benchmarks.store_bench import BACKENDS, _time_once, _time_repeated
+from benchmarks.tree_gen import generate_tree, write_store
+from src.core.state_manager import StateManager
+from src.core.task_model import TaskStatus
+
+TYPED = ["ki", "kit", "kitc", "kitch", "kitche", "kitchen"]
+QUERIES = ["clean kitchen", "call doctor appointment", "buy milk bread", "review project slides "]
+
+
+def bench_size(directory: str, backend: str, size: int, max_ops: int, budget_s: float, seed: int) -> List[dict]:
+    file_name, journaled = BACKENDS[backend]
+    data_file = os.path.join(directory, f"{backend}-{size}-{file_name}")
+    write_store(data_file, generate_tree(size, completed=0.5, seed=seed, words=True), journaled)
+    results = []
+
+    def record(op: str, stats: dict):
+        results.append(dict(bench="search", backend=backend, size=size, op=op, **stats))
+
+    gc.collect()
+    manager = StateManager(data_file, journaled=journaled)
+    build_ms, _ = _time_once(lambda: manager.search_ready(wait=True))
+    record("first_search_build", {"ms": build_ms})
+    manager.close()
+
+    manager = StateManager(data_file, journaled=journaled)
+    load_ms, _ = _time_once(lambda: manager.search_ready(wait=True))
+    record("first_search_load", {"ms": load_ms})
+
+    record("typeahead", _time_repeated(lambda i: manager.search(TYPED[i % len(TYPED)]), max_ops, budget_s))
+    record("multi_term", _time_repeated(lambda i: manager.search(QUERIES[i % len(QUERIES)]), max_ops, budget_s))
+    record("status_filtered", _time_repeated(
+        lambda i: manager.search(QUERIES[i % len(QUERIES)], statuses=[TaskStatus.PENDING]), max_ops, budget_s))
+    record("add_task_indexed", _time_repeated(
+        lambda i: manager.add_task(f"Clean the garage {i}", "Sort tools and sweep the floor"), max_ops, budget_s))
+    manager.close()
+    for path in os.listdir(directory):
+        os.remove(os.path.join(directory, path))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10000,100000")
+    parser.add_argument("--backend", default="journal", choices=list(BACKENDS))
+    parser.add_argument("--ops", type=int, default=200)
+    parser.add_argument("--budget", type=float, default=5.0, help="seconds per repeated operation")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="-", help="report path, '-' for stdout")
+    args = parser.parse_args()
+
+    results: List[dict] = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size in (int(s) for s in args.sizes.split(",")):
+            size_results = bench_size(directory, args.backend, size, args.ops, args.budget, args.seed)
+            print_table(size_results)
+            results += size_results
+
+    params = {k: v for k, v in vars(args).items() if k != "output"}
+    write_report(make_report("search_bench", params, results), args.output)
+
+
+if __name__ == "__main__":
+    main()
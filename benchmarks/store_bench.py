@@ -0,0 +1,136 @@
+"""
+Times StateManager operations on generated stores, per backend and size.
+
+    python -m benchmarks.store_bench [--sizes 1000,10000,100000] [--backends json,journal,sqlite,binary]
+                                     [--fan-out 5] [--depth 4] [--completed 0.5] [--output report.json]
+
+Sizes up to 1,000,000 work but need a few GB of memory for the JSON
+backends. Repeated operations run until `--ops` repetitions or
+`--budget` seconds, whichever comes first, so slow backends still finish.
+"""
+import argparse
+import gc
+import os
+import tempfile
+import time
+from typing import Callable, List, Tuple
+
+from benchmarks.report import make_report, print_table, write_report
+from benchmarks.tree_gen import generate_tree, write_store
+from src.core.state_manager import StateManager
+from src.core.task_model import TaskStatus
+
+BACKENDS = {
+    # name -> (file name, journaled)
+    "json": ("tasks.json", False),
+    "journal": ("tasks.json", True),
+    "sqlite": ("tasks.db", False),
+    "binary": ("tasks.snap", False),
+}
+
+
+def _time_once(fn: Callable[[], object]) -> Tuple[float, object]:
+    start = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - start) * 1000, result
+
+
+def _time_repeated(fn: Callable[[int], object], max_ops: int, budget_s: float) -> dict:
+    """
+    Calls fn(i) until max_ops calls or budget_s seconds; returns ms statistics.
+    """
+    samples: List[float] = []
+    deadline = time.perf_counter() + budget_s
+    for i in range(max_ops):
+        start = time.perf_counter()
+        fn(i)
+        samples.append((time.perf_counter() - start) * 1000)
+        if time.perf_counter() > deadline and len(samples) >= 3:
+            break
+    samples.sort()
+    return {"ms": sum(samples) / len(samples), "p50": samples[len(samples) // 2],
+            "p95": samples[min(len(samples) - 1, int(len(samples) * 0.95))], "n": len(samples)}
+
+
+def bench_backend(directory: str, backend: str, data: dict, size: int, max_ops: int, budget_s: float) -> List[dict]:
+    file_name, journaled = BACKENDS[backend]
+    data_file = os.path.join(directory, f"{backend}-{size}-{file_name}")
+    write_store(data_file, data, journaled)
+    results = []
+
+    def record(op: str, stats: dict):
+        results.append(dict(bench="store", backend=backend, size=size, op=op, **stats))
+
+    gc.collect()
+    load_ms, manager = _time_once(lambda: StateManager(data_file, journaled=journaled))
+    record("load_state", {"ms": load_ms})
+
+    next_ms, task = _time_once(manager.get_next_actionable_task)
+    record("next_task_cold", {"ms": next_ms})
+    record("next_task_warm", _time_repeated(lambda i: manager.get_next_actionable_task(), 1000, budget_s))
+
+    def complete_next(i):
+        current = manager.get_next_actionable_task()
+        if current:
+            manager.update_task_status(current.id, TaskStatus.COMPLETED)
+        manager.get_next_actionable_task()
+    record("complete_and_next", _time_repeated(complete_next, max_ops, budget_s))
+
+    counts_ms, _ = _time_once(manager.get_subtree_counts)
+    record("subtree_counts_cold", {"ms": counts_ms})
+    record("subtree_counts_warm", _time_repeated(lambda i: manager.get_subtree_counts(), 1000, budget_s))
+
+    parent_id = task.id if task else None
+    record("add_task", _time_repeated(lambda i: manager.add_task(f"Bench {i}", parent_id=parent_id),
+                                      max_ops, budget_s))
+
+    # Mostly leaves from the last generated block, then one whole root subtree
+    rows = data["tasks"]
+    record("delete_task", _time_repeated(lambda i: manager.delete_task(rows[-1 - i][0]),
+                                         min(max_ops, len(rows) // 2), budget_s))
+    subtree_ms, _ = _time_once(lambda: manager.delete_task(data["root_task_ids"][0]))
+    record("delete_subtree", {"ms": subtree_ms})
+
+    save_ms, _ = _time_once(manager.save_state)
+    record("save_state", {"ms": save_ms})
+
+    archive_ms, archived = _time_once(manager.archive_finished)
+    record("archive_finished", {"ms": archive_ms, "tasks": archived})
+    manager.close()
+    os.remove(data_file)
+    if os.path.exists(manager.archive.path):
+        os.remove(manager.archive.path)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    parser.add_argument("--fan-out", type=int, default=5)
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--completed", type=float, default=0.5)
+    parser.add_argument("--ops", type=int, default=100)
+    parser.add_argument("--budget", type=float, default=5.0, help="seconds per repeated operation")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="-", help="report path, '-' for stdout")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    backends = args.backends.split(",")
+    results: List[dict] = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            data = generate_tree(size, args.fan_out, args.depth, args.completed, args.seed)
+            for backend in backends:
+                backend_results = bench_backend(directory, backend, data, size, args.ops, args.budget)
+                print_table(backend_results)
+                results += backend_results
+            del data
+
+    params = {k: v for k, v in vars(args).items() if k != "output"}
+    write_report(make_report("store_bench", params, results), args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Measures per-task memory and JSON store load/save times.
+
+    python -m benchmarks.task_model_bench [--tasks 100000]
+"""
+import argparse
+import gc
+import os
+import tempfile
+import time
+import tracemalloc
+
+from src.core.state_manager import StateManager
+from src.core.task_model import Task
+
+
+def build_store(data_file: str, count: int, fan_out: int = 5) -> StateManager:
+    manager = StateManager(data_file)
+    with manager.transaction():
+        parents = [None]
+        for i in range(count):
+            parent_id = parents[i // fan_out] if i else None
+            task = manager.add_task(f"Task {i}", "Some description", parent_id=parent_id)
+            parents.append(task.id)
+    return manager
+
+
+def bytes_per_task(data_file: str, count: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    manager = StateManager(data_file)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert len(manager.tasks) == count
+    return (after - before) / count
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_file = os.path.join(tmp, "tasks.json")
+        manager = build_store(data_file, args.tasks)
+
+        start = time.perf_counter()
+        manager.save_state()
+        save_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        StateManager(data_file)
+        load_s = time.perf_counter() - start
+
+        print(f"tasks:          {args.tasks}")
+        print(f"file size:      {os.path.getsize(data_file) / args.tasks:.1f} bytes/task")
+        print(f"in memory:      {bytes_per_task(data_file, args.tasks):.1f} bytes/task")
+        print(f"save_state:     {save_s * 1000:.0f} ms")
+        print(f"load_state:     {load_s * 1000:.0f} ms")
+        print(f"slots:          {not hasattr(Task('x'), '__dict__')}")
+
+
+if __name__ == "__main__":
+    main()
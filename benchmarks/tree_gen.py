@@ -0,0 +1,136 @@
+"""
+Synthetic task trees for the benchmarks.
+
+    python -m benchmarks.tree_gen data/bench.json --tasks 100000 --fan-out 5 --depth 4 --completed 0.5 [--words]
+
+The tree is a forest of complete `fan_out`-ary trees of depth `depth`
+(the last one cut short at `tasks`). Tasks are completed in DFS
+post-order, the way a user works through them, until `completed` of them
+are done. The output is a store in whatever format the file extension
+selects (.json, .db, .snap; --journaled for the journal format).
+With --words, titles and descriptions are made of everyday words with a
+Zipf-like frequency instead of "Task <n>", for the search benchmarks.
+"""
+import argparse
+import random
+import time
+import uuid
+from typing import List, Optional
+
+from src.core.state_manager import StateManager
+from src.core.task_model import TaskStatus
+
+# Common first, so Zipf-like weights give a natural word frequency
+WORDS = (
+    "call email write read clean buy fix plan book check send pay review update order cook wash "
+    "schedule prepare finish start organize sort print sign return pick meeting report kitchen "
+    "groceries laundry dishes budget taxes invoice doctor dentist appointment car bike garden "
+    "project presentation slides draft notes letter form application insurance bank account rent "
+    "birthday gift party trip tickets hotel flight passport documents files backup computer phone "
+    "charger printer desk shelf closet garage windows floor bathroom bedroom office homework "
+    "exercise run walk yoga medicine vitamins recipe dinner lunch breakfast coffee tea milk bread "
+    "vegetables fruit friends family mom dad sister brother neighbor colleague manager team client"
+).split()
+
+
+def _phrase(rng: random.Random, weights: List[float], length: int) -> str:
+    return " ".join(rng.choices(WORDS, weights, k=length)).capitalize()
+
+
+def generate_tree(count: int, fan_out: int = 5, depth: int = 4, completed: float = 0.0,
+                  seed: int = 0, words: bool = False) -> dict:
+    """
+    Returns snapshot data ({'tasks': rows, 'root_task_ids': [...]}) for a
+    generated forest. The same arguments always produce the same tree.
+    """
+    rng = random.Random(seed)
+    if fan_out > 1:
+        block = (fan_out ** (depth + 1) - 1) // (fan_out - 1)
+    else:
+        block = depth + 1
+
+    ids = [str(uuid.UUID(int=rng.getrandbits(128), version=4)) for _ in range(count)]
+    parents: List[Optional[int]] = [None] * count
+    children: List[List[int]] = [[] for _ in range(count)]
+    roots: List[int] = []
+    for i in range(count):
+        offset = i % block
+        if offset == 0:
+            roots.append(i)
+            continue
+        # Heap numbering inside each block: the parent of j is (j - 1) // fan_out
+        parent = i - offset + (offset - 1) // max(fan_out, 1)
+        parents[i] = parent
+        children[parent].append(i)
+
+    done = [False] * count
+    remaining = int(count * completed)
+    for index in _post_order(roots, children):
+        if remaining <= 0:
+            break
+        done[index] = True
+        remaining -= 1
+
+    pending, finished = TaskStatus.PENDING.value, TaskStatus.COMPLETED.value
+    if words:
+        weights = [1 / rank for rank in range(1, len(WORDS) + 1)]
+        return {"tasks": [
+            (ids[i], _phrase(rng, weights, rng.randint(2, 5)), _phrase(rng, weights, rng.randint(0, 8)),
+             finished if done[i] else pending,
+             ids[parents[i]] if parents[i] is not None else None,
+             False, [ids[c] for c in children[i]])
+            for i in range(count)
+        ], "root_task_ids": [ids[i] for i in roots]}
+    rows = [
+        (ids[i], f"Task {i}", f"Generated task {i} at offset {i % block}",
+         finished if done[i] else pending,
+         ids[parents[i]] if parents[i] is not None else None,
+         False, [ids[c] for c in children[i]])
+        for i in range(count)
+    ]
+    return {"tasks": rows, "root_task_ids": [ids[i] for i in roots]}
+
+
+def _post_order(roots: List[int], children: List[List[int]]):
+    for root in roots:
+        stack = [(root, iter(children[root]))]
+        while stack:
+            node, pending = stack[-1]
+            child = next(pending, None)
+            if child is None:
+                stack.pop()
+                yield node
+            else:
+                stack.append((child, iter(children[child])))
+
+
+def write_store(data_file: str, data: dict, journaled: bool = False) -> None:
+    """
+    Writes generated data through the backend StateManager would pick for
+    this file, so the result loads exactly like a real store.
+    """
+    manager = StateManager(data_file, journaled=journaled)
+    manager.store.write_snapshot(data)
+    manager.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("data_file")
+    parser.add_argument("--tasks", type=int, default=10_000)
+    parser.add_argument("--fan-out", type=int, default=5)
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--completed", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--journaled", action="store_true")
+    parser.add_argument("--words", action="store_true")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    data = generate_tree(args.tasks, args.fan_out, args.depth, args.completed, args.seed, args.words)
+    write_store(args.data_file, data, args.journaled)
+    print(f"Wrote {args.tasks} tasks to {args.data_file} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,41 @@
+import time
+_STARTED = time.perf_counter()
+
+import argparse
+import os
 import tkinter as tk
+from src.core.metrics import Session, metrics
 from src.ui.app import FrontalLobeApp
 from src.ui.styles import apply_styles
+_IMPORTED = time.perf_counter()
+
+# "1" prints import time and time to first frame; "exit" also quits right
+# after the first frame, for scripted measurements
+STARTUP_ENV = "FLP_STARTUP"
+
+def _report_startup(app, mode):
+    imports_ms = (_IMPORTED - _STARTED) * 1000
+    first_frame_ms = (time.perf_counter() - _STARTED) * 1000
+    metrics().observe("startup.imports", imports_ms)
+    metrics().observe("startup.first_frame", first_frame_ms)
+    print(f"Startup: imports {imports_ms:.0f} ms, first frame {first_frame_ms:.0f} ms")
+    if mode == "exit":
+        app.root.after(0, app._on_close)
 
 def main():
+    parser = argparse.ArgumentParser(description="Frontal Lobe Prosthetics")
+    parser.add_argument("--serve", action="store_true",
+                        help="run the headless state daemon that app windows and scripts attach to")
+    parser.add_argument("--socket", default=None, help="daemon socket path (default: config state_socket)")
+    args = parser.parse_args()
+
+    # No-op unless FLP_METRICS or FLP_PROFILE is set
+    session = Session.from_env()
+    if args.serve:
+        from src.core.state_daemon import serve
+        serve(args.socket)
+        session.finish()
+        return
     root = tk.Tk()
     root.title("Frontal Lobe Prosthetics")
     root.geometry("800x600")
@@ -11,7 +44,13 @@ def main():
     
     app = FrontalLobeApp(root)
     
+    startup_mode = os.environ.get(STARTUP_ENV)
+    if startup_mode:
+        # Idle callbacks run once the first frame has been drawn
+        root.after_idle(_report_startup, app, startup_mode)
+    
     root.mainloop()
+    session.finish()
 
 if __name__ == "__main__":
     main()
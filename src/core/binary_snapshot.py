@@ -0,0 +1,209 @@
+import json
+import mmap
+import os
+import struct
+from typing import Dict, Iterator, List, MutableMapping, Optional, Tuple
+from .journal import TaskJournal, gc_paused, write_atomic
+from .storage import Edge, LazyTaskMap, StorageBackend
+from .task_model import Task
+
+# Layout (all integers little-endian):
+#   header   magic, version, task count, index key width, index offset, roots offset
+#   records  per task: u32 length + JSON-encoded Task.to_row()
+#   index    per task, sorted by id: id padded to key width + u64 record offset
+#   roots    u32 length + JSON list of root ids
+MAGIC = b"PLPSNAP\x00"
+VERSION = 1
+HEADER = struct.Struct("<8sIIIQQ")
+LENGTH = struct.Struct("<I")
+OFFSET = struct.Struct("<Q")
+
+
+def write_binary_snapshot(path: str, data: dict) -> None:
+    """
+    Atomically writes {'tasks': [rows], 'root_task_ids': [...]} as a binary snapshot.
+    """
+    rows = data.get('tasks', [])
+    key_width = max((len(row[0].encode()) for row in rows), default=0)
+
+    def write(f):
+        f.write(b"\0" * HEADER.size)
+        offsets: Dict[bytes, int] = {}
+        for row in rows:
+            payload = json.dumps(row, separators=(",", ":")).encode()
+            offsets[row[0].encode()] = f.tell()
+            f.write(LENGTH.pack(len(payload)))
+            f.write(payload)
+
+        index_offset = f.tell()
+        f.write(b"".join(key.ljust(key_width, b"\0") + OFFSET.pack(offsets[key]) for key in sorted(offsets)))
+
+        roots_offset = f.tell()
+        roots = json.dumps(list(data.get('root_task_ids', [])), separators=(",", ":")).encode()
+        f.write(LENGTH.pack(len(roots)))
+        f.write(roots)
+
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, len(offsets), key_width, index_offset, roots_offset))
+
+    write_atomic(path, write, mode='wb')
+
+
+class BinarySnapshot:
+    """
+    Read-only, memory-mapped view of a binary snapshot.
+    Opening it only reads the header; tasks are decoded one by one through
+    a binary search over the sorted id index.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty file
+            self._file.close()
+            raise
+        magic, version, self.count, self._key_width, self._index_offset, self._roots_offset = \
+            HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a task snapshot")
+        self._entry_size = self._key_width + OFFSET.size
+
+    def root_ids(self) -> List[str]:
+        (length,) = LENGTH.unpack_from(self._mm, self._roots_offset)
+        start = self._roots_offset + LENGTH.size
+        return json.loads(self._mm[start:start + length])
+
+    def get(self, task_id: str) -> Optional[Task]:
+        key = task_id.encode()
+        if len(key) > self._key_width:
+            return None
+        key = key.ljust(self._key_width, b"\0")
+        mm, width, entry_size, base = self._mm, self._key_width, self._entry_size, self._index_offset
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            entry = base + mid * entry_size
+            probe = mm[entry:entry + width]
+            if probe < key:
+                lo = mid + 1
+            elif probe > key:
+                hi = mid
+            else:
+                (offset,) = OFFSET.unpack_from(mm, entry + width)
+                (length,) = LENGTH.unpack_from(mm, offset)
+                start = offset + LENGTH.size
+                return Task.from_row(json.loads(mm[start:start + length]))
+        return None
+
+    def ids(self) -> Iterator[str]:
+        mm, width = self._mm, self._key_width
+        for i in range(self.count):
+            entry = self._index_offset + i * self._entry_size
+            yield mm[entry:entry + width].rstrip(b"\0").decode()
+
+    def close(self) -> None:
+        self._mm.close()
+        self._file.close()
+
+
+class BinaryStore(StorageBackend):
+    """
+    A binary snapshot plus the usual append-only journal log.
+
+    Startup maps the snapshot and replays the log; tasks are decoded from
+    the mapping only when StateManager first touches them, so cold start
+    does not grow with the size of the store.
+    """
+    incremental = True
+
+    def __init__(self, snapshot_file: str, compact_every: int = 1000):
+        self.snapshot_file = snapshot_file
+        self.journal = TaskJournal(snapshot_file, compact_every=compact_every)
+        self._snapshot: Optional[BinarySnapshot] = None
+
+    def load(self) -> Tuple[MutableMapping[str, Task], List[str]]:
+        self._close_snapshot()
+        root_ids: List[str] = []
+        # An empty file is a snapshot that was created but never written
+        # (a crash before the first compaction); the log has everything
+        if os.path.exists(self.snapshot_file) and os.path.getsize(self.snapshot_file) > 0:
+            self._snapshot = BinarySnapshot(self.snapshot_file)
+            root_ids = self._snapshot.root_ids()
+        tasks = LazyTaskMap(self._fetch, self._stored_ids)
+        root_ids = self.journal.replay(tasks, root_ids)
+        return tasks, list(root_ids)
+
+    def _fetch(self, task_id: str) -> Optional[Task]:
+        return self._snapshot.get(task_id) if self._snapshot else None
+
+    def _stored_ids(self) -> Iterator[str]:
+        return self._snapshot.ids() if self._snapshot else iter(())
+
+    def write_changes(self, changes: Dict[str, Optional[tuple]], edges: List[Edge]) -> bool:
+        self.journal.append_changes(changes, edges)
+        return self.journal.needs_compaction()
+
+    def write_snapshot(self, data: dict) -> None:
+        # `data` holds every task, so nothing is read from the old mapping
+        # anymore; close it before replacing the file (Windows can't rename
+        # over a mapped file).
+        tmp_written = self.snapshot_file + ".new"
+        write_binary_snapshot(tmp_written, data)
+        self._close_snapshot()
+        os.replace(tmp_written, self.snapshot_file)
+        self.journal.clear_log()
+        self._snapshot = BinarySnapshot(self.snapshot_file)
+
+    def _close_snapshot(self) -> None:
+        if self._snapshot:
+            self._snapshot.close()
+            self._snapshot = None
+
+    def close(self) -> None:
+        self._close_snapshot()
+
+
+def json_to_binary(json_file: str, snapshot_file: str) -> int:
+    """
+    Imports a tasks.json store (plus any journal log) as a binary snapshot.
+    Returns the number of tasks written.
+    """
+    tasks, root_ids = TaskJournal(json_file).load()
+    with gc_paused():
+        rows = [t.to_row() for t in tasks.values()]
+    write_binary_snapshot(snapshot_file, {'tasks': rows, 'root_task_ids': root_ids})
+    return len(rows)
+
+
+def binary_to_json(snapshot_file: str, json_file: str) -> int:
+    """
+    Exports a binary snapshot (plus any journal log) as a tasks.json store.
+    Returns the number of tasks written.
+    """
+    store = BinaryStore(snapshot_file)
+    try:
+        tasks, root_ids = store.load()
+        with gc_paused():
+            rows = [t.to_row() for t in tasks.values()]
+    finally:
+        store.close()
+    TaskJournal(json_file).write_snapshot({'tasks': rows, 'root_task_ids': root_ids})
+    return len(rows)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Convert between tasks.json and binary snapshots.")
+    parser.add_argument("direction", choices=["import", "export"])
+    parser.add_argument("json_file", nargs="?", default="data/tasks.json")
+    parser.add_argument("snapshot_file", nargs="?", default="data/tasks.snap")
+    args = parser.parse_args()
+    if args.direction == "import":
+        print(f"Imported {json_to_binary(args.json_file, args.snapshot_file)} tasks into {args.snapshot_file}")
+    else:
+        print(f"Exported {binary_to_json(args.snapshot_file, args.json_file)} tasks to {args.json_file}")
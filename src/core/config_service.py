@@ -0,0 +1,43 @@
+import json
+import os
+import threading
+from typing import Any, Dict
+
+_lock = threading.Lock()
+_configs: Dict[str, "ConfigService"] = {}
+
+
+class ConfigService:
+    """
+    config.json, parsed once. A missing or broken file gives an empty config,
+    so every get() falls back to its default.
+    """
+
+    def __init__(self, path: str = "config.json"):
+        self.path = path
+        self.values: Dict[str, Any] = {}
+        self.reload()
+
+    def reload(self):
+        values = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r') as f:
+                    values = json.load(f)
+            except Exception as e:
+                print(f"Error loading config: {e}")
+        self.values = values if isinstance(values, dict) else {}
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.values.get(key, default)
+
+
+def get_config(path: str = "config.json") -> ConfigService:
+    """
+    The shared ConfigService for this path; the file is read on first use only.
+    """
+    with _lock:
+        config = _configs.get(path)
+        if config is None:
+            config = _configs[path] = ConfigService(path)
+        return config
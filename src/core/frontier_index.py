@@ -0,0 +1,82 @@
+import heapq
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+
+class FrontierIndex:
+    """
+    Answers "what is the next actionable task" without walking finished history.
+
+    For every parent (None stands for the list of root tasks) it keeps a heap
+    of (position, id) holding that parent's open (PENDING/ACTIVE) children.
+    The next task is found by descending into the first open child until a
+    task has none, which costs O(depth * log(siblings)).
+
+    Heaps are built on demand the first time a parent is visited. Children
+    that get finished or deleted are not removed eagerly; they are popped the
+    first time they reach the top of a heap, so each one is paid for once.
+    """
+
+    def __init__(self, open_children: Callable[[Optional[str]], Iterable[str]], is_open: Callable[[str], bool]):
+        # open_children(parent_id) yields the open children of a parent, in order
+        self._open_children = open_children
+        self._is_open = is_open
+        self._heaps: Dict[Optional[str], List[Tuple[int, str]]] = {}
+        self._next_position: Dict[Optional[str], int] = {}
+
+    def reset(self):
+        self._heaps.clear()
+        self._next_position.clear()
+
+    def next_id(self) -> Optional[str]:
+        parent_id = None
+        while True:
+            child_id = self._first_open_child(parent_id)
+            if child_id is None:
+                return parent_id
+            parent_id = child_id
+
+    def _first_open_child(self, parent_id: Optional[str]) -> Optional[str]:
+        heap = self._heaps.get(parent_id)
+        if heap is None:
+            heap = self._build(parent_id)
+        while heap:
+            child_id = heap[0][1]
+            if self._is_open(child_id):
+                return child_id
+            heapq.heappop(heap)
+        return None
+
+    def _build(self, parent_id: Optional[str]) -> List[Tuple[int, str]]:
+        # Ascending positions already satisfy the heap invariant
+        heap = list(enumerate(self._open_children(parent_id)))
+        self._heaps[parent_id] = heap
+        self._next_position[parent_id] = len(heap)
+        return heap
+
+    def child_added(self, parent_id: Optional[str], child_id: str):
+        heap = self._heaps.get(parent_id)
+        if heap is None:
+            # Not built yet; the child is picked up when it is
+            return
+        position = self._next_position[parent_id]
+        self._next_position[parent_id] = position + 1
+        heapq.heappush(heap, (position, child_id))
+
+    def child_reopened(self, parent_id: Optional[str]):
+        """
+        A finished child went back to PENDING/ACTIVE. Its old entry may already
+        be gone, so the parent's heap is rebuilt on the next lookup.
+        """
+        self._heaps.pop(parent_id, None)
+        self._next_position.pop(parent_id, None)
+
+    def reordered(self, parent_id: Optional[str]):
+        """
+        A parent's children changed order; rebuild its heap on the next lookup.
+        """
+        self._heaps.pop(parent_id, None)
+        self._next_position.pop(parent_id, None)
+
+    def removed(self, task_id: str):
+        self._heaps.pop(task_id, None)
+        self._next_position.pop(task_id, None)
@@ -0,0 +1,240 @@
+import gc
+import json
+import os
+from contextlib import contextmanager
+from typing import Callable, Dict, List, MutableMapping, Optional, Tuple
+from .task_model import ROW_FIELDS, IdList, Task
+
+
+def write_atomic(path: str, write: Callable, mode: str = 'w') -> None:
+    """
+    Writes a file through a temporary sibling and os.replace, so a crash
+    mid-write leaves either the old or the new file, never a truncated one.
+    `write` receives the open temporary file.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, mode) as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    _fsync_dir(directory)
+
+
+@contextmanager
+def gc_paused():
+    """
+    Pauses the cyclic garbage collector while bulk-creating objects. Decoding
+    a large store allocates so many containers that the collector would
+    otherwise run over and over for nothing.
+    """
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+def _fsync_dir(directory: str) -> None:
+    # Makes the rename itself durable. Not supported on every platform.
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+# A log at least as large as the snapshot is compacted even below
+# compact_every records, but never for size alone while it is this small
+MIN_COMPACT_BYTES = 1 << 20
+
+
+class TaskJournal:
+    """
+    Append-only mutation log stored next to a JSON snapshot.
+
+    The snapshot is a tasks.json file. Every commit appends one JSON line
+    per record to `<snapshot>.log` and fsyncs it. Replaying the log on top
+    of a snapshot that already contains its records is harmless: task and
+    root records carry full state, and child list records only place or
+    remove one id, so applying them in order again ends in the same lists.
+
+    Tasks are written as compact rows (see Task.to_row); the older
+    one-dict-per-task layout is still read.
+
+    Record shapes:
+        {"op": "put", "task": [row]}
+        {"op": "del", "id": "..."}
+        {"op": "roots", "ids": [...]}
+        {"op": "link", "parent": "..." or null for roots, "id": "...", "at": "end" or "front"}
+        {"op": "unlink", "parent": "..." or null, "id": "..."}
+
+    A parent's row is only logged when its own fields change; adding,
+    moving or removing one of its children logs a link or unlink record,
+    whatever the number of children.
+    """
+
+    def __init__(self, snapshot_file: str, compact_every: int = 1000):
+        self.snapshot_file = snapshot_file
+        self.log_file = snapshot_file + ".log"
+        self.compact_every = compact_every
+        self.records_since_snapshot = 0
+        self.log_bytes = 0
+
+    def load(self) -> Tuple[Dict[str, Task], List[str]]:
+        """
+        Returns (tasks by id, root ids) from the snapshot plus the log tail.
+        """
+        tasks: Dict[str, Task] = {}
+        root_ids: List[str] = []
+        if os.path.exists(self.snapshot_file):
+            with open(self.snapshot_file, 'r') as f:
+                raw = f.read()
+            with gc_paused():
+                data = json.loads(raw)
+                decode = Task.decode
+                for t_data in data.get('tasks', []):
+                    task = decode(t_data)
+                    tasks[task.id] = task
+            root_ids = data.get('root_task_ids', [])
+        return tasks, self.replay(tasks, root_ids)
+
+    def replay(self, tasks: MutableMapping[str, Task], root_ids: List[str]) -> List[str]:
+        """
+        Applies the log on top of an already loaded snapshot, in place.
+        Returns the resulting root ids.
+        """
+        self.records_since_snapshot = 0
+        self.log_bytes = 0
+        if not os.path.exists(self.log_file):
+            return root_ids
+
+        root_ids = IdList(root_ids)
+        good_offset = 0
+        with open(self.log_file, 'rb') as f:
+            for raw_line in f:
+                # A line without its newline is a torn write from a crash; stop there.
+                if not raw_line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(raw_line)
+                except ValueError:
+                    break
+                root_ids = self._apply(record, tasks, root_ids)
+                good_offset += len(raw_line)
+                self.records_since_snapshot += 1
+
+        if good_offset != os.path.getsize(self.log_file):
+            # Drop the torn tail so later appends start on a clean line.
+            with open(self.log_file, 'r+b') as f:
+                f.truncate(good_offset)
+                os.fsync(f.fileno())
+        self.log_bytes = good_offset
+        return list(root_ids)
+
+    @staticmethod
+    def _apply(record: dict, tasks: MutableMapping[str, Task], root_ids: IdList) -> IdList:
+        op = record.get("op")
+        if op == "put":
+            task = Task.decode(record["task"])
+            tasks[task.id] = task
+        elif op == "del":
+            tasks.pop(record["id"], None)
+        elif op == "roots":
+            root_ids = IdList(record["ids"])
+        elif op in ("link", "unlink"):
+            parent_id = record["parent"]
+            if parent_id is None:
+                siblings = root_ids
+            else:
+                parent = tasks.get(parent_id)
+                if parent is None:
+                    # Deleted later on; its own del record is what counts
+                    return root_ids
+                siblings = parent.children_ids
+            task_id = record["id"]
+            if op == "unlink":
+                siblings.discard(task_id)
+            elif record.get("at") == "front":
+                siblings.move_to_front(task_id)
+            else:
+                siblings.discard(task_id)
+                siblings.append(task_id)
+        return root_ids
+
+    def append(self, records: List[dict]) -> None:
+        if not records:
+            return
+        payload = "".join(json.dumps(r, separators=(",", ":")) + "\n" for r in records).encode()
+        os.makedirs(os.path.dirname(self.log_file) or ".", exist_ok=True)
+        with open(self.log_file, 'ab') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        self.records_since_snapshot += len(records)
+        self.log_bytes += len(payload)
+
+    def append_changes(self, changes: Dict[str, Optional[tuple]], edges: List[tuple]) -> None:
+        """
+        Appends StorageBackend.write_changes() arguments as records.
+        """
+        records = []
+        for task_id, row in changes.items():
+            if row is None:
+                records.append({"op": "del", "id": task_id})
+            else:
+                records.append({"op": "put", "task": row})
+        for parent_id, task_id, where in edges:
+            # A parent written in full (or deleted) already has its final children
+            if parent_id in changes:
+                continue
+            if where is None:
+                records.append({"op": "unlink", "parent": parent_id, "id": task_id})
+            else:
+                records.append({"op": "link", "parent": parent_id, "id": task_id, "at": where})
+        self.append(records)
+
+    def needs_compaction(self) -> bool:
+        """
+        True once the log has compact_every records, or has grown as large
+        as the snapshot (a few big records can outweigh many small ones).
+        """
+        if self.records_since_snapshot >= self.compact_every:
+            return True
+        if self.log_bytes < MIN_COMPACT_BYTES:
+            return False
+        try:
+            snapshot_bytes = os.path.getsize(self.snapshot_file)
+        except OSError:
+            snapshot_bytes = 0
+        return self.log_bytes >= snapshot_bytes
+
+    def write_snapshot(self, data: dict) -> None:
+        """
+        Atomically replaces the snapshot, then truncates the log.
+        A crash between the two steps only means the log is replayed again.
+        `data` is {'tasks': [rows], 'root_task_ids': [...]}.
+        """
+        # json.dumps runs in C; json.dump(..., indent=4) goes through the pure Python encoder
+        payload = json.dumps({'fields': ROW_FIELDS, **data}, separators=(",", ":"))
+        write_atomic(self.snapshot_file, lambda f: f.write(payload))
+        self.clear_log()
+
+    def clear_log(self) -> None:
+        """
+        Drops the log once its records are part of a durable snapshot.
+        """
+        if os.path.exists(self.log_file):
+            os.remove(self.log_file)
+            _fsync_dir(os.path.dirname(self.log_file) or ".")
+        self.records_since_snapshot = 0
+        self.log_bytes = 0
@@ -0,0 +1,69 @@
+import json
+from typing import Dict, List
+
+
+class SubtaskStreamParser:
+    """
+    Incremental parser for a JSON document that arrives in chunks.
+
+    Emits every object that sits directly inside an array and has a "title"
+    key as soon as its closing brace arrives, so with
+    {"steps": [{"title": ...}, {"title": ...}]} the first step is available
+    long before the document is complete. Wrapper objects and any nesting
+    depth are handled; only the characters of each new chunk are scanned.
+    """
+
+    def __init__(self):
+        self._text = ""
+        self._pos = 0
+        self._stack: List[str] = []     # open containers, '{' or '['
+        self._starts: List[int] = []    # start offset of each open container
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, chunk: str) -> List[Dict[str, str]]:
+        if not chunk:
+            return []
+        self._text += chunk
+        found = []
+        text, stack, starts = self._text, self._stack, self._starts
+        for i in range(self._pos, len(text)):
+            ch = text[i]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == "{" or ch == "[":
+                stack.append(ch)
+                starts.append(i)
+            elif (ch == "}" or ch == "]") and stack:
+                opened = stack.pop()
+                start = starts.pop()
+                if opened == "{" and stack and stack[-1] == "[":
+                    item = self._decode(text[start:i + 1])
+                    if item is not None:
+                        found.append(item)
+        self._pos = len(text)
+        return found
+
+    @staticmethod
+    def _decode(fragment: str):
+        try:
+            item = json.loads(fragment)
+        except ValueError:
+            return None
+        if isinstance(item, dict) and "title" in item:
+            return item
+        return None
+
+    @property
+    def text(self) -> str:
+        """
+        Everything fed so far.
+        """
+        return self._text
@@ -0,0 +1,112 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+
+def normalize(text: str) -> str:
+    # "Too tired " and "too   tired" should hit the same entry
+    return " ".join(str(text).split()).casefold()
+
+
+class LLMCache:
+    """
+    Content-addressed cache for LLM responses.
+
+    Keys are hashes of the model plus the normalized prompt inputs. Lookups
+    go through an in-memory LRU first and an on-disk SQLite table second;
+    entries older than `ttl_seconds` are ignored, and each tier is trimmed
+    back to its size limit, least recently used first.
+    Pass path=None for a memory-only cache.
+    """
+
+    def __init__(self, path: Optional[str] = "data/llm_cache.db", max_memory_entries: int = 256,
+                 max_disk_entries: int = 5000, ttl_seconds: float = 7 * 24 * 3600):
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (created, value)
+        self._lock = threading.Lock()
+        self._conn = None
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            # Lookups happen on the LLM worker threads
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed)")
+            self._conn.commit()
+
+    @staticmethod
+    def make_key(model: str, kind: str, *parts: str) -> str:
+        payload = json.dumps([model, kind] + [normalize(p) for p in parts])
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and now - entry[0] <= self.ttl_seconds:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+            if self._conn:
+                row = self._conn.execute(
+                    "SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+                if row and now - row[1] <= self.ttl_seconds:
+                    self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+                    self._conn.commit()
+                    value = json.loads(row[0])
+                    self._remember(key, row[1], value)
+                    self.hits += 1
+                    return value
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: Any) -> None:
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, value)
+            if not self._conn:
+                return
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now))
+            self._conn.execute(
+                "DELETE FROM responses WHERE created < ? OR key IN ("
+                "SELECT key FROM responses ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (now - self.ttl_seconds, self.max_disk_entries))
+            self._conn.commit()
+
+    def _remember(self, key: str, created: float, value: Any) -> None:
+        self._memory[key] = (created, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._conn:
+                self._conn.execute("DELETE FROM responses")
+                self._conn.commit()
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,166 @@
+import asyncio
+import queue
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set
+from .metrics import metrics
+
+
+class LLMRequest:
+    """
+    Handle for one submitted request. Cancelling it guarantees its callback
+    is never called, even if the result is already waiting in the queue.
+    """
+
+    def __init__(self, key: Hashable, callback: Callable[[Any], None], owner: Any):
+        self.key = key
+        self.callback = callback
+        self.owner = owner
+        self.cancelled = False
+        self._future: Optional["asyncio.Future"] = None
+
+    def cancel(self):
+        self.cancelled = True
+        if self._future is not None:
+            self._future.cancel()
+
+
+class LLMExecutor:
+    """
+    Runs LLM coroutines on a single background asyncio loop.
+
+    - At most `max_concurrency` requests talk to the backend at once.
+    - Requests submitted with the same key while one is in flight share it.
+    - Requests can be cancelled one by one or per owner (e.g. a view that is
+      being destroyed). Shared work is only cancelled when nobody waits for it.
+    - Results are handed back through one thread-safe queue; the UI thread
+      calls poll() to run the callbacks.
+    """
+
+    def __init__(self, max_concurrency: int = 4):
+        self.results: "queue.Queue[tuple]" = queue.Queue()
+        self._loop = asyncio.new_event_loop()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._max_concurrency = max_concurrency
+        self._inflight: Dict[Hashable, "asyncio.Future"] = {}
+        self._waiters: Dict[Hashable, int] = {}
+        self._owned: Dict[int, Set[LLMRequest]] = {}
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run_loop, name="llm-executor", daemon=True)
+        self._thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._semaphore = asyncio.Semaphore(self._max_concurrency)
+        self._loop.run_forever()
+
+    def submit(self, key: Hashable, make_coro: Callable[..., Awaitable[Any]],
+               callback: Callable[[Any], None], owner: Any = None,
+               on_progress: Optional[Callable[[Any], None]] = None) -> LLMRequest:
+        """
+        Schedules make_coro() unless a request with the same key is already
+        running, in which case its result is shared. `callback` receives the
+        result (or the exception) on whichever thread calls poll().
+
+        With on_progress, make_coro is called as make_coro(report); every
+        report(value) reaches on_progress through the same queue. Only the
+        request that started the work gets progress, later joiners just the
+        result.
+        """
+        request = LLMRequest(key, callback, owner)
+        if on_progress is not None:
+            factory = make_coro
+            make_coro = lambda: factory(lambda value: self._post(request, on_progress, value))
+        if owner is not None:
+            with self._lock:
+                self._owned.setdefault(id(owner), set()).add(request)
+        request._future = asyncio.run_coroutine_threadsafe(self._wait_for(request, make_coro), self._loop)
+        return request
+
+    async def _wait_for(self, request: LLMRequest, make_coro: Callable[[], Awaitable[Any]]):
+        shared = self._inflight.get(request.key)
+        if shared is None:
+            shared = self._loop.create_task(self._limited(make_coro))
+            self._inflight[request.key] = shared
+            shared.add_done_callback(lambda _: self._inflight.pop(request.key, None))
+        self._waiters[request.key] = self._waiters.get(request.key, 0) + 1
+        try:
+            # shield: one waiter going away must not cancel the others
+            result = await asyncio.shield(shared)
+        except asyncio.CancelledError:
+            if not shared.done() and self._waiters.get(request.key, 0) <= 1:
+                shared.cancel()
+            raise
+        except Exception as e:
+            result = e
+        finally:
+            self._release(request)
+        self._post(request, request.callback, result)
+
+    def _post(self, request: LLMRequest, callback: Callable[[Any], None], value: Any):
+        if not request.cancelled:
+            self.results.put((request, callback, value))
+
+    async def _limited(self, make_coro: Callable[[], Awaitable[Any]]):
+        async with self._semaphore:
+            return await make_coro()
+
+    def _release(self, request: LLMRequest):
+        remaining = self._waiters.get(request.key, 1) - 1
+        if remaining:
+            self._waiters[request.key] = remaining
+        else:
+            self._waiters.pop(request.key, None)
+        if request.owner is not None:
+            with self._lock:
+                owned = self._owned.get(id(request.owner))
+                if owned is not None:
+                    owned.discard(request)
+                    if not owned:
+                        del self._owned[id(request.owner)]
+
+    def cancel_owner(self, owner: Any):
+        """
+        Cancels every pending request submitted with this owner.
+        """
+        with self._lock:
+            requests = self._owned.pop(id(owner), set())
+        for request in requests:
+            request.cancel()
+
+    def poll(self, limit: int = 50):
+        """
+        Runs the callbacks of finished requests. Call from the UI thread.
+        """
+        active = metrics()
+        if active.enabled:
+            active.observe("llm.executor.results_queue", self.results.qsize())
+            active.observe("llm.executor.inflight", len(self._inflight))
+        for _ in range(limit):
+            try:
+                request, callback, value = self.results.get_nowait()
+            except queue.Empty:
+                return
+            if request.cancelled:
+                continue
+            try:
+                callback(value)
+            except Exception as e:
+                print(f"LLM callback error: {e}")
+
+    def run_sync(self, coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+        """
+        Runs a coroutine on the executor loop and blocks for its result.
+        For scripts and shutdown code, never for the UI thread.
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout)
+
+    def shutdown(self):
+        for task in list(self._inflight.values()):
+            self._loop.call_soon_threadsafe(task.cancel)
+        try:
+            # Lets finished streams close their connections before the loop stops
+            self.run_sync(self._loop.shutdown_asyncgens(), timeout=2)
+        except Exception as e:
+            print(f"LLM executor shutdown error: {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=2)
@@ -0,0 +1,304 @@
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Awaitable, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling a backend that is known to be unhealthy.
+    """
+
+
+class CircuitBreaker:
+    """
+    Stops calling a backend after `failure_threshold` failures in a row.
+
+    While open every call is refused. After `reset_seconds` one probe call is
+    let through (half open); its success closes the circuit again, its
+    failure keeps it open for another `reset_seconds`.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self._clock = clock
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and self._clock() - self._opened_at >= self.reset_seconds:
+                self.state = self.HALF_OPEN
+                return True
+            # Open, or half open with the probe still running
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+
+    def record_cancelled(self):
+        """
+        A call ended without an outcome. If it was the half-open probe, the
+        circuit goes back to open with the old timestamp, so the next call
+        becomes a new probe instead of the slot staying taken forever.
+        """
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = self._clock()
+
+
+class LatencyTracker:
+    """
+    Recent successful call durations, for picking the hedge delay.
+    """
+
+    def __init__(self, window: int = 100, min_samples: int = 10):
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """
+        Returns None until there are enough samples to say anything.
+        """
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class ResilientCaller:
+    """
+    Wraps backend calls with a deadline, jittered retries, hedging and a
+    circuit breaker.
+
+    - Every call must finish within `deadline` seconds, retries included.
+      The callable receives the time it has left and should pass it on as
+      its own timeout.
+    - Failed attempts are retried up to `retries` times after a random delay
+      of up to backoff * 2**attempt ("full jitter"), unless the error is a
+      client error that would fail again (4xx other than 408/409/429).
+    - When an attempt takes longer than the `hedge_percentile` of recent
+      latencies, a second identical attempt is started and whichever
+      answers first wins.
+    - Attempts are refused with CircuitOpenError while the breaker is open;
+      callers are expected to fall back to something local.
+    """
+
+    def __init__(self, deadline: float = 30.0, retries: int = 2, backoff: float = 0.5,
+                 max_backoff: float = 8.0, hedge_percentile: Optional[float] = 0.95,
+                 min_hedge_delay: float = 0.25, breaker: Optional[CircuitBreaker] = None,
+                 latency: Optional[LatencyTracker] = None):
+        self.deadline = deadline
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.hedge_percentile = hedge_percentile
+        self.min_hedge_delay = min_hedge_delay
+        self.breaker = breaker or CircuitBreaker()
+        self.latency = latency or LatencyTracker()
+        self.hedges = 0
+        self.hedge_wins = 0
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+
+    @property
+    def healthy(self) -> bool:
+        return self.breaker.state == CircuitBreaker.CLOSED
+
+    def allow(self) -> bool:
+        return self.breaker.allow()
+
+    def record_success(self, seconds: float):
+        self.latency.record(seconds)
+        self.breaker.record_success()
+
+    def record_failure(self):
+        self.breaker.record_failure()
+
+    def record_cancelled(self):
+        self.breaker.record_cancelled()
+
+    def hedge_delay(self) -> Optional[float]:
+        if self.hedge_percentile is None:
+            return None
+        threshold = self.latency.percentile(self.hedge_percentile)
+        if threshold is None:
+            return None
+        return max(threshold, self.min_hedge_delay)
+
+    @staticmethod
+    def retryable(error: BaseException) -> bool:
+        status = getattr(error, "status_code", None)
+        return status is None or status >= 500 or status in (408, 409, 429)
+
+    def _sleep_for(self, attempt: int, remaining: float) -> float:
+        return min(remaining, random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt)))
+
+    def call(self, fn: Callable[[float], T]) -> T:
+        """
+        Runs fn(timeout) on the calling thread (plus one pool thread when hedging).
+        """
+        end = time.monotonic() + self.deadline
+        error: BaseException = TimeoutError(f"no answer within {self.deadline:.1f}s")
+        for attempt in range(self.retries + 1):
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                break
+            if not self.allow():
+                raise CircuitOpenError("LLM backend is unavailable")
+            try:
+                result = self._hedged(fn, remaining)
+            except Exception as e:
+                error = e
+                self.record_failure()
+                if not self.retryable(e):
+                    break
+                if attempt < self.retries:
+                    time.sleep(self._sleep_for(attempt, end - time.monotonic()))
+                continue
+            except BaseException:
+                self.breaker.record_cancelled()
+                raise
+            self.breaker.record_success()
+            return result
+        raise error
+
+    def _hedged(self, fn: Callable[[float], T], timeout: float) -> T:
+        delay = self.hedge_delay()
+        if delay is None or delay >= timeout:
+            return self._timed(fn, timeout)
+        pool = self._get_pool()
+        first = pool.submit(self._timed, fn, timeout)
+        pending = {first}
+        done, _ = wait(pending, timeout=delay)
+        if not done:
+            self.hedges += 1
+            pending.add(pool.submit(self._timed, fn, timeout - delay))
+        end = time.monotonic() + timeout - delay
+        error: BaseException = TimeoutError(f"no answer within {timeout:.1f}s")
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, end - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                if future.exception() is None:
+                    if future is not first:
+                        self.hedge_wins += 1
+                    # The loser can't be interrupted; it finishes in the background
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    async def acall(self, make_coro: Callable[[float], Awaitable[T]]) -> T:
+        """
+        call() for coroutines. Losing hedges are cancelled.
+        """
+        loop = asyncio.get_running_loop()
+        end = loop.time() + self.deadline
+        error: BaseException = TimeoutError(f"no answer within {self.deadline:.1f}s")
+        for attempt in range(self.retries + 1):
+            remaining = end - loop.time()
+            if remaining <= 0:
+                break
+            if not self.allow():
+                raise CircuitOpenError("LLM backend is unavailable")
+            try:
+                result = await self._ahedged(make_coro, remaining)
+            except Exception as e:
+                error = e
+                self.record_failure()
+                if not self.retryable(e):
+                    break
+                if attempt < self.retries:
+                    await asyncio.sleep(self._sleep_for(attempt, end - loop.time()))
+                continue
+            except BaseException:
+                # Cancelled (the user moved on): no verdict on the backend
+                self.breaker.record_cancelled()
+                raise
+            self.breaker.record_success()
+            return result
+        raise error
+
+    async def _ahedged(self, make_coro: Callable[[float], Awaitable[T]], timeout: float) -> T:
+        loop = asyncio.get_running_loop()
+        end = loop.time() + timeout
+        first = asyncio.ensure_future(self._atimed(make_coro, timeout))
+        pending = {first}
+        try:
+            delay = self.hedge_delay()
+            if delay is not None and delay < timeout:
+                done, _ = await asyncio.wait(pending, timeout=delay)
+                if not done:
+                    self.hedges += 1
+                    pending.add(asyncio.ensure_future(self._atimed(make_coro, timeout - delay)))
+            error: BaseException = TimeoutError(f"no answer within {timeout:.1f}s")
+            while pending:
+                remaining = end - loop.time()
+                if remaining <= 0:
+                    break
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _timed(self, fn: Callable[[float], T], timeout: float) -> T:
+        # Each attempt's own duration, so hedging doesn't inflate the percentile
+        started = time.monotonic()
+        result = fn(timeout)
+        self.latency.record(time.monotonic() - started)
+        return result
+
+    async def _atimed(self, make_coro: Callable[[float], Awaitable[T]], timeout: float) -> T:
+        started = time.monotonic()
+        result = await make_coro(timeout)
+        self.latency.record(time.monotonic() - started)
+        return result
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="llm-hedge")
+            return self._pool
+
+    def shutdown(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
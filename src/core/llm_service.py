@@ -1,117 +1,501 @@
+import asyncio
+import importlib.util
 import json
-import os
-from typing import List, Dict
-try:
-    from openai import OpenAI
-except ImportError:
-    OpenAI = None
+import threading
+import time
+from collections import deque
+from typing import Callable, List, Dict, Optional, Tuple
+from .config_service import get_config
+from .json_stream import SubtaskStreamParser
+from .llm_cache import LLMCache
+from .llm_resilience import CircuitBreaker, ResilientCaller
+from .metrics import metrics
+from .prompt_builder import Prompt, PromptBuilder, TaskContext, estimate_tokens
+_sdk: Optional[tuple] = None
+_sdk_lock = threading.Lock()
+
+
+def _load_sdk() -> tuple:
+    """
+    Imports the OpenAI SDK on first use, since the import alone takes the better
+    part of a second. Returns (OpenAI, AsyncOpenAI), or (None, None) without it.
+    """
+    global _sdk
+    with _sdk_lock:
+        if _sdk is None:
+            try:
+                from openai import AsyncOpenAI, OpenAI
+                _sdk = (OpenAI, AsyncOpenAI)
+            except ImportError:
+                _sdk = (None, None)
+        return _sdk
+
 
 class LLMService:
-    def __init__(self, config_path: str = "config.json"):
+    def __init__(self, config_path: str = "config.json", cache: Optional[LLMCache] = None):
         self.api_key = None
         self.model = "gpt-4o-mini"
-        self.client = None
         self.base_url = None
+        self.timeout = 60.0
+        self.cache_enabled = True
+        self.cache_ttl_hours = 24 * 7
+        self.streaming = True
+        self.deadline = 30.0
+        self.retries = 2
+        self.hedge_percentile = 0.95
+        self.breaker_failures = 5
+        self.breaker_reset_seconds = 30.0
+        self.context_tokens = 300
         self._load_config(config_path)
-        
-        if self.api_key and OpenAI:
-            self.client = OpenAI(api_key=self.api_key, base_url=self.base_url)
+        # Seconds from request start to the first parsed step, recent streamed calls
+        self.time_to_first_step = deque(maxlen=100)
+        # (kind, estimated prompt tokens, prompt tokens reported by the API or None), recent calls
+        self.prompt_usage = deque(maxlen=100)
+        self.prompts = PromptBuilder(self.context_tokens)
+
+        # Deadlines, retries, hedging and the circuit breaker; the SDK's own retries are off
+        self.resilience = ResilientCaller(
+            deadline=self.deadline, retries=self.retries, hedge_percentile=self.hedge_percentile,
+            breaker=CircuitBreaker(self.breaker_failures, self.breaker_reset_seconds))
+
+        # Both clients are built on first use (or by warm_up), so constructing
+        # the service never imports the SDK. The async one is created inside
+        # the LLMExecutor's event loop.
+        self.configured = bool(self.api_key) and importlib.util.find_spec("openai") is not None
+        self._client = None
+        self._client_lock = threading.Lock()
+        self._async_client = None
+
+        # Identical requests (same model and normalized inputs) are answered from here
+        self.cache = cache
+        if self.cache is None and self.cache_enabled and self.configured:
+            self.cache = LLMCache(ttl_seconds=self.cache_ttl_hours * 3600)
 
     def _load_config(self, config_path):
-        if os.path.exists(config_path):
-            try:
-                with open(config_path, 'r') as f:
-                    config = json.load(f)
-                    self.api_key = config.get("openai_api_key")
-                    self.model = config.get("model", "gpt-4o-mini")
-                    self.base_url = config.get("llm_base_url")
-            except Exception as e:
-                print(f"Error loading config: {e}")
+        config = get_config(config_path)
+        self.api_key = config.get("openai_api_key")
+        self.model = config.get("model", "gpt-4o-mini")
+        self.base_url = config.get("llm_base_url")
+        self.timeout = config.get("llm_timeout_seconds", self.timeout)
+        self.cache_enabled = config.get("llm_cache", True)
+        self.cache_ttl_hours = config.get("llm_cache_ttl_hours", self.cache_ttl_hours)
+        self.streaming = config.get("llm_streaming", True)
+        self.deadline = config.get("llm_deadline_seconds", self.deadline)
+        self.retries = config.get("llm_retries", self.retries)
+        self.hedge_percentile = config.get("llm_hedge_percentile", self.hedge_percentile)
+        self.breaker_failures = config.get("llm_breaker_failures", self.breaker_failures)
+        self.breaker_reset_seconds = config.get("llm_breaker_reset_seconds", self.breaker_reset_seconds)
+        self.context_tokens = config.get("llm_context_tokens", self.context_tokens)
+
+    @property
+    def available(self) -> bool:
+        """
+        Whether calls go to a model; without one every call returns the mock.
+        Answered without importing the SDK.
+        """
+        return self._client is not None or self.configured
+
+    @property
+    def client(self):
+        """
+        The sync OpenAI client, built on first use.
+        """
+        if self._client is None and self.configured:
+            with self._client_lock:
+                if self._client is None:
+                    OpenAI, _ = _load_sdk()
+                    if OpenAI is None:
+                        self.configured = False
+                    else:
+                        self._client = OpenAI(api_key=self.api_key, base_url=self.base_url,
+                                              timeout=self.timeout, max_retries=0)
+        return self._client
+
+    @client.setter
+    def client(self, client):
+        self._client = client
 
-    def break_down_task(self, task_title: str, task_description: str = "") -> List[Dict[str, str]]:
+    def warm_up(self):
+        """
+        Imports the SDK and builds the client ahead of the first call. Meant
+        for a background thread once the UI is up.
+        """
+        started = time.perf_counter()
+        if self.client is not None:
+            metrics().observe("startup.llm_client", (time.perf_counter() - started) * 1000)
+
+    def request_key(self, kind: str, *parts: str) -> str:
+        """
+        Identifies a request by model and normalized inputs. Used as the cache
+        key and to coalesce identical in-flight requests.
+        """
+        return LLMCache.make_key(self.model, kind, *parts)
+
+    def prompt_key(self, prompt: Prompt) -> str:
+        # The user message holds every input that varies, context included
+        return self.request_key(prompt.kind, prompt.user)
+
+    def break_down_key(self, task_title: str, task_description: str = "",
+                       context: Optional[TaskContext] = None) -> str:
+        return self.prompt_key(self.prompts.break_down(task_title, task_description, context))
+
+    def resolve_block_key(self, task_title: str, block_reason: str, language: str = "en",
+                          context: Optional[TaskContext] = None) -> str:
+        return self.prompt_key(self.prompts.resolve_block(task_title, block_reason, language, context))
+
+    def _cache_lookup(self, use_cache: bool, key: str) -> Optional[List[Dict[str, str]]]:
+        if not (use_cache and self.cache):
+            return None
+        cached = self.cache.get(key)
+        if cached is None:
+            return None
+        # Copies, so callers can't modify what is in the cache
+        return [dict(item) for item in cached]
+
+    def _cache_store(self, use_cache: bool, key: str, result: List[Dict[str, str]]):
+        # Errors and malformed replies are never cached
+        if use_cache and self.cache and self._valid_subtasks(result):
+            self.cache.put(key, result)
+
+    def break_down_task(self, task_title: str, task_description: str = "", use_cache: bool = True,
+                        context: Optional[TaskContext] = None) -> List[Dict[str, str]]:
         """
         Returns a list of subtasks in the format: [{"title": "...", "description": "..."}]
+        Pass use_cache=False to always ask the model, and a TaskContext to
+        tell it where the task sits in the tree.
         """
-        if not self.client:
-            # Mock response if no client/key
-            return [
-                {"title": f"Step 1 for {task_title}", "description": "First step"},
-                {"title": f"Step 2 for {task_title}", "description": "Second step"},
-            ]
-
-        prompt = f"""
-        You are an executive function assistant. The user is overwhelmed by the task: "{task_title}".
-        Description: "{task_description}"
-        
-        Break this task down into 3-5 smaller, manageable steps. 
-        Return ONLY a JSON array of objects with "title" and "description" keys.
-        Example:
-        [
-            {{"title": "Get the vacuum", "description": "Bring it to the room"}},
-            {{"title": "Clear the floor", "description": "Pick up large items"}}
-        ]
+        if not self.available:
+            return self._mock_break_down(task_title)
+
+        prompt = self.prompts.break_down(task_title, task_description, context)
+        key = self.prompt_key(prompt)
+        cached = self._cache_lookup(use_cache, key)
+        if cached is not None:
+            return cached
+        result = self._complete(prompt)
+        self._cache_store(use_cache, key, result)
+        return self._fallback(result, lambda: self._mock_break_down(task_title))
+
+    async def abreak_down_task(self, task_title: str, task_description: str = "", use_cache: bool = True,
+                               context: Optional[TaskContext] = None) -> List[Dict[str, str]]:
+        """
+        break_down_task for the LLMExecutor's event loop.
         """
+        if not self.available:
+            return self._mock_break_down(task_title)
 
+        prompt = self.prompts.break_down(task_title, task_description, context)
+        key = self.prompt_key(prompt)
+        cached = self._cache_lookup(use_cache, key)
+        if cached is not None:
+            return cached
+        result = await self._acomplete(prompt)
+        self._cache_store(use_cache, key, result)
+        return self._fallback(result, lambda: self._mock_break_down(task_title))
+
+    def break_down_tasks(self, tasks: List[Tuple[str, str, str]], max_prompt_tokens: int = 3000,
+                         retries: int = 1, use_cache: bool = True) -> Dict[str, List[Dict[str, str]]]:
+        """
+        Breaks down many tasks with as few requests as possible.
+        `tasks` holds (task_id, title, description) tuples. They are packed
+        into requests of roughly max_prompt_tokens each; entries that come
+        back missing or malformed are asked for again (only those), up to
+        `retries` times. Returns {task_id: subtasks} for every task that got
+        a valid breakdown.
+        """
+        if not self.available:
+            return {task_id: self._mock_break_down(title) for task_id, title, _ in tasks}
+
+        results: Dict[str, List[Dict[str, str]]] = {}
+        pending = []
+        for task_id, title, description in tasks:
+            cached = self._cache_lookup(use_cache, self.break_down_key(title, description))
+            if cached is not None:
+                results[task_id] = cached
+            else:
+                pending.append((task_id, title, description))
+
+        for _ in range(retries + 1):
+            if not pending:
+                break
+            failed = []
+            for chunk in self._chunk_by_tokens(pending, max_prompt_tokens):
+                answers = self._complete_batch(chunk)
+                for number, (task_id, title, description) in enumerate(chunk, 1):
+                    subtasks = answers.get(str(number))
+                    if not self._valid_subtasks(subtasks):
+                        failed.append((task_id, title, description))
+                        continue
+                    results[task_id] = subtasks
+                    self._cache_store(use_cache, self.break_down_key(title, description), subtasks)
+            pending = failed
+        if pending and not self.resilience.healthy:
+            results.update((task_id, self._mock_break_down(title)) for task_id, title, _ in pending)
+        return results
+
+    @staticmethod
+    def _chunk_by_tokens(tasks: List[Tuple[str, str, str]], max_prompt_tokens: int):
+        chunk, used = [], 0
+        for task in tasks:
+            cost = estimate_tokens(task[1]) + estimate_tokens(task[2]) + 16
+            if chunk and used + cost > max_prompt_tokens:
+                yield chunk
+                chunk, used = [], 0
+            chunk.append(task)
+            used += cost
+        if chunk:
+            yield chunk
+
+    def _complete_batch(self, chunk: List[Tuple[str, str, str]]) -> Dict[str, object]:
+        prompt = self.prompts.break_down_batch([(title, description) for _, title, description in chunk])
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant that breaks down tasks."},
-                    {"role": "user", "content": prompt}
-                ],
-                response_format={"type": "json_object"}
-            )
-            content = response.choices[0].message.content
-            result = json.loads(content)
-            # Handle if the LLM returns a wrapper key like "tasks": [...]
-            if isinstance(result, dict):
-                for key in result:
-                    if isinstance(result[key], list):
-                        return result[key]
-                return [] # Could not find list
-            return result
+            result = json.loads(self.resilience.call(lambda timeout: self._create(prompt, timeout)))
         except Exception as e:
             print(f"LLM Error: {e}")
+            return {}
+        return result if isinstance(result, dict) else {}
+
+    @staticmethod
+    def _valid_subtasks(subtasks) -> bool:
+        return (isinstance(subtasks, list) and len(subtasks) > 0
+                and all(isinstance(st, dict) and isinstance(st.get("title"), str) and st["title"].strip()
+                        for st in subtasks))
+
+    def _checked(self, subtasks) -> List[Dict[str, str]]:
+        # A reply without titled steps (e.g. a list of strings) is an error, not a result
+        if not self._valid_subtasks(subtasks):
+            print("LLM Error: no valid steps in the response")
             return []
+        return subtasks
+
+    @staticmethod
+    def _mock_break_down(task_title: str) -> List[Dict[str, str]]:
+        # Mock response if no client/key
+        return [
+            {"title": f"Step 1 for {task_title}", "description": "First step"},
+            {"title": f"Step 2 for {task_title}", "description": "Second step"},
+        ]
 
-    def resolve_block(self, task_title: str, block_reason: str, language: str = "en") -> List[Dict[str, str]]:
+    def resolve_block(self, task_title: str, block_reason: str, language: str = "en", use_cache: bool = True,
+                      context: Optional[TaskContext] = None) -> List[Dict[str, str]]:
         """
         Returns a list of subtasks to resolve a specific block.
+        Recurring blockers are served from the cache unless use_cache=False.
         """
-        if not self.client:
-            # Mock response
-            return [
-                {"title": f"Address: {block_reason}", "description": "First step to unblock"},
-                {"title": "Continue task", "description": "Resume original work"},
-            ]
+        if not self.available:
+            return self._mock_resolve_block(block_reason)
 
-        prompt = f"""
-        You are an executive function assistant. The user is blocked on the task: "{task_title}".
-        The user says: "{block_reason}"
-        
-        Provide 2-4 concrete, small steps to resolve this specific blocker and get back on track.
-        Reply in {language}.
-        Return ONLY a JSON array of objects with "title" and "description" keys.
+        prompt = self.prompts.resolve_block(task_title, block_reason, language, context)
+        key = self.prompt_key(prompt)
+        cached = self._cache_lookup(use_cache, key)
+        if cached is not None:
+            return cached
+        result = self._complete(prompt)
+        self._cache_store(use_cache, key, result)
+        return self._fallback(result, lambda: self._mock_resolve_block(block_reason))
+
+    async def aresolve_block(self, task_title: str, block_reason: str, language: str = "en", use_cache: bool = True,
+                             context: Optional[TaskContext] = None) -> List[Dict[str, str]]:
+        """
+        resolve_block for the LLMExecutor's event loop.
         """
+        if not self.available:
+            return self._mock_resolve_block(block_reason)
 
-        try:
+        prompt = self.prompts.resolve_block(task_title, block_reason, language, context)
+        key = self.prompt_key(prompt)
+        cached = self._cache_lookup(use_cache, key)
+        if cached is not None:
+            return cached
+        result = await self._acomplete(prompt)
+        self._cache_store(use_cache, key, result)
+        return self._fallback(result, lambda: self._mock_resolve_block(block_reason))
+
+    async def astream_resolve_block(self, task_title: str, block_reason: str, language: str = "en",
+                                    on_step: Optional[Callable[[Dict[str, str]], None]] = None,
+                                    use_cache: bool = True,
+                                    context: Optional[TaskContext] = None) -> List[Dict[str, str]]:
+        """
+        Like aresolve_block, but streams the completion and calls on_step with
+        each {"title", "description"} as soon as it has been parsed.
+        Returns the full list at the end.
+        """
+        if not self.available:
+            return self._replay(self._mock_resolve_block(block_reason), on_step)
+
+        prompt = self.prompts.resolve_block(task_title, block_reason, language, context)
+        key = self.prompt_key(prompt)
+        cached = self._cache_lookup(use_cache, key)
+        if cached is not None:
+            return self._replay(cached, on_step)
+        result, complete = await self._astream(prompt, on_step)
+        if complete:
+            self._cache_store(use_cache, key, result)
+        if not result and not self.resilience.healthy:
+            return self._replay(self._mock_resolve_block(block_reason), on_step)
+        return result
+
+    def _fallback(self, result: List[Dict[str, str]],
+                  mock: Callable[[], List[Dict[str, str]]]) -> List[Dict[str, str]]:
+        # Canned steps only stand in while the breaker keeps the model away;
+        # an ordinary failure returns [] so the caller can show the error
+        if not result and not self.resilience.healthy:
+            return mock()
+        return result
+
+    @staticmethod
+    def _replay(steps: List[Dict[str, str]], on_step) -> List[Dict[str, str]]:
+        if on_step:
+            for step in steps:
+                on_step(step)
+        return steps
+
+    @staticmethod
+    def _mock_resolve_block(block_reason: str) -> List[Dict[str, str]]:
+        # Mock response
+        return [
+            {"title": f"Address: {block_reason}", "description": "First step to unblock"},
+            {"title": "Continue task", "description": "Resume original work"},
+        ]
+
+    def _record_usage(self, prompt: Prompt, usage):
+        self.prompt_usage.append((prompt.kind, prompt.tokens, getattr(usage, "prompt_tokens", None)))
+        active = metrics()
+        if not active.enabled:
+            return
+        active.incr(f"llm.calls.{prompt.kind}")
+        active.observe("llm.prompt_tokens_estimated", prompt.tokens)
+        if usage is not None:
+            active.observe("llm.prompt_tokens", usage.prompt_tokens or 0)
+            active.observe("llm.completion_tokens", usage.completion_tokens or 0)
+            active.incr("llm.total_tokens", usage.total_tokens or 0)
+
+    def _create(self, prompt: Prompt, timeout: float) -> str:
+        with metrics().timer(f"llm.{prompt.kind}"):
             response = self.client.chat.completions.create(
                 model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant that resolves blocks."},
-                    {"role": "user", "content": prompt}
-                ],
-                response_format={"type": "json_object"}
+                messages=prompt.messages,
+                response_format={"type": "json_object"},
+                timeout=timeout
             )
-            content = response.choices[0].message.content
-            result = json.loads(content)
-            
-            if isinstance(result, dict):
-                for key in result:
-                    if isinstance(result[key], list):
-                        return result[key]
-                return []
-            return result
+        self._record_usage(prompt, response.usage)
+        return response.choices[0].message.content
+
+    def _complete(self, prompt: Prompt) -> List[Dict[str, str]]:
+        try:
+            return self._checked(
+                self._parse_subtasks(self.resilience.call(lambda timeout: self._create(prompt, timeout))))
+        except Exception as e:
+            print(f"LLM Error: {e}")
+            return []
+
+    def _get_async_client(self):
+        if self._async_client is None:
+            # One client, so every request shares its connection pool
+            AsyncOpenAI = _load_sdk()[1]
+            self._async_client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url,
+                                             timeout=self.timeout, max_retries=0)
+        return self._async_client
+
+    async def _acomplete(self, prompt: Prompt) -> List[Dict[str, str]]:
+        if not _load_sdk()[1]:
+            # Old SDK without the async client: keep the event loop free anyway
+            return await asyncio.to_thread(self._complete, prompt)
+        try:
+            return self._checked(
+                self._parse_subtasks(await self.resilience.acall(lambda timeout: self._acreate(prompt, timeout))))
         except Exception as e:
             print(f"LLM Error: {e}")
             return []
+
+    async def _acreate(self, prompt: Prompt, timeout: float) -> str:
+        with metrics().timer(f"llm.{prompt.kind}"):
+            response = await self._get_async_client().chat.completions.create(
+                model=self.model,
+                messages=prompt.messages,
+                response_format={"type": "json_object"},
+                timeout=timeout
+            )
+        self._record_usage(prompt, response.usage)
+        return response.choices[0].message.content
+
+    async def _astream(self, prompt: Prompt, on_step) -> Tuple[List[Dict[str, str]], bool]:
+        """
+        Returns (steps, whether the stream completed). A broken stream still
+        returns the steps parsed so far.
+        """
+        if not _load_sdk()[1]:
+            return self._replay(await asyncio.to_thread(self._complete, prompt), on_step), True
+        # Steps reach the user as they arrive, so a stream is bounded by the
+        # deadline and the breaker but never retried or hedged
+        if not self.resilience.allow():
+            return [], False
+        started = time.perf_counter()
+        parser = SubtaskStreamParser()
+        steps: List[Dict[str, str]] = []
+        try:
+            async with asyncio.timeout(self.resilience.deadline):
+                stream = await self._get_async_client().chat.completions.create(
+                    model=self.model,
+                    messages=prompt.messages,
+                    response_format={"type": "json_object"},
+                    stream=True,
+                    # Streams only report usage when asked to, in a last chunk without choices
+                    stream_options={"include_usage": True}
+                )
+                usage = None
+                try:
+                    # Closes the connection even when the deadline cuts the stream short
+                    async with stream:
+                        async for chunk in stream:
+                            if getattr(chunk, "usage", None) is not None:
+                                usage = chunk.usage
+                            if not chunk.choices:
+                                continue
+                            for step in parser.feed(chunk.choices[0].delta.content or ""):
+                                if not steps:
+                                    self.time_to_first_step.append(time.perf_counter() - started)
+                                    metrics().observe("llm.time_to_first_step",
+                                                      (time.perf_counter() - started) * 1000)
+                                steps.append(step)
+                                if on_step:
+                                    on_step(step)
+                finally:
+                    # A stream cut short has no usage chunk; the call still counts, with the estimate
+                    self._record_usage(prompt, usage)
+        except Exception as e:
+            self.resilience.record_failure()
+            print(f"LLM Error: {e}")
+            return steps, False
+        except BaseException:
+            self.resilience.record_cancelled()
+            raise
+        self.resilience.record_success(time.perf_counter() - started)
+        metrics().observe(f"llm.stream.{prompt.kind}", (time.perf_counter() - started) * 1000)
+        if not steps:
+            # No titled steps were found while streaming; the full parse must still yield valid ones
+            try:
+                subtasks = self._checked(self._parse_subtasks(parser.text))
+            except ValueError:
+                return [], False
+            if not subtasks:
+                return [], False
+            return self._replay(subtasks, on_step), True
+        return steps, True
+
+    @staticmethod
+    def _parse_subtasks(content: str) -> List[Dict[str, str]]:
+        result = json.loads(content)
+        # Handle if the LLM returns a wrapper key like "tasks": [...]
+        if isinstance(result, dict):
+            for key in result:
+                if isinstance(result[key], list):
+                    return result[key]
+            return [] # Could not find list
+        return result
+
+    async def aclose(self):
+        self.resilience.shutdown()
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
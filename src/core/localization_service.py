@@ -11,16 +11,31 @@ class LocalizationService:
                 "add_new_task": "Add New Task",
                 "done": "Done",
                 "blocked": "I feel blocked",
+                "break_down": "Break it down",
                 "skip": "Skip",
                 "what_blocking": "What is blocking you?",
                 "thinking": "Thinking... Please wait.",
                 "error_resolve": "Could not resolve block.",
+                "store_locked": "The tasks are already open in another window or in the state daemon.",
+                "daemon_gone": "The state daemon stopped, so changes can no longer be saved. "
+                               "Restart it (python main.py --serve) and reopen this window.",
                 "great_job": "Great Job! 💪",
                 "reward_desc": "Do whatever you want for a while.",
                 "earned_it": "You earned it! 🎉",
                 "ready_again": "I am ready again!",
                 "new_task_prompt": "What do you need to do?",
-                "new_task_title": "New Task"
+                "new_task_title": "New Task",
+                "all_tasks": "All tasks",
+                "back": "Back",
+                "task": "Task",
+                "status": "Status",
+                "show_more": "Show {count} more...",
+                "pending": "Pending",
+                "active": "Active",
+                "completed": "Done",
+                "skipped": "Skipped",
+                "open_only": "Open tasks only",
+                "indexing": "Preparing search..."
             },
             "sv": {
                 "no_tasks": "Inga uppgifter! Du är fri.",
@@ -28,16 +43,31 @@ class LocalizationService:
                 "add_new_task": "Lägg till ny uppgift",
                 "done": "Klar",
                 "blocked": "Jag känner mig blockerad",
+                "break_down": "Dela upp",
                 "skip": "Hoppa över",
                 "what_blocking": "Vad blockerar dig?",
                 "thinking": "Tänker... Vänta.",
                 "error_resolve": "Kunde inte lösa blockeringen.",
+                "store_locked": "Uppgifterna är redan öppna i ett annat fönster eller i tillståndsdaemonen.",
+                "daemon_gone": "Tillståndsdaemonen har stoppats, så ändringar kan inte längre sparas. "
+                               "Starta om den (python main.py --serve) och öppna fönstret igen.",
                 "great_job": "Bra jobbat! 💪",
                 "reward_desc": "Gör vad du vill en stund.",
                 "earned_it": "Du förtjänar det! 🎉",
                 "ready_again": "Jag är redo igen!",
                 "new_task_prompt": "Vad behöver du göra?",
-                "new_task_title": "Ny uppgift"
+                "new_task_title": "Ny uppgift",
+                "all_tasks": "Alla uppgifter",
+                "back": "Tillbaka",
+                "task": "Uppgift",
+                "status": "Status",
+                "show_more": "Visa {count} till...",
+                "pending": "Väntar",
+                "active": "Pågår",
+                "completed": "Klar",
+                "skipped": "Överhoppad",
+                "open_only": "Bara öppna uppgifter",
+                "indexing": "Förbereder sökningen..."
             }
         }
 
@@ -0,0 +1,287 @@
+import atexit
+import cProfile
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+METRICS_ENV = "FLP_METRICS"    # "summary", or a path to write JSON lines to
+PROFILE_ENV = "FLP_PROFILE"    # path for a cProfile dump of the session
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class NullMetrics:
+    """
+    The default: every call does nothing. Hot paths check `enabled` (or
+    use @timed) so that disabled metrics cost one attribute lookup.
+    """
+    enabled = False
+
+    def timer(self, name: str):
+        return _NULL_TIMER
+
+    def observe(self, name: str, value: float):
+        pass
+
+    def incr(self, name: str, amount: int = 1):
+        pass
+
+    def register_gauge(self, name: str, read: Callable[[], float]):
+        pass
+
+    def snapshot(self) -> List[dict]:
+        return []
+
+
+class Histogram:
+    """
+    Count, sum, min and max of everything observed, plus the most recent
+    `window` values for percentiles.
+    """
+    __slots__ = ("count", "total", "min", "max", "recent")
+
+    def __init__(self, window: int = 1024):
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = float("-inf")
+        self.recent = deque(maxlen=window)
+
+    def add(self, value: float):
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self.recent.append(value)
+
+    def percentile(self, fraction: float) -> float:
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "min": self.min if self.count else 0.0,
+            "max": self.max if self.count else 0.0,
+            "p50": self.percentile(0.50),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+        }
+
+
+class _Timer:
+    __slots__ = ("_metrics", "_name", "_start")
+
+    def __init__(self, metrics: "Metrics", name: str):
+        self._metrics = metrics
+        self._name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._metrics.record_span(self._name, self._start, time.perf_counter())
+        return False
+
+
+class Metrics(NullMetrics):
+    """
+    In-process metrics: histograms (timers are histograms of milliseconds),
+    counters, and gauges read on demand. With `trace=True` every timed span
+    is also kept (up to `max_spans`) so the exporter can write a timeline.
+    """
+    enabled = True
+
+    def __init__(self, trace: bool = False, max_spans: int = 100_000):
+        self.histograms: Dict[str, Histogram] = {}
+        self.counters: Dict[str, int] = {}
+        self.gauges: Dict[str, Callable[[], float]] = {}
+        self.spans = deque(maxlen=max_spans) if trace else None
+        self.started = time.time()
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def timer(self, name: str):
+        return _Timer(self, name)
+
+    def record_span(self, name: str, start: float, end: float):
+        self.observe(name, (end - start) * 1000)
+        if self.spans is not None:
+            self.spans.append((name, start - self._origin, end - start))
+
+    def observe(self, name: str, value: float):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.add(value)
+
+    def incr(self, name: str, amount: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def register_gauge(self, name: str, read: Callable[[], float]):
+        self.gauges[name] = read
+
+    def snapshot(self) -> List[dict]:
+        """
+        One record per metric, the shape written to the JSON-lines export.
+        """
+        with self._lock:
+            records = [dict(type="histogram", name=name, **histogram.summary())
+                       for name, histogram in sorted(self.histograms.items())]
+            records += [{"type": "counter", "name": name, "value": value}
+                        for name, value in sorted(self.counters.items())]
+        for name, read in sorted(self.gauges.items()):
+            try:
+                value = read()
+            except Exception as e:
+                value = None
+                print(f"Metrics gauge error ({name}): {e}")
+            records.append({"type": "gauge", "name": name, "value": value})
+        return records
+
+    def export_jsonl(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "a") as f:
+            header = {"type": "session", "started": self.started, "duration_s": time.time() - self.started}
+            f.write(json.dumps(header) + "\n")
+            for record in self.snapshot():
+                f.write(json.dumps(record) + "\n")
+            for name, start, duration in self.spans or ():
+                f.write(json.dumps({"type": "span", "name": name, "start_s": round(start, 6),
+                                    "ms": round(duration * 1000, 3)}) + "\n")
+
+    def format_summary(self) -> str:
+        lines = []
+        for record in self.snapshot():
+            if record["type"] == "histogram":
+                lines.append(f"{record['name']:<36} n={record['count']:<6} mean={record['mean']:9.2f} "
+                             f"p50={record['p50']:9.2f} p95={record['p95']:9.2f} max={record['max']:9.2f}")
+            else:
+                value = record["value"]
+                shown = f"{value:.3f}" if isinstance(value, float) else value
+                lines.append(f"{record['name']:<36} {shown}")
+        return "\n".join(lines)
+
+
+_active: NullMetrics = NullMetrics()
+
+
+def metrics() -> NullMetrics:
+    return _active
+
+
+def enable_metrics(trace: bool = False) -> Metrics:
+    global _active
+    if not isinstance(_active, Metrics):
+        _active = Metrics(trace=trace)
+    return _active
+
+
+def disable_metrics():
+    global _active
+    _active = NullMetrics()
+
+
+def timed(name: str):
+    """
+    Records the wrapped function's duration in milliseconds under `name`
+    while metrics are enabled. Works on plain and async functions.
+    """
+    def decorate(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                active = _active
+                if not active.enabled:
+                    return await fn(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    active.record_span(name, start, time.perf_counter())
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            active = _active
+            if not active.enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                active.record_span(name, start, time.perf_counter())
+        return wrapper
+    return decorate
+
+
+class Session:
+    """
+    Metrics and profiling for one run of the app, configured from the
+    environment:
+
+        FLP_METRICS=summary          print a summary on exit
+        FLP_METRICS=data/metrics.jsonl   append JSON lines (with spans) on exit
+        FLP_PROFILE=data/session.prof    cProfile the whole session
+
+    finish() runs at most once, on explicit call or at interpreter exit.
+    """
+
+    def __init__(self, metrics_target: Optional[str] = None, profile_path: Optional[str] = None):
+        self.metrics_target = metrics_target
+        self.profile_path = profile_path
+        self._profiler: Optional[cProfile.Profile] = None
+        self._finished = False
+        if metrics_target:
+            enable_metrics(trace=metrics_target != "summary")
+        if profile_path:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        if metrics_target or profile_path:
+            atexit.register(self.finish)
+
+    @classmethod
+    def from_env(cls) -> "Session":
+        return cls(os.environ.get(METRICS_ENV) or None, os.environ.get(PROFILE_ENV) or None)
+
+    def finish(self):
+        if self._finished:
+            return
+        self._finished = True
+        if self._profiler is not None:
+            self._profiler.disable()
+            os.makedirs(os.path.dirname(self.profile_path) or ".", exist_ok=True)
+            self._profiler.dump_stats(self.profile_path)
+            print(f"Profile written to {self.profile_path}")
+        active = _active
+        if not isinstance(active, Metrics):
+            return
+        if self.metrics_target == "summary":
+            print(active.format_summary())
+        else:
+            try:
+                active.export_jsonl(self.metrics_target)
+            except OSError as e:
+                print(f"Error writing metrics: {e}")
@@ -0,0 +1,100 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from .prompt_builder import TaskContext
+from .task_model import Task
+
+
+def _fingerprint(task: Task) -> Tuple[str, str]:
+    # A breakdown is only valid for the title/description it was made for
+    return task.title, task.description
+
+
+class BreakdownPrefetcher:
+    """
+    Precomputes LLM breakdowns for the tasks the user is about to see.
+
+    schedule() looks at the next `lookahead` actionable tasks and queues a
+    break_down_task call for each one that has no fresh result yet. The
+    pool is small (one worker by default) and jobs that went stale while
+    queued are dropped, so prefetching stays in the background.
+    Results are keyed by task id and invalidated when the task's title or
+    description changes.
+    """
+
+    def __init__(self, state_manager, llm_service, lookahead: int = 3, workers: int = 1):
+        self.state_manager = state_manager
+        self.llm_service = llm_service
+        self.lookahead = lookahead
+        self.hits = 0
+        self.misses = 0
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="breakdown-prefetch")
+        self._results: Dict[str, Tuple[Tuple[str, str], List[Dict[str, str]]]] = {}
+        self._queued: Dict[str, Tuple[str, str]] = {}
+        self._wanted: Dict[str, Tuple[str, str]] = {}
+        self._lock = threading.Lock()
+
+    def schedule(self):
+        """
+        Queues breakdowns for the upcoming tasks. Cheap; call whenever the
+        current task changes.
+        """
+        upcoming = self.state_manager.get_upcoming_tasks(self.lookahead)
+        with self._lock:
+            self._wanted = {task.id: _fingerprint(task) for task in upcoming}
+            # Drop results for tasks that are no longer coming up
+            for task_id in list(self._results):
+                if task_id not in self._wanted:
+                    del self._results[task_id]
+            for task in upcoming:
+                fingerprint = self._wanted[task.id]
+                cached = self._results.get(task.id)
+                if (cached and cached[0] == fingerprint) or self._queued.get(task.id) == fingerprint:
+                    continue
+                self._queued[task.id] = fingerprint
+                context = TaskContext.for_task(self.state_manager, task)
+                self._pool.submit(self._prefetch, task.id, task.title, task.description, fingerprint, context)
+
+    def _prefetch(self, task_id: str, title: str, description: str, fingerprint: Tuple[str, str],
+                  context: TaskContext):
+        with self._lock:
+            if self._wanted.get(task_id) != fingerprint:
+                # Went stale while queued
+                self._queued.pop(task_id, None)
+                return
+        try:
+            subtasks = self.llm_service.break_down_task(title, description, context=context)
+        except Exception as e:
+            print(f"Prefetch error: {e}")
+            subtasks = []
+        if not self.llm_service.resilience.healthy:
+            # Canned fallback steps, not the model's; ask again when the user opens the task
+            subtasks = []
+        with self._lock:
+            self._queued.pop(task_id, None)
+            if subtasks and self._wanted.get(task_id) == fingerprint:
+                self._results[task_id] = (fingerprint, subtasks)
+
+    def get(self, task: Task) -> Optional[List[Dict[str, str]]]:
+        """
+        The prefetched breakdown for this task, or None (counted as a miss).
+        """
+        with self._lock:
+            cached = self._results.get(task.id)
+            if cached and cached[0] == _fingerprint(task):
+                self.hits += 1
+                return [dict(item) for item in cached[1]]
+            self.misses += 1
+            return None
+
+    def invalidate(self, task_id: str):
+        with self._lock:
+            self._results.pop(task_id, None)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
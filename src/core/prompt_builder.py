@@ -0,0 +1,148 @@
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+from .task_model import Task, TaskStatus
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Local approximation of a BPE tokenizer: every punctuation mark is a
+    token and words cost one token per ~4 characters. Good to within
+    10-20% for English and Swedish, which is enough for budgeting.
+    """
+    return sum((len(piece) + 3) // 4 if piece[0].isalnum() or piece[0] == "_" else 1
+               for piece in _TOKEN_PATTERN.findall(text))
+
+
+def collapse(text: str) -> str:
+    return " ".join(str(text).split())
+
+
+# The system messages never change, so the provider can cache them as a
+# prompt prefix. Keep anything that varies per call out of them.
+BREAK_DOWN_SYSTEM = collapse("""
+    You are an executive function assistant. The user is overwhelmed by a task.
+    Break it down into 3-5 smaller, manageable steps.
+    Return ONLY a JSON object of the form {"steps": [{"title": "...", "description": "..."}]}.
+    Example: {"steps": [{"title": "Get the vacuum", "description": "Bring it to the room"},
+    {"title": "Clear the floor", "description": "Pick up large items"}]}
+    Use the context, if given, to keep the steps specific to what the task is part of.
+""")
+
+BATCH_BREAK_DOWN_SYSTEM = collapse("""
+    You are an executive function assistant. Break each of the user's tasks down into
+    3-5 smaller, manageable steps.
+    Return ONLY a JSON object mapping each task's "n" to an array of objects with
+    "title" and "description" keys, e.g. {"1": [{"title": "...", "description": "..."}]}.
+""")
+
+RESOLVE_BLOCK_SYSTEM = collapse("""
+    You are an executive function assistant. The user is blocked on a task.
+    Provide 2-4 concrete, small steps to resolve this specific blocker and get back on track.
+    Return ONLY a JSON object of the form {"steps": [{"title": "...", "description": "..."}]}.
+    Write the steps in the language named in the user message.
+""")
+
+_STATUS_NOTES = {TaskStatus.COMPLETED: " (done)", TaskStatus.SKIPPED: " (skipped)"}
+
+
+@dataclass
+class TaskContext:
+    """
+    Where a task sits in the tree: ancestor titles nearest first, and the
+    titles of its siblings with a short status note.
+    """
+    ancestors: List[str] = field(default_factory=list)
+    siblings: List[str] = field(default_factory=list)
+
+    @classmethod
+    def for_task(cls, state_manager, task: Task, max_siblings: int = 20) -> "TaskContext":
+        return cls(
+            ancestors=[collapse(a.title) for a in state_manager.get_ancestors(task.id)],
+            siblings=[collapse(s.title) + _STATUS_NOTES.get(s.status, "")
+                      for s in state_manager.get_siblings(task.id)[:max_siblings]],
+        )
+
+
+@dataclass(frozen=True)
+class Prompt:
+    kind: str
+    system: str
+    user: str
+    context: str
+    tokens: int
+
+    @property
+    def messages(self) -> List[Dict[str, str]]:
+        return [{"role": "system", "content": self.system}, {"role": "user", "content": self.user}]
+
+
+class PromptBuilder:
+    """
+    Builds the chat messages for every LLM call.
+
+    The system message is a constant per kind of call; the user message
+    holds the variable part with all whitespace collapsed. Ancestor and
+    sibling context is added nearest-first until `context_token_budget`
+    (estimated with estimate_tokens) would be exceeded.
+    """
+
+    def __init__(self, context_token_budget: int = 300):
+        self.context_token_budget = context_token_budget
+
+    def break_down(self, title: str, description: str = "", context: Optional[TaskContext] = None) -> Prompt:
+        fields = [("Task", title), ("Description", description)]
+        return self._build("break_down", BREAK_DOWN_SYSTEM, fields, context)
+
+    def resolve_block(self, title: str, block_reason: str, language: str,
+                      context: Optional[TaskContext] = None) -> Prompt:
+        fields = [("Task", title), ("Blocker", block_reason), ("Language", language)]
+        return self._build("resolve_block", RESOLVE_BLOCK_SYSTEM, fields, context)
+
+    def break_down_batch(self, tasks: Sequence[Tuple[str, str]]) -> Prompt:
+        # Tasks are numbered 1..n; numbers are cheaper than uuids
+        items = [{"n": str(number), "title": collapse(title), "description": collapse(description)}
+                 for number, (title, description) in enumerate(tasks, 1)]
+        user = "Tasks: " + json.dumps(items, ensure_ascii=False, separators=(",", ":"))
+        return Prompt("break_down_batch", BATCH_BREAK_DOWN_SYSTEM, user, "",
+                      estimate_tokens(BATCH_BREAK_DOWN_SYSTEM) + estimate_tokens(user))
+
+    def _build(self, kind: str, system: str, fields: List[Tuple[str, str]],
+               context: Optional[TaskContext]) -> Prompt:
+        lines = [f"{name}: {json.dumps(collapse(value), ensure_ascii=False)}"
+                 for name, value in fields if value]
+        context_text = self.render_context(context)
+        if context_text:
+            lines.insert(0, context_text)
+        user = "\n".join(lines)
+        return Prompt(kind, system, user, context_text, estimate_tokens(system) + estimate_tokens(user))
+
+    def render_context(self, context: Optional[TaskContext]) -> str:
+        if context is None:
+            return ""
+        budget = self.context_token_budget
+        ancestors: List[str] = []
+        for title in context.ancestors:
+            cost = estimate_tokens(title) + 2
+            if cost > budget:
+                break
+            ancestors.append(title)
+            budget -= cost
+        siblings: List[str] = []
+        for title in context.siblings:
+            cost = estimate_tokens(title) + 2
+            if cost > budget:
+                break
+            siblings.append(title)
+            budget -= cost
+
+        parts = []
+        if ancestors:
+            # Outermost first reads naturally: "Move house > Pack > Kitchen"
+            parts.append("Part of: " + " > ".join(reversed(ancestors)))
+        if siblings:
+            parts.append("Other steps at this level: " + "; ".join(siblings))
+        return "\n".join(parts)
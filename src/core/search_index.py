@@ -0,0 +1,484 @@
+import heapq
+import json
+import math
+import os
+import re
+import threading
+from bisect import bisect_left, insort
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from .journal import gc_paused, write_atomic
+
+VERSION = 1
+TITLE_WEIGHT = 3
+DESCRIPTION_WEIGHT = 1
+# Shorter prefixes match too much of the vocabulary to be useful while typing
+MIN_PREFIX = 2
+MAX_EXPANSIONS = 64
+
+WORD = re.compile(r"\w+")
+
+STOPWORDS = {
+    "en": frozenset("a an and are as at be by for from in is it of on or that the to with".split()),
+    "sv": frozenset("att av den det där en ett för har i med och om på som till under vid är".split()),
+}
+
+# Light suffix stripping, longest first; a stem keeps at least MIN_STEM letters
+SUFFIXES = {
+    "en": ("ingly", "edly", "ing", "ies", "ed", "ly", "s"),
+    "sv": ("arnas", "ernas", "ornas", "arna", "erna", "orna", "ande", "ende", "aste", "are",
+           "ast", "het", "en", "ar", "er", "or", "et", "na", "a", "e"),
+}
+MIN_STEM = 3
+
+
+class Analyzer:
+    """
+    Splits text into index terms for one of the app's languages (en, sv):
+    case-folded words without stopwords, each as its stem and, when that
+    differs, as written (so typeahead prefixes match the full word).
+    """
+
+    def __init__(self, language: str = "en"):
+        self.language = language if language in SUFFIXES else "en"
+        self._stopwords = STOPWORDS[self.language]
+        self._suffixes = SUFFIXES[self.language]
+
+    def words(self, text: str) -> List[str]:
+        return WORD.findall(text.casefold())
+
+    def stem(self, word: str) -> str:
+        for suffix in self._suffixes:
+            if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM:
+                if suffix == "ies" and self.language == "en":
+                    return word[:-3] + "y"
+                if suffix == "s" and word.endswith("ss"):
+                    continue
+                return word[:-len(suffix)]
+        return word
+
+    def terms(self, text: str) -> List[str]:
+        terms = []
+        for word in self.words(text):
+            if word in self._stopwords:
+                continue
+            stem = self.stem(word)
+            terms.append(stem)
+            if stem != word:
+                terms.append(word)
+        return terms
+
+    def weighted_terms(self, title: str, description: str) -> Dict[str, int]:
+        weights: Dict[str, int] = {}
+        for term in self.terms(title):
+            weights[term] = weights.get(term, 0) + TITLE_WEIGHT
+        for term in self.terms(description or ""):
+            weights[term] = weights.get(term, 0) + DESCRIPTION_WEIGHT
+        return weights
+
+
+class SearchIndex:
+    """
+    Inverted index over task titles and descriptions.
+
+    Each term maps to its postings grouped by weight ({weight: {task id: None}}),
+    so the best matches for a word can be read off the top groups without
+    scoring every task that contains it. A sorted vocabulary serves prefix
+    lookups, and every task's status is kept alongside, so results can be
+    filtered without touching the store.
+
+    It is persisted like the task store itself: a snapshot at `path` plus an
+    append-only log of changed rows, fed from StateManager.flush(). Nothing
+    is read until the first search, which starts loading the snapshot on a
+    background thread (or rebuilding it from `source` when it is missing,
+    outdated or for another language) and finds nothing until that is done;
+    see ready and load(). Changes that arrive meanwhile are logged and
+    applied once it is loaded. A log that grows past `compact_every`
+    records also starts a load, so it can be folded into the snapshot.
+    """
+
+    def __init__(self, path: str, source: Callable[[], Iterable[Tuple[str, str, str, str]]],
+                 language: str = "en", compact_every: int = 10000):
+        self.path = path
+        self.log_file = path + ".log"
+        self.analyzer = Analyzer(language)
+        self.compact_every = compact_every
+        # source() yields (id, status value, title, description) for every
+        # task in the store, for rebuilds; it is called on the loader thread
+        self._source = source
+        self._lock = threading.RLock()
+        # One snapshot write at a time
+        self._save_lock = threading.Lock()
+        self._loaded = False
+        self._loader: Optional[threading.Thread] = None
+        # Changes written while the loader runs; None when no load is running
+        self._pending: Optional[List[Dict[str, Optional[Sequence]]]] = None
+        self._reset()
+        # Records in the log file; counted from the file when first needed
+        self._log_records: Optional[int] = None
+
+    def _reset(self):
+        # term -> weight -> task ids (a dict used as an ordered set)
+        self._postings: Dict[str, Dict[int, Dict[str, None]]] = {}
+        # term -> number of tasks containing it
+        self._df: Dict[str, int] = {}
+        self._vocabulary: List[str] = []
+        # task id -> (status value, its terms, their weights)
+        self._docs: Dict[str, Tuple[str, Tuple[str, ...], Tuple[int, ...]]] = {}
+
+    # Maintenance
+
+    def _post(self, term: str, weight: int, task_id: str, keep_sorted: bool = True):
+        buckets = self._postings.get(term)
+        if buckets is None:
+            buckets = self._postings[term] = {}
+            self._df[term] = 0
+            if keep_sorted:
+                insort(self._vocabulary, term)
+        ids = buckets.get(weight)
+        if ids is None:
+            ids = buckets[weight] = {}
+        ids[task_id] = None
+        self._df[term] += 1
+
+    def _add(self, task_id: str, status: str, title: str, description: str):
+        weights = self.analyzer.weighted_terms(title, description)
+        terms, term_weights = tuple(weights), tuple(weights.values())
+        old = self._docs.get(task_id)
+        if old is not None:
+            if old[1] == terms and old[2] == term_weights:
+                # Usually only the status changed
+                self._docs[task_id] = (status, terms, term_weights)
+                return
+            self._remove(task_id)
+        for term, weight in weights.items():
+            self._post(term, weight, task_id)
+        self._docs[task_id] = (status, terms, term_weights)
+
+    def _remove(self, task_id: str):
+        doc = self._docs.pop(task_id, None)
+        if doc is None:
+            return
+        for term, weight in zip(doc[1], doc[2]):
+            buckets = self._postings.get(term)
+            ids = buckets.get(weight) if buckets else None
+            if ids is None or task_id not in ids:
+                continue
+            del ids[task_id]
+            if not ids:
+                del buckets[weight]
+            self._df[term] -= 1
+            if not self._df[term]:
+                del self._postings[term]
+                del self._df[term]
+                i = bisect_left(self._vocabulary, term)
+                if i < len(self._vocabulary) and self._vocabulary[i] == term:
+                    del self._vocabulary[i]
+
+    def _apply(self, changes: Dict[str, Optional[Sequence]]):
+        for task_id, row in changes.items():
+            if row is None:
+                self._remove(task_id)
+            else:
+                # Task.to_row(): id, title, description, status, ...
+                self._add(task_id, row[3], row[1], row[2])
+
+    def write_changes(self, changes: Dict[str, Optional[Sequence]]):
+        """
+        Records changed task rows (id -> Task.to_row(), or None when deleted),
+        as passed to StorageBackend.write_changes().
+        """
+        if not changes:
+            return
+        with self._lock:
+            loading = self._pending is not None
+            if self._loaded or loading or os.path.exists(self.path):
+                records = [[task_id, [row[1], row[2], row[3]] if row is not None else None]
+                           for task_id, row in changes.items()]
+                logged = self._logged()
+                os.makedirs(os.path.dirname(self.log_file) or ".", exist_ok=True)
+                with open(self.log_file, 'a') as f:
+                    f.write("".join(json.dumps(r, separators=(",", ":")) + "\n" for r in records))
+                self._log_records = logged + len(records)
+            if self._loaded:
+                self._apply(changes)
+            elif loading:
+                self._pending.append(changes)
+            elif self._log_records is not None and self._log_records >= self.compact_every:
+                # Load it (in the background) so the log can be compacted
+                self._start_loading()
+
+    def _logged(self) -> int:
+        if self._log_records is None:
+            self._log_records = 0
+            if os.path.exists(self.log_file):
+                with open(self.log_file, 'rb') as f:
+                    self._log_records = sum(chunk.count(b"\n") for chunk in iter(lambda: f.read(1 << 20), b""))
+        return self._log_records
+
+    # Loading
+
+    @property
+    def ready(self) -> bool:
+        return self._loaded
+
+    def load(self, block: bool = False) -> bool:
+        """
+        Starts loading the index in the background unless it is loaded or
+        loading already; with block=True also waits for it. Returns whether
+        it is ready.
+        """
+        with self._lock:
+            self._start_loading()
+            loader = self._loader
+        if block and loader is not None:
+            loader.join()
+        return self._loaded
+
+    def _start_loading(self):
+        # Call with _lock held
+        if self._loaded or self._pending is not None:
+            return
+        self._pending = []
+        self._loader = threading.Thread(target=self._load, name="search-index-load", daemon=True)
+        self._loader.start()
+
+    def _load(self):
+        # Built in a separate instance, so searches and writes are not held
+        # up; only the final swap takes the lock.
+        fresh = SearchIndex(self.path, self._source, self.analyzer.language)
+        try:
+            with gc_paused():
+                if not fresh._load_snapshot():
+                    with self._lock:
+                        # The rebuild reads the tasks as they are from here
+                        # on; the log only needs what changes after that.
+                        self._discard_log()
+                        self._pending = []
+                    fresh._rebuild()
+        except Exception as e:
+            print(f"Search index Error: {e}")
+            with self._lock:
+                self._pending = None
+                self._loader = None
+            return
+        with self._lock:
+            self._postings, self._df = fresh._postings, fresh._df
+            self._vocabulary, self._docs = fresh._vocabulary, fresh._docs
+            for changes in self._pending:
+                self._apply(changes)
+            self._pending = None
+            self._loaded = True
+            self._loader = None
+        self.compact()
+
+    def _load_snapshot(self) -> bool:
+        if not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (IOError, ValueError) as e:
+            print(f"Search index Error: {e}")
+            return False
+        if data.get("version") != VERSION or data.get("language") != self.analyzer.language:
+            return False
+        self._reset()
+        terms = data["terms"]
+        post = self._post
+        for task_id, status, entries in data["docs"]:
+            doc_terms = tuple(terms[term_index] for term_index, _ in entries)
+            for term, (_, weight) in zip(doc_terms, entries):
+                post(term, weight, task_id, keep_sorted=False)
+            self._docs[task_id] = (status, doc_terms, tuple(weight for _, weight in entries))
+        self._vocabulary = sorted(self._postings)
+        self._replay_log()
+        return True
+
+    def _replay_log(self):
+        if not os.path.exists(self.log_file):
+            return
+        with open(self.log_file, 'rb') as f:
+            for raw_line in f:
+                if not raw_line.endswith(b"\n"):
+                    break
+                try:
+                    task_id, fields = json.loads(raw_line)
+                except ValueError:
+                    break
+                if fields is None:
+                    self._remove(task_id)
+                else:
+                    title, description, status = fields
+                    self._add(task_id, status, title, description)
+
+    def _rebuild(self):
+        """
+        Indexes every task from source() and writes the snapshot, leaving
+        the log alone (it holds the changes made since the rebuild began).
+        """
+        self._reset()
+        weighted_terms, post = self.analyzer.weighted_terms, self._post
+        for task_id, status, title, description in self._source():
+            weights = weighted_terms(title, description)
+            for term, weight in weights.items():
+                post(term, weight, task_id, keep_sorted=False)
+            self._docs[task_id] = (status, tuple(weights), tuple(weights.values()))
+        self._vocabulary = sorted(self._postings)
+        write_atomic(self.path, lambda f: f.write(self._snapshot_payload()))
+
+    # Persistence
+
+    def _snapshot_payload(self) -> str:
+        term_ids = {term: i for i, term in enumerate(self._vocabulary)}
+        docs = [[task_id, status, [[term_ids[term], weight] for term, weight in zip(terms, weights)]]
+                for task_id, (status, terms, weights) in self._docs.items()]
+        return json.dumps({"version": VERSION, "language": self.analyzer.language,
+                           "terms": self._vocabulary, "docs": docs}, separators=(",", ":"))
+
+    def save(self):
+        """
+        Writes a snapshot of the loaded index and drops the log records it
+        covers. The index is only locked while it is serialized, not while
+        the file is written.
+        """
+        with self._save_lock:
+            with self._lock:
+                if not self._loaded or (not self._docs and not os.path.exists(self.path)):
+                    return
+                covered = os.path.getsize(self.log_file) if os.path.exists(self.log_file) else 0
+                payload = self._snapshot_payload()
+            write_atomic(self.path, lambda f: f.write(payload))
+            with self._lock:
+                self._trim_log(covered)
+
+    def _trim_log(self, covered: int):
+        # Keeps the records appended after the first `covered` bytes
+        if not os.path.exists(self.log_file):
+            self._log_records = 0
+            return
+        with open(self.log_file, 'rb') as f:
+            f.seek(covered)
+            tail = f.read()
+        if tail:
+            write_atomic(self.log_file, lambda f: f.write(tail), mode='wb')
+        else:
+            os.remove(self.log_file)
+        self._log_records = tail.count(b"\n")
+
+    def _discard_log(self):
+        if os.path.exists(self.log_file):
+            os.remove(self.log_file)
+        self._log_records = 0
+
+    def compact(self):
+        """
+        Folds a long log into the snapshot; a no-op while the index is not loaded.
+        """
+        with self._lock:
+            compact = self._loaded and self._logged() >= self.compact_every
+        if compact:
+            self.save()
+
+    # Queries
+
+    def _word_tiers(self, word: str, prefix: bool) -> List[Tuple[float, Dict[str, None]]]:
+        """
+        (score, task ids) groups for one query word, best first, over the
+        terms it matches: its stem and, for the word being typed, the terms
+        it is a prefix of. Score is weight times the term's idf.
+        """
+        terms = {self.analyzer.stem(word), word}
+        if prefix and len(word) >= MIN_PREFIX:
+            start = bisect_left(self._vocabulary, word)
+            expansions = []
+            for term in self._vocabulary[start:]:
+                if not term.startswith(word):
+                    break
+                expansions.append(term)
+            if len(expansions) > MAX_EXPANSIONS:
+                expansions = heapq.nlargest(MAX_EXPANSIONS, expansions, key=self._df.__getitem__)
+            terms.update(expansions)
+
+        total = len(self._docs) or 1
+        tiers = []
+        for term in terms:
+            buckets = self._postings.get(term)
+            if not buckets:
+                continue
+            # Rare terms say more about a task than common ones
+            idf = math.log(1 + total / self._df[term])
+            tiers += [(weight * idf, ids) for weight, ids in buckets.items()]
+        tiers.sort(key=lambda tier: tier[0], reverse=True)
+        return tiers
+
+    def search(self, query: str, statuses: Optional[Iterable[str]] = None, limit: int = 20) -> List[Tuple[str, float]]:
+        """
+        Returns up to `limit` (task id, score) pairs, best first, for tasks
+        matching every word of the query. The last word also matches as a
+        prefix unless the query ends with a space. `statuses` limits results
+        to those TaskStatus values.
+        """
+        words = self.analyzer.words(query)
+        if not words:
+            return []
+        typing = not query[-1:].isspace()
+        stopwords = self.analyzer._stopwords
+        # Stopwords are never indexed, but the word being typed may only look like one
+        words = [w for i, w in enumerate(words) if w not in stopwords or (typing and i == len(words) - 1)]
+        if not words:
+            return []
+        wanted = set(statuses) if statuses is not None else None
+
+        with self._lock:
+            if not self.load():
+                return []
+            docs = self._docs
+            groups = [self._word_tiers(w, typing and i == len(words) - 1) for i, w in enumerate(words)]
+            if not all(groups):
+                return []
+            if len(groups) > 1:
+                return self._search_all(groups, wanted, limit)
+            top: List[Tuple[float, str]] = []
+            seen = set()
+            for score, ids in groups[0]:
+                if len(top) >= limit:
+                    # Tiers are best first: nothing from here on can make the top
+                    break
+                for task_id in ids:
+                    # ...so the first sighting of a task has its top score
+                    if task_id in seen:
+                        continue
+                    seen.add(task_id)
+                    if wanted is None or docs[task_id][0] in wanted:
+                        top.append((score, task_id))
+                        if len(top) >= limit:
+                            break
+        return [(task_id, score) for score, task_id in top]
+
+    def _search_all(self, groups: List[List[Tuple[float, Dict[str, None]]]], wanted: Optional[set],
+                    limit: int) -> List[Tuple[str, float]]:
+        """
+        Several words: intersect their tasks with set operations first (which
+        run in C and iterate the smaller side), then score only the tasks
+        that match all of them.
+        """
+        groups.sort(key=lambda tiers: sum(len(ids) for _, ids in tiers))
+        matched = set().union(*(ids.keys() for _, ids in groups[0]))
+        for tiers in groups[1:]:
+            if not matched:
+                return []
+            matched = set().union(*(ids.keys() & matched for _, ids in tiers))
+        docs = self._docs
+        results = []
+        for task_id in matched:
+            if wanted is not None and docs[task_id][0] not in wanted:
+                continue
+            # Each word counts with the best of its tiers the task is in
+            total = sum(next(score for score, ids in tiers if task_id in ids) for tiers in groups)
+            results.append((task_id, total))
+        return heapq.nlargest(limit, results, key=lambda r: r[1])
+
+    def __len__(self) -> int:
+        self.load(block=True)
+        with self._lock:
+            return len(self._docs)
@@ -0,0 +1,167 @@
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, MutableMapping, Optional, Tuple
+from .journal import TaskJournal
+from .storage import Edge, LazyTaskMap, StorageBackend
+from .task_model import IdList, Task, TaskStatus
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    parent_id TEXT,
+    position INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    description TEXT NOT NULL DEFAULT '',
+    status TEXT NOT NULL,
+    is_reward INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_children ON tasks (parent_id, position);
+CREATE INDEX IF NOT EXISTS idx_tasks_open ON tasks (parent_id, status, position);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status);
+"""
+
+OPEN_STATUS_VALUES = (TaskStatus.PENDING.value, TaskStatus.ACTIVE.value)
+
+
+class SqliteStore(StorageBackend):
+    """
+    Tasks as rows in a SQLite database (WAL mode).
+
+    Nothing but the root ids is read at startup; tasks are fetched by id when
+    StateManager first touches them, and writes are row-level upserts and
+    deletes. Child order is the `position` column, so children_ids is rebuilt
+    from the (parent_id, position) index instead of being stored.
+    """
+    incremental = True
+
+    def __init__(self, db_file: str):
+        self.db_file = db_file
+        os.makedirs(os.path.dirname(db_file) or ".", exist_ok=True)
+        # The write-behind flusher writes from its own thread
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+
+    def load(self) -> Tuple[MutableMapping[str, Task], List[str]]:
+        return LazyTaskMap(self._fetch, self._stored_ids), self._child_ids(None)
+
+    def _fetch(self, task_id: str) -> Optional[Task]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, title, description, status, parent_id, is_reward FROM tasks WHERE id = ?",
+                (task_id,)).fetchone()
+        if row is None:
+            return None
+        return Task(id=row[0], title=row[1], description=row[2], status=TaskStatus(row[3]),
+                    parent_id=row[4], is_reward=bool(row[5]), children_ids=IdList(self._child_ids(task_id)))
+
+    def _child_ids(self, parent_id: Optional[str]) -> List[str]:
+        with self._lock:
+            if parent_id is None:
+                rows = self._conn.execute(
+                    "SELECT id FROM tasks WHERE parent_id IS NULL ORDER BY position").fetchall()
+            else:
+                rows = self._conn.execute(
+                    "SELECT id FROM tasks WHERE parent_id = ? ORDER BY position", (parent_id,)).fetchall()
+        return [row[0] for row in rows]
+
+    def _stored_ids(self) -> Iterable[str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT id FROM tasks").fetchall()
+        return [row[0] for row in rows]
+
+    def open_children(self, parent_id: Optional[str]) -> Optional[List[str]]:
+        parent_clause = "parent_id IS NULL" if parent_id is None else "parent_id = ?"
+        params = () if parent_id is None else (parent_id,)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id FROM tasks WHERE {parent_clause} AND status IN (?, ?) ORDER BY position",
+                params + OPEN_STATUS_VALUES).fetchall()
+        return [row[0] for row in rows]
+
+    def write_changes(self, changes: Dict[str, Optional[tuple]], edges: List[Edge]) -> bool:
+        # Sibling order lives in the position column: new rows are inserted
+        # after their last sibling and deleted rows simply go, so only placed
+        # children update their own row.
+        with self._lock, self._conn:
+            for task_id, row in changes.items():
+                if row is None:
+                    self._conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+                else:
+                    self._upsert(row)
+            for _, task_id, where in edges:
+                if where is None:
+                    continue
+                edge = "MIN(position) - 1" if where == "front" else "MAX(position) + 1"
+                self._conn.execute(
+                    f"""
+                    UPDATE tasks SET position = (
+                        SELECT {edge} FROM tasks AS sibling WHERE sibling.parent_id IS tasks.parent_id
+                    ) WHERE id = ?
+                    """, (task_id,))
+        return False
+
+    def _upsert(self, row: tuple, position: Optional[int] = None):
+        # New rows go after their last sibling; existing rows keep their position
+        task_id, title, description, status, parent_id, is_reward, _ = row
+        self._conn.execute(
+            """
+            INSERT INTO tasks (id, parent_id, position, title, description, status, is_reward)
+            VALUES (?, ?, COALESCE(?, (SELECT MAX(position) + 1 FROM tasks WHERE parent_id IS ?), 0), ?, ?, ?, ?)
+            ON CONFLICT (id) DO UPDATE SET
+                parent_id = excluded.parent_id,
+                title = excluded.title,
+                description = excluded.description,
+                status = excluded.status,
+                is_reward = excluded.is_reward
+            """,
+            (task_id, parent_id, position, parent_id, title, description, status, int(is_reward)))
+
+    def write_snapshot(self, data: dict) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM tasks")
+            self._insert_tree(data)
+
+    def _insert_tree(self, data: dict):
+        # Positions come from the order of root_task_ids and of each children_ids
+        positions: Dict[str, int] = {task_id: i for i, task_id in enumerate(data.get('root_task_ids', []))}
+        for row in data.get('tasks', []):
+            for i, child_id in enumerate(row[-1]):
+                positions[child_id] = i
+        for row in data.get('tasks', []):
+            self._upsert(row, position=positions.get(row[0], 0))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def migrate_json_to_sqlite(json_file: str, db_file: str) -> int:
+    """
+    One-shot import of a tasks.json store (plus any journal log) into a new
+    SQLite database. Does nothing if the database already exists.
+    Returns the number of imported tasks.
+    """
+    if os.path.exists(db_file):
+        return 0
+    tasks, root_ids = TaskJournal(json_file).load()
+    store = SqliteStore(db_file)
+    try:
+        store.write_snapshot({'tasks': [t.to_row() for t in tasks.values()], 'root_task_ids': root_ids})
+    finally:
+        store.close()
+    return len(tasks)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Import a tasks.json store into SQLite.")
+    parser.add_argument("json_file", nargs="?", default="data/tasks.json")
+    parser.add_argument("db_file", nargs="?", default="data/tasks.db")
+    args = parser.parse_args()
+    print(f"Imported {migrate_json_to_sqlite(args.json_file, args.db_file)} tasks into {args.db_file}")
@@ -0,0 +1,246 @@
+import itertools
+import json
+import queue
+import socket
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from .subtree_aggregates import SubtreeCounts
+from .task_model import Task, TaskStatus
+
+# Shared with the daemon; kept here so the app can connect without importing asyncio
+DEFAULT_SOCKET = "data/state.sock"
+# Longest message line; a batch of many new tasks can be large
+MAX_LINE = 64 * 1024 * 1024
+
+
+class DaemonError(RuntimeError):
+    """
+    An operation failed inside the state daemon.
+    """
+
+
+class DaemonGoneError(ConnectionError):
+    """
+    The connection to the state daemon is lost (the daemon stopped or
+    crashed); every later call fails the same way.
+    """
+
+
+def _task(row: Optional[list]) -> Optional[Task]:
+    return Task.from_row(row) if row is not None else None
+
+
+def _tasks(rows: List[list]) -> List[Task]:
+    return [Task.from_row(row) for row in rows]
+
+
+def _status_values(statuses: Optional[Iterable[TaskStatus]]) -> Optional[List[str]]:
+    return [status.value for status in statuses] if statuses is not None else None
+
+
+class StateClient:
+    """
+    Talks to a running state daemon (src.core.state_daemon) and offers the
+    StateManager methods the app uses, so it can stand in for one.
+
+    Every call is a round trip; nothing is cached, so all clients always see
+    the same state. batch() sends several operations as one request, which
+    the daemon runs in one transaction.
+
+    Change notifications arrive on a background thread and are queued;
+    poll() hands them to the listeners on the caller's thread (for the app,
+    the Tk thread), like LLMExecutor.poll() does for LLM results.
+    """
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET, subscribe: bool = True, timeout: float = 30.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.connect(socket_path)
+        self._file = self._sock.makefile('rb')
+        self._send_lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, Future] = {}
+        self._pending_lock = threading.Lock()
+        self._events: "queue.SimpleQueue[Tuple[str, str, Optional[str]]]" = queue.SimpleQueue()
+        self._listeners: List[Callable[[str, str, Optional[str]], None]] = []
+        self._closed = False
+        self._connected = True
+        self._reader = threading.Thread(target=self._read_loop, name="state-client", daemon=True)
+        self._reader.start()
+        if subscribe:
+            self.batch([("subscribe", {})])
+
+    @classmethod
+    def connect(cls, socket_path: str = DEFAULT_SOCKET, **kwargs) -> Optional["StateClient"]:
+        """
+        A client for the daemon on socket_path, or None if none is running.
+        """
+        try:
+            return cls(socket_path, **kwargs)
+        except OSError:
+            return None
+
+    # Transport
+
+    def _read_loop(self):
+        try:
+            for line in iter(lambda: self._file.readline(MAX_LINE), b""):
+                message = json.loads(line)
+                if "event" in message:
+                    self._events.put((message["event"], message["task_id"], message.get("parent_id")))
+                    continue
+                with self._pending_lock:
+                    future = self._pending.pop(message.get("id"), None)
+                if future is None:
+                    continue
+                if "error" in message:
+                    future.set_exception(DaemonError(message["error"]))
+                else:
+                    future.set_result(message["results"])
+        except (OSError, ValueError) as e:
+            if not self._closed:
+                print(f"State daemon connection Error: {e}")
+        finally:
+            with self._pending_lock:
+                self._connected = False
+                pending, self._pending = self._pending, {}
+            for future in pending.values():
+                future.set_exception(DaemonGoneError("State daemon connection closed"))
+
+    @property
+    def connected(self) -> bool:
+        """
+        False once the daemon has gone away.
+        """
+        return self._connected
+
+    def batch(self, ops: List[Tuple[str, Dict[str, Any]]]) -> List[Any]:
+        """
+        Runs (operation, arguments) pairs in one daemon transaction and
+        returns their raw (JSON) results.
+        """
+        request_id = next(self._ids)
+        future: Future = Future()
+        with self._pending_lock:
+            # Checked under the lock the reader clears pending with, so no request waits on a dead connection
+            if not self._connected:
+                raise DaemonGoneError("State daemon connection closed")
+            self._pending[request_id] = future
+        payload = json.dumps({"id": request_id, "ops": ops}, separators=(",", ":")).encode() + b"\n"
+        try:
+            with self._send_lock:
+                self._sock.sendall(payload)
+        except OSError as e:
+            with self._pending_lock:
+                self._pending.pop(request_id, None)
+            raise DaemonGoneError(f"State daemon connection closed: {e}") from e
+        return future.result(self.timeout)
+
+    def call(self, op: str, **kwargs) -> Any:
+        return self.batch([(op, kwargs)])[0]
+
+    def close(self):
+        self._closed = True
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._sock.close()
+
+    # Notifications
+
+    def add_listener(self, listener: Callable[[str, str, Optional[str]], None]):
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[str, str, Optional[str]], None]):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def poll(self, limit: int = 500):
+        """
+        Delivers queued change notifications to the listeners.
+        """
+        for _ in range(limit):
+            try:
+                event = self._events.get_nowait()
+            except queue.Empty:
+                return
+            for listener in self._listeners:
+                try:
+                    listener(*event)
+                except Exception as e:
+                    print(f"State listener Error: {e}")
+
+    # StateManager interface
+
+    @property
+    def root_task_ids(self) -> List[str]:
+        return self.call("root_task_ids")
+
+    def get_task(self, task_id: str) -> Optional[Task]:
+        return _task(self.call("get_task", task_id=task_id))
+
+    def get_tasks(self, task_ids: List[str]) -> List[Optional[Task]]:
+        return [_task(row) for row in self.call("get_tasks", task_ids=task_ids)]
+
+    def get_next_actionable_task(self) -> Optional[Task]:
+        return _task(self.call("get_next_actionable_task"))
+
+    def get_upcoming_tasks(self, limit: int) -> List[Task]:
+        return _tasks(self.call("get_upcoming_tasks", limit=limit))
+
+    def get_ancestors(self, task_id: str) -> List[Task]:
+        return _tasks(self.call("get_ancestors", task_id=task_id))
+
+    def get_siblings(self, task_id: str) -> List[Task]:
+        return _tasks(self.call("get_siblings", task_id=task_id))
+
+    def get_subtree_counts(self, task_id: Optional[str] = None) -> SubtreeCounts:
+        return SubtreeCounts(**self.call("get_subtree_counts", task_id=task_id))
+
+    def search(self, query: str, statuses: Optional[Iterable[TaskStatus]] = None, limit: int = 20) -> List[Task]:
+        return _tasks(self.call("search", query=query, statuses=_status_values(statuses), limit=limit))
+
+    def search_ready(self) -> bool:
+        return self.call("search_ready")
+
+    def add_task(self, title: str, description: str = "", parent_id: Optional[str] = None,
+                 is_reward: bool = False) -> Task:
+        return _task(self.call("add_task", title=title, description=description, parent_id=parent_id,
+                               is_reward=is_reward))
+
+    def add_tasks(self, items: Iterable[Dict[str, str]], parent_id: Optional[str] = None) -> List[Task]:
+        return _tasks(self.call("add_tasks", items=list(items), parent_id=parent_id))
+
+    def add_breakdowns(self, breakdowns: Dict[str, List[Dict[str, str]]]) -> Dict[str, List[Task]]:
+        return {parent_id: _tasks(rows) for parent_id, rows in
+                self.call("add_breakdowns", breakdowns=breakdowns).items()}
+
+    def update_task_status(self, task_id: str, status: TaskStatus):
+        self.call("update_task_status", task_id=task_id, status=status.value)
+
+    def update_tasks_status(self, task_ids: Iterable[str], status: TaskStatus):
+        self.call("update_tasks_status", task_ids=list(task_ids), status=status.value)
+
+    def move_task(self, task_id: str, to_front: bool = False):
+        self.call("move_task", task_id=task_id, to_front=to_front)
+
+    def delete_task(self, task_id: str):
+        self.call("delete_task", task_id=task_id)
+
+    def archive_finished(self, keep: int = 0, root_ids: Optional[Iterable[str]] = None) -> int:
+        return self.call("archive_finished", keep=keep, root_ids=list(root_ids) if root_ids is not None else None)
+
+    def get_archived_task(self, task_id: str) -> Optional[Task]:
+        return _task(self.call("get_archived_task", task_id=task_id))
+
+    def restore_archived(self, task_id: str) -> Optional[Task]:
+        return _task(self.call("restore_archived", task_id=task_id))
+
+    def flush(self):
+        self.call("flush")
+
+    def save_state(self):
+        self.call("save_state")
@@ -0,0 +1,264 @@
+"""
+Headless server that owns the one StateManager and serves it over a local
+Unix socket, so every window and script works on the same in-memory state
+instead of loading and rewriting the store on its own.
+
+    python main.py --serve [--socket data/state.sock]
+
+The protocol is newline-delimited JSON. A request is a batch of operations,
+run back to back inside one transaction (one write, and no other client's
+operation in between, except while it waits for a flush, save_state or
+archive_finished):
+
+    {"id": 1, "ops": [["add_task", {"title": "Call mom"}], ["get_next_actionable_task", {}]]}
+    {"id": 1, "results": [[...task row...], [...task row...]]}
+
+A failing operation stops its batch: {"id": 1, "error": "...", "failed": 0};
+the operations before it stay applied. Tasks travel as Task.to_row() rows
+and statuses as TaskStatus values. A connection that sends the "subscribe"
+operation also receives every change as it happens, as
+{"event": "added", "task_id": "...", "parent_id": null} (see
+StateManager.add_listener).
+"""
+import argparse
+import asyncio
+import functools
+import json
+import os
+import signal
+import socket
+from dataclasses import asdict
+from typing import Any, Callable, Dict, List, Optional, Set
+from .config_service import get_config
+from .metrics import metrics
+from .state_client import DEFAULT_SOCKET, MAX_LINE
+from .state_manager import StateManager
+from .store_lock import StoreLockedError
+from .subtree_aggregates import SubtreeCounts
+from .task_model import Task, TaskStatus
+
+# Commits are coalesced for this long unless config.json sets write_behind_seconds
+DEFAULT_WRITE_BEHIND = 0.05
+
+
+def _statuses(values: Optional[List[str]]) -> Optional[List[TaskStatus]]:
+    return [TaskStatus(value) for value in values] if values is not None else None
+
+
+# name -> handler(state_manager, **kwargs); the public surface of the daemon
+OPS: Dict[str, Callable[..., Any]] = {
+    "get_task": lambda sm, task_id: sm.get_task(task_id),
+    "get_tasks": lambda sm, task_ids: sm.get_tasks(task_ids),
+    "root_task_ids": lambda sm: list(sm.root_task_ids),
+    "get_next_actionable_task": lambda sm: sm.get_next_actionable_task(),
+    "get_upcoming_tasks": lambda sm, limit: sm.get_upcoming_tasks(limit),
+    "get_ancestors": lambda sm, task_id: sm.get_ancestors(task_id),
+    "get_siblings": lambda sm, task_id: sm.get_siblings(task_id),
+    "get_subtree_counts": lambda sm, task_id=None: sm.get_subtree_counts(task_id),
+    "search": lambda sm, query, statuses=None, limit=20: sm.search(query, _statuses(statuses), limit),
+    "search_ready": lambda sm: sm.search_ready(),
+    "add_task": lambda sm, title, description="", parent_id=None, is_reward=False:
+        sm.add_task(title, description, parent_id=parent_id, is_reward=is_reward),
+    "add_tasks": lambda sm, items, parent_id=None: sm.add_tasks(items, parent_id=parent_id),
+    "add_breakdowns": lambda sm, breakdowns: sm.add_breakdowns(breakdowns),
+    "update_task_status": lambda sm, task_id, status: sm.update_task_status(task_id, TaskStatus(status)),
+    "update_tasks_status": lambda sm, task_ids, status: sm.update_tasks_status(task_ids, TaskStatus(status)),
+    "move_task": lambda sm, task_id, to_front=False: sm.move_task(task_id, to_front=to_front),
+    "delete_task": lambda sm, task_id: sm.delete_task(task_id),
+    "archive_finished": lambda sm, keep=0, root_ids=None: sm.archive_finished(keep=keep, root_ids=root_ids),
+    "get_archived_task": lambda sm, task_id: sm.get_archived_task(task_id),
+    "restore_archived": lambda sm, task_id: sm.restore_archived(task_id),
+    "flush": lambda sm: sm.flush(),
+    "save_state": lambda sm: sm.save_state(),
+}
+# Operations that wait on the disk; they run on a worker thread so the other
+# clients are served meanwhile, kept in order by the StateManager's locks
+BLOCKING_OPS = {"flush", "save_state", "archive_finished"}
+
+
+def encode(value: Any) -> Any:
+    """
+    Turns operation results into JSON-friendly values.
+    """
+    if isinstance(value, Task):
+        return value.to_row()
+    if isinstance(value, SubtreeCounts):
+        return asdict(value)
+    if isinstance(value, (list, tuple)):
+        return [encode(item) for item in value]
+    if isinstance(value, dict):
+        return {key: encode(item) for key, item in value.items()}
+    return value
+
+
+def _dumps(message: dict) -> bytes:
+    return json.dumps(message, separators=(",", ":")).encode() + b"\n"
+
+
+class StateDaemon:
+    """
+    Serves one StateManager to any number of local clients.
+
+    Everything runs on the event loop thread, so batches never interleave
+    and change notifications go out in the order the changes happened.
+    Disk writes happen on the StateManager's write-behind thread, and the
+    BLOCKING_OPS on a worker thread; other batches may run while a batch
+    waits for one of those.
+    """
+
+    def __init__(self, state_manager: StateManager, socket_path: str = DEFAULT_SOCKET):
+        self.state_manager = state_manager
+        self.socket_path = socket_path
+        self._subscribers: Set[asyncio.StreamWriter] = set()
+        self._server: Optional[asyncio.AbstractServer] = None
+        state_manager.add_listener(self._on_change)
+
+    async def start(self):
+        _claim_socket(self.socket_path)
+        # Only this user may talk to the daemon. The socket accepts
+        # connections as soon as it is bound, so it has to be created with
+        # these permissions rather than changed to them afterwards.
+        old_umask = os.umask(0o177)
+        try:
+            self._server = await asyncio.start_unix_server(self._serve_client, path=self.socket_path,
+                                                           limit=MAX_LINE)
+        finally:
+            os.umask(old_umask)
+
+    async def serve_forever(self):
+        """
+        Serves until SIGINT or SIGTERM.
+        """
+        if self._server is None:
+            await self.start()
+        stopped = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, stopped.set)
+        print(f"State daemon listening on {self.socket_path}")
+        await stopped.wait()
+
+    def close(self):
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+        self.state_manager.remove_listener(self._on_change)
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+    async def _serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        metrics().incr("daemon.connections")
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ConnectionError, ValueError):
+                    break
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                except ValueError as e:
+                    writer.write(_dumps({"id": None, "error": f"Bad request: {e}"}))
+                    continue
+                writer.write(_dumps(await self.handle(request, writer)))
+                await writer.drain()
+        finally:
+            self._subscribers.discard(writer)
+            writer.close()
+
+    async def handle(self, request: Any, writer: Optional[asyncio.StreamWriter] = None) -> dict:
+        """
+        Runs one batch and returns the response message. A malformed request
+        or operation gets an error response; the connection stays open.
+        """
+        request_id = request.get("id") if isinstance(request, dict) else None
+        ops = request.get("ops", []) if isinstance(request, dict) else None
+        if not isinstance(ops, list):
+            return {"id": request_id, "error": "Bad request: expected {\"id\": ..., \"ops\": [...]}"}
+        results: List[Any] = []
+        with metrics().timer("daemon.batch"):
+            with self.state_manager.transaction():
+                for index, op in enumerate(ops):
+                    try:
+                        if not (isinstance(op, list) and len(op) == 2 and isinstance(op[0], str)
+                                and isinstance(op[1], dict)):
+                            raise ValueError("expected [name, {arguments}]")
+                        name, kwargs = op
+                        if name == "subscribe":
+                            if writer is not None:
+                                self._subscribers.add(writer)
+                            results.append(True)
+                            continue
+                        handler = OPS.get(name)
+                        if handler is None:
+                            raise ValueError(f"Unknown operation {name!r}")
+                        if name in BLOCKING_OPS:
+                            result = await asyncio.get_running_loop().run_in_executor(
+                                None, functools.partial(handler, self.state_manager, **kwargs))
+                        else:
+                            result = handler(self.state_manager, **kwargs)
+                        results.append(encode(result))
+                    except Exception as e:
+                        return {"id": request_id, "error": f"{type(e).__name__}: {e}", "failed": index}
+        metrics().observe("daemon.batch_ops", len(ops))
+        return {"id": request_id, "results": results}
+
+    def _on_change(self, event: str, task_id: str, parent_id: Optional[str]):
+        if not self._subscribers:
+            return
+        message = _dumps({"event": event, "task_id": task_id, "parent_id": parent_id})
+        for writer in list(self._subscribers):
+            if writer.is_closing() or writer.transport.get_write_buffer_size() > MAX_LINE:
+                # Gone, or not reading its notifications at all
+                self._subscribers.discard(writer)
+                writer.close()
+            else:
+                # Buffered; flushed by the next drain or by the transport itself
+                writer.write(message)
+
+
+def _claim_socket(path: str):
+    """
+    Removes a socket left behind by a daemon that is gone; refuses to start
+    next to one that still answers.
+    """
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except OSError:
+        os.remove(path)
+    else:
+        raise RuntimeError(f"A state daemon is already running on {path}")
+    finally:
+        probe.close()
+
+
+def serve(socket_path: Optional[str] = None, state_manager: Optional[StateManager] = None):
+    """
+    Runs the daemon until SIGINT or SIGTERM, then writes pending changes.
+    """
+    config = get_config()
+    socket_path = socket_path or config.get("state_socket", DEFAULT_SOCKET)
+    if state_manager is None:
+        try:
+            state_manager = StateManager.from_config(config, write_behind_delay=DEFAULT_WRITE_BEHIND)
+        except StoreLockedError as e:
+            # Serving a store a window is writing to would lose one side's changes
+            raise SystemExit(f"State daemon Error: {e}")
+    daemon = StateDaemon(state_manager, socket_path)
+    try:
+        asyncio.run(daemon.serve_forever())
+    finally:
+        daemon.close()
+        state_manager.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the task store to local clients.")
+    parser.add_argument("--socket", default=None, help=f"socket path (default: {DEFAULT_SOCKET})")
+    args = parser.parse_args()
+    serve(args.socket)
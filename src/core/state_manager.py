@@ -1,138 +1,636 @@
-import json
 import os
-from typing import Dict, List, Optional
-from .task_model import Task, TaskStatus
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, MutableMapping, Optional, Tuple
+from .journal import gc_paused
+from .metrics import metrics, timed
+from .store_lock import StoreLock
+from .storage import Edge, JournalStore, JsonStore, StorageBackend
+from .task_model import IdList, Task, TaskStatus
+from .write_behind import WriteBehindFlusher
+from .frontier_index import FrontierIndex
+from .subtree_aggregates import SubtreeAggregates, SubtreeCounts
+from .search_index import SearchIndex
+from .task_archive import TaskArchive
+
+OPEN_STATUSES = (TaskStatus.PENDING, TaskStatus.ACTIVE)
+# Tasks read per lock hold when the search index is rebuilt
+INDEX_CHUNK = 1000
+# Store file by config.json "storage"; anything else is data/tasks.json
+STORE_FILES = {"sqlite": "data/tasks.db", "binary": "data/tasks.snap"}
 
 class StateManager:
-    def __init__(self, data_file: str = "data/tasks.json"):
+    def __init__(self, data_file: str = "data/tasks.json", journaled: bool = False, compact_every: int = 1000,
+                 write_behind_delay: Optional[float] = None, store: Optional[StorageBackend] = None,
+                 language: str = "en"):
         self.data_file = data_file
-        self.tasks: Dict[str, Task] = {}
-        self.root_task_ids: List[str] = [] # Top level tasks
+        self._store_lock: Optional[StoreLock] = None
+        self.store = store or self._default_store(data_file, journaled, compact_every)
+        # Finished root subtrees moved out of the hot store; read only on demand
+        self.archive = TaskArchive(data_file + ".archive")
+        # Loaded in the background on the first search; `language` picks
+        # stopwords and stemming
+        self.search_index = SearchIndex(data_file + ".search", self._index_rows, language)
+        # May be lazy (e.g. SQLite), so avoid iterating it on hot paths
+        self.tasks: MutableMapping[str, Task] = {}
+        self.root_task_ids = IdList() # Top level tasks
+        # Changes since the last commit: task id -> Task, or None if deleted
+        self._dirty: Dict[str, Optional[Task]] = {}
+        # Child list changes since the last commit, in order, see StorageBackend.write_changes
+        self._edges: List[Edge] = []
+        # Changes flush() has taken but the store has not committed yet
+        self._flushing: Dict[str, Optional[Task]] = {}
+        self._tx_depth = 0
+        # _lock guards the in-memory state, _io_lock keeps writes in order
+        self._lock = threading.RLock()
+        self._io_lock = threading.Lock()
+        # One archive_finished/restore_archived at a time; they write the
+        # archive without holding _lock
+        self._archive_lock = threading.Lock()
+        self.frontier = FrontierIndex(self._open_children, self._is_open)
+        self.aggregates = SubtreeAggregates(lambda task_id: self.tasks.get(task_id),
+                                            lambda: self.root_task_ids)
+        # listener(event, task_id, parent_id), see add_listener
+        self._listeners: List[Callable[[str, str, Optional[str]], None]] = []
         self.load_state()
 
+        # Optional write-behind: commits only wake a background flusher
+        self._flusher = None
+        if write_behind_delay is not None:
+            self._flusher = WriteBehindFlusher(self.flush, delay=write_behind_delay)
+            self._flusher.start()
+
+    @classmethod
+    def from_config(cls, config, write_behind_delay: Optional[float] = None) -> "StateManager":
+        """
+        The store selected by config.json ("storage", "write_behind_seconds",
+        "language"), migrating data/tasks.json into it the first time.
+        write_behind_delay is the default when the config sets none.
+        """
+        storage = config.get("storage", "json")
+        data_file = STORE_FILES.get(storage, "data/tasks.json")
+        # Next to the store itself and held until close(); raises
+        # StoreLockedError if another window or a daemon has it open
+        store_lock = StoreLock(data_file + ".lock").acquire()
+        try:
+            manager = cls._open_configured(config, storage, data_file, write_behind_delay)
+        except BaseException:
+            store_lock.release()
+            raise
+        manager._store_lock = store_lock
+        return manager
+
+    @classmethod
+    def _open_configured(cls, config, storage: str, data_file: str,
+                         write_behind_delay: Optional[float]) -> "StateManager":
+        if storage == "sqlite":
+            from .sqlite_store import migrate_json_to_sqlite
+            migrate_json_to_sqlite("data/tasks.json", data_file)
+        elif storage == "binary":
+            from .binary_snapshot import json_to_binary
+            if not os.path.exists(data_file) and os.path.exists("data/tasks.json"):
+                json_to_binary("data/tasks.json", data_file)
+        write_behind = config.get("write_behind_seconds")
+        return cls(data_file, journaled=(storage == "journal"),
+                   write_behind_delay=write_behind if write_behind is not None else write_behind_delay,
+                   language=config.get("language", "en"))
+
+    @staticmethod
+    def _default_store(data_file: str, journaled: bool, compact_every: int) -> StorageBackend:
+        if data_file.endswith((".db", ".sqlite", ".sqlite3")):
+            from .sqlite_store import SqliteStore
+            return SqliteStore(data_file)
+        if data_file.endswith(".snap"):
+            from .binary_snapshot import BinaryStore
+            return BinaryStore(data_file, compact_every=compact_every)
+        if journaled:
+            # Mutations are appended to data_file + ".log" and data_file itself
+            # is only rewritten when the log gets compacted.
+            return JournalStore(data_file, compact_every=compact_every)
+        return JsonStore(data_file)
+
+    @timed("state.load")
     def load_state(self):
-        if not os.path.exists(self.data_file):
-            self.tasks = {}
-            self.root_task_ids = []
+        self.tasks, root_ids = self.store.load()
+        self.root_task_ids = IdList(root_ids)
+        self._dirty = {}
+        self._edges = []
+        self.frontier.reset()
+        self.aggregates.reset()
+
+    @timed("state.save")
+    def save_state(self):
+        """
+        Writes a full snapshot of the store. The write is atomic and also
+        compacts the journal, if there is one.
+        """
+        with self._io_lock:
+            self._write_snapshot()
+        self.search_index.compact()
+
+    def _take_changes(self):
+        """
+        Hands out the changes recorded since the last write as
+        (changes, edges) and starts a new set. Call with _lock held; the
+        caller passes them to the search index and the store, then calls
+        _end_write().
+        """
+        changes = {t_id: (t.to_row() if t else None) for t_id, t in self._dirty.items()}
+        edges = self._edges
+        # Stays visible to _open_children until the store has it
+        self._flushing = self._dirty
+        self._dirty = {}
+        self._edges = []
+        return changes, edges
+
+    def _end_write(self):
+        with self._lock:
+            self._flushing = {}
+
+    def _snapshot_data(self) -> dict:
+        # A lazy store decodes the tasks it has not loaded without keeping
+        # them, so a snapshot doesn't pull the whole store into memory
+        peek = getattr(self.tasks, "peek", None)
+        tasks = self.tasks.values() if peek is None else (peek(task_id) for task_id in self.tasks)
+        with gc_paused():
+            return {
+                'tasks': [t.to_row() for t in tasks if t is not None],
+                'root_task_ids': list(self.root_task_ids)
+            }
+
+    def _write_snapshot(self):
+        # Call with _io_lock held
+        with self._lock:
+            changes, _ = self._take_changes()
+            data = self._snapshot_data()
+        # Before the store, so a crash can only leave the index with extra
+        # ids, which search() drops
+        self.search_index.write_changes(changes)
+        try:
+            self.store.write_snapshot(data)
+        finally:
+            self._end_write()
+
+    @timed("state.flush")
+    def flush(self):
+        """
+        Persists the changes recorded since the last write.
+        """
+        with self._io_lock:
+            with self._lock:
+                if not self._dirty and not self._edges:
+                    return
+                metrics().observe("state.flush_rows", len(self._dirty))
+                if self.store.incremental:
+                    changes, edges = self._take_changes()
+            if not self.store.incremental:
+                self._write_snapshot()
+                return
+
+            self.search_index.write_changes(changes)
+            try:
+                compact = self.store.write_changes(changes, edges)
+            finally:
+                self._end_write()
+            if compact:
+                self._write_snapshot()
+
+    def close(self):
+        """
+        Stops the write-behind flusher (if any) and writes pending changes.
+        """
+        if self._flusher:
+            self._flusher.stop()
+            self._flusher = None
+        self.flush()
+        self.search_index.compact()
+        self.store.close()
+        if self._store_lock:
+            self._store_lock.release()
+            self._store_lock = None
+
+    def _commit(self):
+        # Inside a transaction the outermost block commits on exit.
+        if self._tx_depth > 0:
             return
+        if self._flusher:
+            self._flusher.schedule()
+        else:
+            self.flush()
 
+    @contextmanager
+    def transaction(self):
+        """
+        Groups mutations so they are committed with a single write.
+        Changes apply to memory immediately; nested blocks commit once,
+        when the outermost block exits (also when it exits with an error,
+        so the store never drifts from what is in memory).
+        """
+        with self._lock:
+            self._tx_depth += 1
         try:
-            with open(self.data_file, 'r') as f:
-                data = json.load(f)
-                self.tasks = {t_data['id']: Task.from_dict(t_data) for t_data in data.get('tasks', [])}
-                self.root_task_ids = data.get('root_task_ids', [])
-        except (json.JSONDecodeError, IOError):
-            self.tasks = {}
-            self.root_task_ids = []
+            yield self
+        finally:
+            with self._lock:
+                self._tx_depth -= 1
+                outermost = self._tx_depth == 0
+            if outermost:
+                self._commit()
 
-    def save_state(self):
-        data = {
-            'tasks': [t.to_dict() for t in self.tasks.values()],
-            'root_task_ids': self.root_task_ids
-        }
-        os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
-        with open(self.data_file, 'w') as f:
-            json.dump(data, f, indent=4)
+    def add_listener(self, listener: Callable[[str, str, Optional[str]], None]):
+        """
+        listener(event, task_id, parent_id) is called on the mutating thread
+        after each change, with event one of "added", "updated" (status),
+        "moved_front", "moved_end" or "deleted". A deleted subtree is
+        reported once, for its root.
+        """
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[str, str, Optional[str]], None]):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, event: str, task_id: str, parent_id: Optional[str]):
+        for listener in self._listeners:
+            try:
+                listener(event, task_id, parent_id)
+            except Exception as e:
+                print(f"State listener Error: {e}")
+
+    def _mark_dirty(self, task: Task):
+        self._dirty[task.id] = task
+
+    def _mark_deleted(self, task_id: str):
+        self._dirty[task_id] = None
 
     def add_task(self, title: str, description: str = "", parent_id: Optional[str] = None, is_reward: bool = False) -> Task:
         new_task = Task(title=title, description=description, parent_id=parent_id, is_reward=is_reward)
-        self.tasks[new_task.id] = new_task
-        
-        if parent_id:
-            parent = self.tasks.get(parent_id)
-            if parent:
-                parent.children_ids.append(new_task.id)
-        else:
-            self.root_task_ids.append(new_task.id)
+        with self._lock:
+            self.tasks[new_task.id] = new_task
+            self._mark_dirty(new_task)
             
-        self.save_state()
+            if parent_id:
+                parent = self.tasks.get(parent_id)
+                if parent:
+                    parent.children_ids.append(new_task.id)
+                    self._edges.append((parent_id, new_task.id, "end"))
+                    self.frontier.child_added(parent_id, new_task.id)
+            else:
+                self.root_task_ids.append(new_task.id)
+                self._edges.append((None, new_task.id, "end"))
+                self.frontier.child_added(None, new_task.id)
+            self.aggregates.added(new_task)
+            self._notify("added", new_task.id, parent_id)
+            
+        self._commit()
         return new_task
 
+    def add_tasks(self, items: Iterable[Dict[str, str]], parent_id: Optional[str] = None) -> List[Task]:
+        """
+        Adds many tasks under the same parent with a single write.
+        Items use the LLM subtask format: {"title": "...", "description": "..."}
+        """
+        with self.transaction():
+            return [self.add_task(item["title"], item.get("description", ""), parent_id=parent_id) for item in items]
+
+    def add_breakdowns(self, breakdowns: Dict[str, List[Dict[str, str]]]) -> Dict[str, List[Task]]:
+        """
+        Adds subtasks under many parents at once ({parent_id: subtasks}, as
+        returned by LLMService.break_down_tasks) with a single write.
+        """
+        with self.transaction():
+            return {parent_id: self.add_tasks(subtasks, parent_id=parent_id)
+                    for parent_id, subtasks in breakdowns.items() if parent_id in self.tasks}
+
     def get_task(self, task_id: str) -> Optional[Task]:
         return self.tasks.get(task_id)
 
-    def update_task_status(self, task_id: str, status: TaskStatus):
+    def get_tasks(self, task_ids: Iterable[str]) -> List[Optional[Task]]:
+        """
+        The tasks for the ids, in order (None where an id is gone).
+        """
+        with self._lock:
+            return [self.tasks.get(task_id) for task_id in task_ids]
+
+    def get_ancestors(self, task_id: str) -> List[Task]:
+        """
+        The task's parent, grandparent and so on up to its root, nearest first.
+        """
+        ancestors: List[Task] = []
         task = self.tasks.get(task_id)
-        if task:
+        while task is not None and task.parent_id:
+            task = self.tasks.get(task.parent_id)
+            if task is not None:
+                ancestors.append(task)
+        return ancestors
+
+    def get_siblings(self, task_id: str) -> List[Task]:
+        """
+        The other children of the task's parent (or the other roots), in order.
+        """
+        task = self.tasks.get(task_id)
+        if task is None:
+            return []
+        if task.parent_id:
+            parent = self.tasks.get(task.parent_id)
+            sibling_ids = parent.children_ids if parent else []
+        else:
+            sibling_ids = self.root_task_ids
+        return [self.tasks[sibling_id] for sibling_id in sibling_ids
+                if sibling_id != task_id and sibling_id in self.tasks]
+
+    @timed("state.search")
+    def search(self, query: str, statuses: Optional[Iterable[TaskStatus]] = None, limit: int = 20) -> List[Task]:
+        """
+        Tasks whose title or description contain every word of the query (the
+        last one also as a prefix, for typeahead), best matches first.
+        Sees changes once they have been flushed, and finds nothing while
+        the index is still loading (see search_ready).
+        """
+        status_values = [status.value for status in statuses] if statuses is not None else None
+        with self._lock:
+            # Ask for a few more in case some ids are gone from the store
+            results = self.search_index.search(query, status_values, limit + 10)
+            tasks = [self.tasks.get(task_id) for task_id, _ in results]
+        return [task for task in tasks if task is not None][:limit]
+
+    def search_ready(self, wait: bool = False) -> bool:
+        """
+        Whether search() can answer yet. The first call starts loading the
+        index in the background; wait=True blocks until it is loaded.
+        """
+        return self.search_index.load(block=wait)
+
+    def _index_rows(self) -> Iterator[Tuple[str, str, str, str]]:
+        """
+        (id, status, title, description) of every task, for search index
+        rebuilds on their own thread. The locks are taken one chunk at a
+        time, and tasks a lazy store has not loaded are decoded without
+        being kept.
+        """
+        with self._lock:
+            task_ids = list(self.tasks)
+        peek = getattr(self.tasks, "peek", self.tasks.get)
+        for start in range(0, len(task_ids), INDEX_CHUNK):
+            # _io_lock too, so a snapshot store can't swap files mid-chunk
+            with self._io_lock, self._lock:
+                tasks = [peek(task_id) for task_id in task_ids[start:start + INDEX_CHUNK]]
+                rows = [(t.id, t.status.value, t.title, t.description) for t in tasks if t is not None]
+            yield from rows
+
+    def get_subtree_counts(self, task_id: Optional[str] = None) -> SubtreeCounts:
+        """
+        Status counts for the task and its descendants, or for the whole store
+        when task_id is None. O(1) once the subtree has been counted.
+        """
+        with self._lock:
+            return self.aggregates.counts(task_id)
+
+    def verify_aggregates(self, repair: bool = False) -> List[Optional[str]]:
+        """
+        Recounts everything from scratch and returns the ids whose cached
+        counts were wrong (None for the store total). With repair=True the
+        cache is rebuilt when anything was off.
+        """
+        with self._lock:
+            mismatched = self.aggregates.verify()
+            if mismatched and repair:
+                self.aggregates.rebuild()
+            return mismatched
+
+    def update_task_status(self, task_id: str, status: TaskStatus):
+        with self._lock:
+            task = self.tasks.get(task_id)
+            if not task:
+                return
+            old_status = task.status
             task.status = status
-            self.save_state()
+            self._mark_dirty(task)
+            if old_status not in OPEN_STATUSES and status in OPEN_STATUSES:
+                self.frontier.child_reopened(task.parent_id)
+            self.aggregates.status_changed(task, old_status)
+            self._notify("updated", task_id, task.parent_id)
+        self._commit()
+
+    def update_tasks_status(self, task_ids: Iterable[str], status: TaskStatus):
+        """
+        Sets the same status on many tasks with a single write.
+        """
+        with self.transaction():
+            for task_id in task_ids:
+                self.update_task_status(task_id, status)
 
+    @timed("state.next_task")
     def get_next_actionable_task(self) -> Optional[Task]:
         """
-        Finds the first actionable task (DFS).
+        Finds the first actionable task in DFS order.
         A task is actionable if:
         1. It is PENDING or ACTIVE.
         2. It has no children (leaf node) OR all children are COMPLETED/SKIPPED.
+
+        A parent whose children are all done is returned itself: the user still
+        needs to explicitly mark it done (maybe it was "Clean Room", children were
+        "Floor", "Desk". After Floor and Desk, user says "Clean Room" is done).
+
+        Served from the frontier index, so finished branches are never walked.
         """
-        # Simple DFS to find the first leaf node that is pending/active
-        # We prioritize existing active tasks
-        
-        # First check if there is an active task
-        for task in self.tasks.values():
-            if task.status == TaskStatus.ACTIVE:
-                 # If it has open children, it's not the leaf action, its children are.
-                 # But if we are strictly following "one thing", maybe we should check children.
-                 # Let's use a recursive helper.
-                 pass
-
-        # Let's iterate through roots and find the first available
-        for root_id in self.root_task_ids:
-            task = self._find_next_in_subtree(root_id)
-            if task:
-                return task
-        return None
-
-    def _find_next_in_subtree(self, task_id: str) -> Optional[Task]:
-        task = self.tasks.get(task_id)
-        if not task:
-            return None
-        
-        if task.status in [TaskStatus.COMPLETED, TaskStatus.SKIPPED]:
-            return None
+        with self._lock:
+            task_id = self.frontier.next_id()
+            return self.tasks.get(task_id) if task_id else None
 
-        # If it has children, look into them first
-        if task.children_ids:
-            # Check if all children are done?
-            # We want to do the first pending child.
-            for child_id in task.children_ids:
-                found = self._find_next_in_subtree(child_id)
-                if found:
-                    return found
-            
-            # If we are here, all children are done (or skipped).
-            # So this task itself is now "done" effectively, or ready to be marked done.
-            # But wait, if it's a container task, maybe it doesn't need manual completion?
-            # For now, let's say if all children are done, the user still needs to explicitly 
-            # mark this parent task as done (maybe it was "Clean Room", children were "Floor", "Desk". 
-            # After Floor and Desk, user says "Clean Room" is done).
-            return task
+    @timed("state.upcoming_tasks")
+    def get_upcoming_tasks(self, limit: int) -> List[Task]:
+        """
+        The next `limit` tasks in the order get_next_actionable_task would
+        return them if each one were completed in turn (DFS post-order over
+        open tasks). The first one is the current next actionable task.
+        """
+        upcoming: List[Task] = []
+        with self._lock:
+            stack = [(None, iter(self._open_children(None)))]
+            while stack and len(upcoming) < limit:
+                parent_id, children = stack[-1]
+                child_id = next(children, None)
+                if child_id is None:
+                    stack.pop()
+                    if parent_id is not None:
+                        upcoming.append(self.tasks[parent_id])
+                else:
+                    stack.append((child_id, iter(self._open_children(child_id))))
+        return upcoming
+
+    def _open_children(self, parent_id: Optional[str]) -> Iterable[str]:
+        # The backend can often answer from an index, but only while no
+        # unsaved or still uncommitted change touches this parent's children.
+        if not any(t is not None and t.parent_id == parent_id
+                   for pending in (self._dirty, self._flushing) for t in pending.values()):
+            stored = self.store.open_children(parent_id)
+            if stored is not None:
+                return [child_id for child_id in stored if self._is_open(child_id)]
+
+        if parent_id is None:
+            child_ids = self.root_task_ids
         else:
-            # It's a leaf node and it is PENDING/ACTIVE (checked above)
-            return task
+            parent = self.tasks.get(parent_id)
+            child_ids = parent.children_ids if parent else []
+        return [child_id for child_id in child_ids if self._is_open(child_id)]
 
-    def delete_task(self, task_id: str):
-        # This is complex because of children. For now, let's just remove from parent and dict.
+    def _is_open(self, task_id: str) -> bool:
         task = self.tasks.get(task_id)
-        if not task:
-            return
+        return task is not None and task.status in OPEN_STATUSES
+
+    def move_task(self, task_id: str, to_front: bool = False):
+        """
+        Moves a task to the end (or front) of its siblings.
+        Moving to the end is O(1); moving to the front is O(siblings).
+        """
+        with self._lock:
+            task = self.tasks.get(task_id)
+            if not task:
+                return
+            if task.parent_id:
+                parent = self.tasks.get(task.parent_id)
+                if not parent or task_id not in parent.children_ids:
+                    return
+                siblings = parent.children_ids
+            else:
+                if task_id not in self.root_task_ids:
+                    return
+                siblings = self.root_task_ids
+            if to_front:
+                siblings.move_to_front(task_id)
+            else:
+                siblings.move_to_end(task_id)
+            self._edges.append((task.parent_id, task_id, "front" if to_front else "end"))
+            # Also keeps backend lookups off this parent until the move is saved
+            self._mark_dirty(task)
+            self.frontier.reordered(task.parent_id)
+            self._notify("moved_front" if to_front else "moved_end", task_id, task.parent_id)
+        self._commit()
+
+    def iter_subtree(self, task_id: str) -> Iterator[Task]:
+        """
+        Yields a task and all its descendants in DFS pre-order. Uses an
+        explicit stack, so tree depth is not limited by the recursion limit.
+        """
+        stack = [task_id]
+        while stack:
+            task = self.tasks.get(stack.pop())
+            if not task:
+                continue
+            yield task
+            if task.children_ids:
+                stack.extend(reversed(list(task.children_ids)))
+
+    def delete_task(self, task_id: str):
+        # Removes the task from its parent (O(1) with IdList), then deletes the whole subtree.
+        with self._lock:
+            task = self.tasks.get(task_id)
+            if not task:
+                return
             
-        if task.parent_id:
-            parent = self.tasks.get(task.parent_id)
-            if parent and task_id in parent.children_ids:
-                parent.children_ids.remove(task_id)
-        else:
-            if task_id in self.root_task_ids:
-                self.root_task_ids.remove(task_id)
+            if task.parent_id:
+                parent = self.tasks.get(task.parent_id)
+                if parent and task_id in parent.children_ids:
+                    parent.children_ids.remove(task_id)
+                    self._edges.append((task.parent_id, task_id, None))
+            else:
+                if task_id in self.root_task_ids:
+                    self.root_task_ids.remove(task_id)
+                    self._edges.append((None, task_id, None))
         
-        # Recursive delete children? Or orphan them? Let's recursive delete.
-        self._delete_recursive(task_id)
-        self.save_state()
+            self.aggregates.removing(task)
+            for doomed in list(self.iter_subtree(task_id)):
+                del self.tasks[doomed.id]
+                self._mark_deleted(doomed.id)
+                self.frontier.removed(doomed.id)
+                self.aggregates.removed(doomed.id)
+            self._notify("deleted", task_id, task.parent_id)
+        self._commit()
 
-    def _delete_recursive(self, task_id: str):
+    def _subtree_finished(self, task_id: str) -> bool:
         task = self.tasks.get(task_id)
-        if not task:
-            return
-        for child_id in list(task.children_ids):
-            self._delete_recursive(child_id)
-        if task_id in self.tasks:
-            del self.tasks[task_id]
+        if task is None or task.status in OPEN_STATUSES:
+            return False
+        counts = self.aggregates.counts(task_id)
+        return counts.pending == 0 and counts.active == 0
+
+    @timed("state.archive")
+    def archive_finished(self, keep: int = 0, root_ids: Optional[Iterable[str]] = None) -> int:
+        """
+        Moves fully finished root subtrees (no PENDING/ACTIVE task left) to
+        the archive and deletes them from the store. With root_ids only those
+        roots are considered; otherwise all of them except the `keep` latest
+        finished ones. Returns the number of tasks archived.
+        """
+        with self._archive_lock:
+            return self._archive_finished(keep, root_ids)
+
+    def _archive_finished(self, keep: int, root_ids: Optional[Iterable[str]]) -> int:
+        with self.transaction():
+            with self._lock:
+                if root_ids is None:
+                    finished = [root_id for root_id in self.root_task_ids if self._subtree_finished(root_id)]
+                    candidates = finished[:max(0, len(finished) - keep)]
+                else:
+                    candidates = [root_id for root_id in root_ids
+                                  if root_id in self.root_task_ids and self._subtree_finished(root_id)]
+                if not candidates:
+                    return 0
+                subtrees = [[task.to_row() for task in self.iter_subtree(root_id)] for root_id in candidates]
+            # Durable in the archive before it leaves the store; written
+            # outside _lock so other threads aren't kept waiting on the fsync
+            self.archive.append(subtrees)
+            archived = 0
+            changed = []
+            with self._lock:
+                for root_id, rows in zip(candidates, subtrees):
+                    if root_id not in self.root_task_ids or \
+                            [task.to_row() for task in self.iter_subtree(root_id)] != rows:
+                        changed.append(root_id)
+                        continue
+                    self.delete_task(root_id)
+                    archived += len(rows)
+        # Changed or deleted while being archived: the store keeps its copy
+        # and the archived one is dropped
+        for root_id in changed:
+            self.archive.mark_restored(root_id)
+        return archived
+
+    def get_archived_task(self, task_id: str) -> Optional[Task]:
+        """
+        An archived task (a copy; changing it changes nothing), or None.
+        """
+        return self.archive.get(task_id)
+
+    def restore_archived(self, task_id: str) -> Optional[Task]:
+        """
+        Moves the archived subtree holding task_id back into the store as
+        the last root task. Returns the restored root, or None if task_id is
+        not archived.
+        """
+        with self._archive_lock:
+            return self._restore_archived(task_id)
+
+    def _restore_archived(self, task_id: str) -> Optional[Task]:
+        root_id = self.archive.root_of(task_id)
+        if root_id is None:
+            return None
+        subtree = self.archive.subtree(root_id)
+        root = subtree[0]
+        with self.transaction():
+            with self._lock:
+                # Still here after a crash between archiving and deleting; keep the live copy
+                if root_id not in self.tasks:
+                    for task in subtree:
+                        self.tasks[task.id] = task
+                        self._mark_dirty(task)
+                    self.root_task_ids.append(root_id)
+                    self._edges.append((None, root_id, "end"))
+                    self.frontier.child_added(None, root_id)
+                    self.aggregates.subtree_added(root)
+                    self._notify("added", root_id, None)
+                else:
+                    root = self.tasks[root_id]
+        self.archive.mark_restored(root_id)
+        return root
@@ -0,0 +1,148 @@
+import json
+from typing import Callable, Dict, Iterable, Iterator, List, MutableMapping, Optional, Set, Tuple
+from .journal import TaskJournal
+from .task_model import Task
+
+# A change to a child list: (parent id or None for the roots, child id, where).
+# `where` is "end" or "front" when the child is placed there (added or moved),
+# None when it is removed.
+Edge = Tuple[Optional[str], str, Optional[str]]
+
+
+class StorageBackend:
+    """
+    Where StateManager keeps its tasks.
+
+    A backend hands out the task mapping and root ids on load, and persists
+    either full snapshots or, if `incremental` is set, just the tasks that
+    changed since the last write.
+    """
+    incremental = False
+
+    def load(self) -> Tuple[MutableMapping[str, Task], List[str]]:
+        raise NotImplementedError
+
+    def write_snapshot(self, data: dict) -> None:
+        """
+        Persists the whole store: {'tasks': [task rows], 'root_task_ids': [...]}
+        """
+        raise NotImplementedError
+
+    def write_changes(self, changes: Dict[str, Optional[tuple]], edges: List[Edge]) -> bool:
+        """
+        Persists changed tasks (id -> Task.to_row(), or None when deleted) and
+        the child list changes (Edge), in the order they happened. A parent
+        whose children changed is not in `changes` unless its own fields did,
+        so writing a child costs the same under a parent with any number of
+        children.
+        Returns True when the backend would like a full snapshot next, e.g. to
+        compact a log.
+        """
+        raise NotImplementedError
+
+    def open_children(self, parent_id: Optional[str]) -> Optional[List[str]]:
+        """
+        Ids of the PENDING/ACTIVE children of a parent (None for roots) as
+        stored on disk, or None if the backend can't answer this cheaply.
+        """
+        return None
+
+    def close(self) -> None:
+        pass
+
+
+class JsonStore(StorageBackend):
+    """
+    The classic data/tasks.json file, rewritten atomically on every write.
+    A log left behind by journaled mode is still replayed on load.
+    """
+
+    def __init__(self, data_file: str):
+        self.data_file = data_file
+        self.journal = TaskJournal(data_file)
+
+    def load(self) -> Tuple[MutableMapping[str, Task], List[str]]:
+        try:
+            tasks, root_ids = self.journal.load()
+            return tasks, list(root_ids)
+        except (json.JSONDecodeError, IOError, KeyError, ValueError):
+            return {}, []
+
+    def write_snapshot(self, data: dict) -> None:
+        self.journal.write_snapshot(data)
+
+
+class JournalStore(JsonStore):
+    """
+    tasks.json as a snapshot plus an fsync'd append-only log of changes.
+    The snapshot is only rewritten when the log passes `compact_every` records
+    or grows as large as the snapshot.
+    """
+    incremental = True
+
+    def __init__(self, data_file: str, compact_every: int = 1000):
+        super().__init__(data_file)
+        self.journal.compact_every = compact_every
+
+    def write_changes(self, changes: Dict[str, Optional[tuple]], edges: List[Edge]) -> bool:
+        self.journal.append_changes(changes, edges)
+        return self.journal.needs_compaction()
+
+
+class LazyTaskMap(MutableMapping):
+    """
+    Task mapping for backends that decode tasks on demand.
+
+    Tasks are fetched on first access and kept afterwards, so only the
+    working set ever lives in memory. Iterating touches every stored id,
+    which is fine for exports but should stay off the hot paths.
+    """
+
+    def __init__(self, fetch: Callable[[str], Optional[Task]], stored_ids: Callable[[], Iterable[str]]):
+        self._fetch = fetch
+        self._stored_ids = stored_ids
+        self._loaded: Dict[str, Task] = {}
+        self._deleted: Set[str] = set()
+
+    def __getitem__(self, task_id: str) -> Task:
+        task = self._loaded.get(task_id)
+        if task is not None:
+            return task
+        if task_id in self._deleted:
+            raise KeyError(task_id)
+        task = self._fetch(task_id)
+        if task is None:
+            raise KeyError(task_id)
+        self._loaded[task_id] = task
+        return task
+
+    def __setitem__(self, task_id: str, task: Task) -> None:
+        self._loaded[task_id] = task
+        self._deleted.discard(task_id)
+
+    def __delitem__(self, task_id: str) -> None:
+        self[task_id]  # raises KeyError if missing
+        del self._loaded[task_id]
+        self._deleted.add(task_id)
+
+    def __iter__(self) -> Iterator[str]:
+        yield from list(self._loaded)
+        for task_id in self._stored_ids():
+            if task_id not in self._loaded and task_id not in self._deleted:
+                yield task_id
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def peek(self, task_id: str) -> Optional[Task]:
+        """
+        The task without keeping it loaded, for one-off scans of the store.
+        """
+        task = self._loaded.get(task_id)
+        if task is not None or task_id in self._deleted:
+            return task
+        return self._fetch(task_id)
+
+    @property
+    def loaded_count(self) -> int:
+        return len(self._loaded)
@@ -0,0 +1,69 @@
+import os
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class StoreLockedError(RuntimeError):
+    """
+    Another process has the task store open.
+    """
+
+
+class StoreLock:
+    """
+    Exclusive, advisory lock that one process holds for as long as it has
+    the task store open, so a window and a state daemon (or two windows)
+    never write the same files behind each other's back.
+
+    The operating system drops the lock when the process exits, crashed
+    or not, so a stale lock file never blocks anyone.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def acquire(self) -> "StoreLock":
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        f = open(self.path, 'a+')
+        try:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            holder = self._holder()
+            f.close()
+            raise StoreLockedError(f"The task store is in use by another process{holder} "
+                                   f"(close it, or attach to the state daemon)")
+        # Who has it, for the message above
+        f.seek(0)
+        f.truncate()
+        f.write(str(os.getpid()))
+        f.flush()
+        self._file = f
+        return self
+
+    def _holder(self) -> str:
+        try:
+            with open(self.path) as f:
+                pid: Optional[str] = f.read().strip()
+        except OSError:
+            pid = None
+        return f" (pid {pid})" if pid else ""
+
+    def release(self):
+        if self._file is None:
+            return
+        if not fcntl:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        # Closing drops a flock
+        self._file.close()
+        self._file = None
@@ -0,0 +1,175 @@
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+from .task_model import Task, TaskStatus
+
+STATUS_INDEX = {status: i for i, status in enumerate(TaskStatus)}
+
+
+@dataclass(frozen=True)
+class SubtreeCounts:
+    """
+    Task counts by status for a task and all its descendants.
+    """
+    pending: int = 0
+    active: int = 0
+    completed: int = 0
+    skipped: int = 0
+
+    @property
+    def total(self) -> int:
+        return self.pending + self.active + self.completed + self.skipped
+
+    @property
+    def finished(self) -> int:
+        # Skipped tasks count as finished, like they do for the next task
+        return self.completed + self.skipped
+
+    @property
+    def percent_complete(self) -> float:
+        return 100.0 * self.finished / self.total if self.total else 100.0
+
+
+class SubtreeAggregates:
+    """
+    Per-subtree status counts, kept up to date with O(depth) work per change.
+
+    Counts for a task with children are computed the first time they are
+    read (one walk of its subtree, which also fills in every task with
+    children below it) and cached. After that every change adds a delta to
+    the cached counts along the changed task's ancestor path, so reads are
+    O(1). Leaves are never cached; their counts are just their own status.
+    None stands for the whole store (all root tasks).
+    """
+
+    def __init__(self, get_task: Callable[[str], Optional[Task]], root_ids: Callable[[], List[str]]):
+        self._get_task = get_task
+        self._root_ids = root_ids
+        # task id (or None) -> [pending, active, completed, skipped]
+        self._counts: Dict[Optional[str], List[int]] = {}
+
+    def reset(self):
+        self._counts.clear()
+
+    def counts(self, task_id: Optional[str]) -> SubtreeCounts:
+        return SubtreeCounts(*self._get(task_id))
+
+    def _get(self, task_id: Optional[str]) -> List[int]:
+        cached = self._counts.get(task_id)
+        if cached is not None:
+            return cached
+        if task_id is not None:
+            task = self._get_task(task_id)
+            if task is None:
+                return [0, 0, 0, 0]
+            if not task.children_ids:
+                return self._own(task)
+        self._build(task_id, self._counts)
+        return self._counts[task_id]
+
+    @staticmethod
+    def _own(task: Task) -> List[int]:
+        counts = [0, 0, 0, 0]
+        counts[STATUS_INDEX[task.status]] = 1
+        return counts
+
+    def _child_ids(self, task_id: Optional[str]):
+        if task_id is None:
+            return list(self._root_ids())
+        task = self._get_task(task_id)
+        return list(task.children_ids) if task else []
+
+    def _build(self, task_id: Optional[str], into: Dict[Optional[str], List[int]], reuse: bool = True):
+        """
+        Post-order walk with an explicit stack; stores counts for task_id and
+        every task with children below it. Cached subtrees are reused unless
+        reuse is False (as when verifying).
+        """
+        stack = [(task_id, False)]
+        while stack:
+            node_id, children_done = stack.pop()
+            if children_done:
+                task = self._get_task(node_id) if node_id is not None else None
+                total = self._own(task) if task else [0, 0, 0, 0]
+                for child_id in self._child_ids(node_id):
+                    child = into.get(child_id)
+                    if child is None:
+                        child_task = self._get_task(child_id)
+                        if child_task is None:
+                            continue
+                        child = self._own(child_task)
+                    for i in range(4):
+                        total[i] += child[i]
+                into[node_id] = total
+                continue
+            stack.append((node_id, True))
+            for child_id in self._child_ids(node_id):
+                if reuse and child_id in into:
+                    continue
+                child = self._get_task(child_id)
+                if child is not None and child.children_ids:
+                    stack.append((child_id, False))
+
+    def _apply(self, task_id: Optional[str], delta: List[int]):
+        """
+        Adds delta to task_id (if cached), each of its ancestors and the store total.
+        """
+        while True:
+            cached = self._counts.get(task_id)
+            if cached is not None:
+                for i in range(4):
+                    cached[i] += delta[i]
+            if task_id is None:
+                return
+            task = self._get_task(task_id)
+            task_id = task.parent_id if task else None
+
+    def added(self, task: Task):
+        # A new task is a leaf, so only its ancestors have counts to change
+        self._apply(task.parent_id, self._own(task))
+
+    def subtree_added(self, task: Task):
+        # A whole subtree at once, e.g. restored from the archive
+        self._apply(task.parent_id, list(self._get(task.id)))
+
+    def status_changed(self, task: Task, old_status: TaskStatus):
+        if old_status == task.status:
+            return
+        delta = [0, 0, 0, 0]
+        delta[STATUS_INDEX[old_status]] -= 1
+        delta[STATUS_INDEX[task.status]] += 1
+        self._apply(task.id, delta)
+
+    def removing(self, task: Task):
+        """
+        Called before the task's subtree is deleted, while it can still be walked.
+        """
+        delta = [-n for n in self._get(task.id)]
+        self._apply(task.parent_id, delta)
+
+    def removed(self, task_id: str):
+        self._counts.pop(task_id, None)
+
+    def verify(self) -> List[Optional[str]]:
+        """
+        Recomputes the counts from scratch and returns the ids whose cached
+        counts disagree (None for the store total). Empty means consistent.
+        """
+        fresh: Dict[Optional[str], List[int]] = {}
+        self._build(None, fresh, reuse=False)
+        mismatched = []
+        for task_id, cached in self._counts.items():
+            expected = fresh.get(task_id)
+            if expected is None:
+                # A leaf by now (or gone, which is a mismatch of its own)
+                task = self._get_task(task_id) if task_id is not None else None
+                expected = self._own(task) if task else None
+            if expected != cached:
+                mismatched.append(task_id)
+        return mismatched
+
+    def rebuild(self):
+        """
+        Replaces every cached count with a fresh walk of the whole store.
+        """
+        self._counts = {}
+        self._build(None, self._counts)
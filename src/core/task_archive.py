@@ -0,0 +1,193 @@
+import json
+import os
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from .task_model import Task
+
+# Layout: a sequence of records, each
+#   header   kind (u8), ids length (u32), payload length (u32)
+#   ids      zlib-compressed JSON list of the task ids in the record
+#   payload  zlib-compressed JSON list of Task.to_row() rows, root first
+# A "restored" record has the restored root as its only id and no payload.
+RECORD = struct.Struct("<BII")
+ARCHIVED = 1
+RESTORED = 2
+
+
+class TaskArchive:
+    """
+    Compressed, append-only cold storage for finished root subtrees.
+
+    Each archived subtree is one record: its ids and its rows, compressed
+    separately so that finding a task only inflates the small id lists.
+    Restoring appends a "restored" marker instead of rewriting the file.
+
+    Opening is free; the id index (task id -> record offset) is built from
+    the record headers and id lists on the first lookup. A few recently used
+    subtrees are kept decoded.
+
+    The archive is written before the hot store drops the subtree, so a
+    crash in between leaves the tasks in both places; the hot copy wins and
+    archiving it again simply appends a newer record.
+    """
+
+    def __init__(self, path: str, cached_subtrees: int = 8):
+        self.path = path
+        self._lock = threading.Lock()
+        # task id -> offset of the record holding it; built on first use
+        self._index: Optional[Dict[str, int]] = None
+        # root id -> (offset, ids of the record), in archive order
+        self._roots: Dict[str, Tuple[int, List[str]]] = {}
+        # record offset -> its root id
+        self._root_at: Dict[int, str] = {}
+        self._decoded: "OrderedDict[int, List[Task]]" = OrderedDict()
+        self._cached_subtrees = cached_subtrees
+
+    # Writing
+
+    def append(self, subtrees: List[List[tuple]]) -> None:
+        """
+        Archives subtrees, each given as its task rows with the root first.
+        All of them are written with a single fsync.
+        """
+        if not subtrees:
+            return
+        with self._lock:
+            self._append([(ARCHIVED, [row[0] for row in rows], rows) for rows in subtrees])
+
+    def mark_restored(self, root_id: str) -> None:
+        with self._lock:
+            self._append([(RESTORED, [root_id], None)])
+
+    def _append(self, records: List[Tuple[int, List[str], Optional[List[tuple]]]]) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, 'ab') as f:
+            offset = f.tell()
+            chunks = []
+            offsets = []
+            for kind, ids, rows in records:
+                ids_blob = zlib.compress(json.dumps(ids, separators=(",", ":")).encode())
+                payload = zlib.compress(json.dumps(rows, separators=(",", ":")).encode()) if rows else b""
+                chunks += [RECORD.pack(kind, len(ids_blob), len(payload)), ids_blob, payload]
+                offsets.append(offset)
+                offset += RECORD.size + len(ids_blob) + len(payload)
+            f.write(b"".join(chunks))
+            f.flush()
+            os.fsync(f.fileno())
+        if self._index is not None:
+            for (kind, ids, _), offset in zip(records, offsets):
+                self._index_record(kind, ids, offset)
+
+    # Reading
+
+    def _index_record(self, kind: int, ids: List[str], offset: int):
+        root_id = ids[0]
+        # An older record for the same root (archived again, or restored) is
+        # superseded; its ids are at hand, so no payload is inflated
+        old = self._roots.pop(root_id, None)
+        if old is not None:
+            old_offset, old_ids = old
+            del self._root_at[old_offset]
+            for task_id in old_ids:
+                if self._index.get(task_id) == old_offset:
+                    del self._index[task_id]
+        if kind == ARCHIVED:
+            for task_id in ids:
+                self._index[task_id] = offset
+            self._roots[root_id] = (offset, ids)
+            self._root_at[offset] = root_id
+
+    def _ensure_index(self):
+        if self._index is not None:
+            return
+        self._index = {}
+        self._roots = {}
+        self._root_at = {}
+        if not os.path.exists(self.path):
+            return
+        good_offset = 0
+        with open(self.path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            while good_offset + RECORD.size <= size:
+                kind, ids_length, payload_length = RECORD.unpack(f.read(RECORD.size))
+                end = good_offset + RECORD.size + ids_length + payload_length
+                if end > size:
+                    break
+                try:
+                    ids = json.loads(zlib.decompress(f.read(ids_length)))
+                except (zlib.error, ValueError):
+                    break
+                self._index_record(kind, ids, good_offset)
+                f.seek(end)
+                good_offset = end
+        if good_offset != size:
+            # A torn record from a crash mid-append; drop it like the journal does
+            with open(self.path, 'r+b') as f:
+                f.truncate(good_offset)
+                os.fsync(f.fileno())
+
+    def _read_subtree(self, offset: int) -> List[Task]:
+        tasks = self._decoded.get(offset)
+        if tasks is not None:
+            self._decoded.move_to_end(offset)
+            return tasks
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            kind, ids_length, payload_length = RECORD.unpack(f.read(RECORD.size))
+            f.seek(ids_length, os.SEEK_CUR)
+            rows = json.loads(zlib.decompress(f.read(payload_length)))
+        tasks = [Task.from_row(row) for row in rows]
+        self._decoded[offset] = tasks
+        if len(self._decoded) > self._cached_subtrees:
+            self._decoded.popitem(last=False)
+        return tasks
+
+    def get(self, task_id: str) -> Optional[Task]:
+        with self._lock:
+            self._ensure_index()
+            offset = self._index.get(task_id)
+            if offset is None:
+                return None
+            for task in self._read_subtree(offset):
+                if task.id == task_id:
+                    # A copy, so the decoded subtree stays as archived
+                    return Task.from_row(task.to_row())
+            return None
+
+    def __contains__(self, task_id: str) -> bool:
+        with self._lock:
+            self._ensure_index()
+            return task_id in self._index
+
+    def root_ids(self) -> List[str]:
+        """
+        Roots of the archived subtrees, oldest archived first.
+        """
+        with self._lock:
+            self._ensure_index()
+            return list(self._roots)
+
+    def root_of(self, task_id: str) -> Optional[str]:
+        with self._lock:
+            self._ensure_index()
+            offset = self._index.get(task_id)
+            return self._root_at[offset] if offset is not None else None
+
+    def subtree(self, root_id: str) -> List[Task]:
+        """
+        Fresh copies of an archived subtree's tasks, root first.
+        """
+        with self._lock:
+            self._ensure_index()
+            root = self._roots.get(root_id)
+            if root is None:
+                return []
+            return [Task.from_row(task.to_row()) for task in self._read_subtree(root[0])]
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._ensure_index()
+            return len(self._index)
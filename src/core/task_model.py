@@ -1,6 +1,7 @@
+import sys
 import uuid
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import Iterable, Optional, Sequence, Union
 from enum import Enum
 
 class TaskStatus(Enum):
@@ -9,36 +10,107 @@ class TaskStatus(Enum):
     COMPLETED = "completed"
     SKIPPED = "skipped"
 
-@dataclass
+_STATUS_BY_VALUE = {status.value: status for status in TaskStatus}
+
+class IdList(dict):
+    """
+    Ordered set of task ids with a list-like interface.
+
+    Backed by a plain dict (keys in insertion order, values unused), so
+    append, remove, membership and move_to_end are O(1) where a list would
+    be O(n). Iterating yields the ids in order.
+    """
+    __slots__ = ()
+
+    def __init__(self, ids: Iterable[str] = ()):
+        super().__init__(dict.fromkeys(ids))
+
+    def append(self, task_id: str):
+        self[task_id] = None
+
+    def remove(self, task_id: str):
+        try:
+            del self[task_id]
+        except KeyError:
+            raise ValueError(f"{task_id} not in IdList") from None
+
+    def discard(self, task_id: str):
+        self.pop(task_id, None)
+
+    def move_to_end(self, task_id: str):
+        del self[task_id]
+        self[task_id] = None
+
+    def move_to_front(self, task_id: str):
+        # dicts can't prepend, so this one is O(n)
+        rest = [other for other in self if other != task_id]
+        self.clear()
+        self[task_id] = None
+        self.update(dict.fromkeys(rest))
+
+    def __repr__(self):
+        return f"IdList({list(self)!r})"
+
+# Field order of the compact row encoding, see Task.to_row
+ROW_FIELDS = ("id", "title", "description", "status", "parent_id", "is_reward", "children_ids")
+
+@dataclass(slots=True)
 class Task:
     title: str
     description: str = ""
     id: str = field(default_factory=lambda: str(uuid.uuid4()))
     status: TaskStatus = TaskStatus.PENDING
-    children_ids: List[str] = field(default_factory=list)
+    children_ids: IdList = field(default_factory=IdList)
     parent_id: Optional[str] = None
     is_reward: bool = False
-    
+
     def to_dict(self):
         return {
             "id": self.id,
             "title": self.title,
             "description": self.description,
             "status": self.status.value,
-            "children_ids": self.children_ids,
+            "children_ids": list(self.children_ids),
             "parent_id": self.parent_id,
             "is_reward": self.is_reward
         }
 
     @classmethod
     def from_dict(cls, data):
+        intern = sys.intern
+        parent_id = data.get("parent_id")
         task = cls(
-            id=data["id"],
+            id=intern(data["id"]),
             title=data["title"],
             description=data.get("description", ""),
-            status=TaskStatus(data["status"]),
-            children_ids=data.get("children_ids", []),
-            parent_id=data.get("parent_id"),
+            status=_STATUS_BY_VALUE[data["status"]],
+            children_ids=IdList(map(intern, data.get("children_ids", []))),
+            parent_id=intern(parent_id) if parent_id else None,
             is_reward=data.get("is_reward", False)
         )
         return task
+
+    def to_row(self) -> tuple:
+        """
+        Compact encoding used by snapshots and the journal, in ROW_FIELDS order.
+        Cheaper to build and to serialize than to_dict.
+        """
+        return (self.id, self.title, self.description, self.status.value,
+                self.parent_id, self.is_reward, list(self.children_ids))
+
+    @classmethod
+    def from_row(cls, row: Sequence):
+        # Ids are interned so children_ids and parent_id share one string per id
+        intern = sys.intern
+        task_id, title, description, status, parent_id, is_reward, children_ids = row
+        return cls(title, description, intern(task_id), _STATUS_BY_VALUE[status],
+                   IdList(map(intern, children_ids)), intern(parent_id) if parent_id else None, is_reward)
+
+    @classmethod
+    def decode(cls, data: Union[dict, Sequence]):
+        """
+        Accepts either encoding, so stores written before rows existed still load.
+        """
+        if isinstance(data, dict):
+            return cls.from_dict(data)
+        return cls.from_row(data)
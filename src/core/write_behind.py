@@ -0,0 +1,43 @@
+import threading
+from typing import Callable
+
+
+class WriteBehindFlusher(threading.Thread):
+    """
+    Background thread that calls `flush` at most once per `delay` seconds
+    after changes have been scheduled, so callers never block on disk.
+    Everything scheduled during the delay window goes out in one flush.
+    """
+
+    def __init__(self, flush: Callable[[], None], delay: float = 0.5):
+        super().__init__(name="state-write-behind", daemon=True)
+        self.flush = flush
+        self.delay = delay
+        self._pending = threading.Event()
+        self._stopping = threading.Event()
+
+    def schedule(self):
+        self._pending.set()
+
+    def stop(self):
+        """
+        Stops the thread after a final flush of anything still scheduled.
+        """
+        self._stopping.set()
+        self._pending.set()
+        if self.is_alive():
+            self.join()
+
+    def run(self):
+        while True:
+            self._pending.wait()
+            if not self._stopping.is_set():
+                # Let more changes pile up before touching the disk.
+                self._stopping.wait(self.delay)
+            self._pending.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Write-behind flush failed: {e}")
+            if self._stopping.is_set():
+                return
@@ -1,55 +1,140 @@
+import threading
 import tkinter as tk
 from tkinter import ttk, messagebox
+from src.core.config_service import get_config
 from src.core.state_manager import StateManager
+from src.core.state_client import DEFAULT_SOCKET, DaemonGoneError, StateClient
+from src.core.store_lock import StoreLockedError
 from src.core.llm_service import LLMService
+from src.core.llm_executor import LLMExecutor
+from src.core.prefetcher import BreakdownPrefetcher
 from src.core.localization_service import LocalizationService
+from src.core.metrics import metrics
+from src.ui.view_manager import ViewManager
 from src.ui.views.focus_view import FocusView
 from src.ui.views.reward_view import RewardView
-# from src.ui.views.tree_view import TreeView # TODO
+from src.ui.views.tree_view import TreeView
 
 class FrontalLobeApp:
     def __init__(self, root):
         self.root = root
-        self.state_manager = StateManager()
-        self.llm_service = LLMService()
         
-        # Load language from config (using LLMService's config loader or separate?)
-        # For simplicity, let's peek at the config via LLMService or just load it again.
-        # Ideally StateManager or a ConfigManager should handle this.
-        # Let's just default to 'en' and check if we can get it from LLMService which loads config.
-        # Actually LLMService loads config internally. Let's make a quick helper or just re-read.
-        # Re-reading is safe enough for now.
-        import json
-        import os
-        config_path = "config.json"
-        language = "en"
-        if os.path.exists(config_path):
+        # Parsed once and shared with LLMService
+        config = get_config()
+        language = config.get("language", "en")
+        prefetch = config.get("prefetch_breakdowns", 3)
+        self.archive_keep = config.get("archive_keep_finished")
+        self.loc = LocalizationService(language)
+        
+        # With a state daemon running (python main.py --serve), share its
+        # in-memory state instead of loading the store in this process
+        self.state_manager = StateClient.connect(config.get("state_socket", DEFAULT_SOCKET))
+        if self.state_manager is None:
             try:
-                with open(config_path, 'r') as f:
-                    config = json.load(f)
-                    language = config.get("language", "en")
-            except:
-                pass
+                self.state_manager = StateManager.from_config(config)
+            except StoreLockedError as e:
+                # Another window or a daemon that is not answering has the store; never write it from two places
+                messagebox.showerror("Error", f"{self.loc.get('store_locked')}\n\n{e}")
+                root.destroy()
+                raise SystemExit(1)
+        self._daemon_gone_reported = False
+        # Tk calls this for exceptions escaping callbacks
+        self._report_callback_error = root.report_callback_exception
+        root.report_callback_exception = self._on_callback_error
+        self.llm_service = LLMService()
+        self.llm_executor = LLMExecutor()
+        # Only worth it with a real model behind the service
+        self.prefetcher = None
+        if prefetch and self.llm_service.available:
+            self.prefetcher = BreakdownPrefetcher(self.state_manager, self.llm_service, lookahead=prefetch)
         
-        self.loc = LocalizationService(language)
+        self._register_gauges()
 
         self.main_container = ttk.Frame(root)
         self.main_container.pack(fill=tk.BOTH, expand=True)
         
-        self.current_view = None
+        # Views are built once and reused across transitions
+        self.views = ViewManager(self.main_container)
+        self.views.register("focus", lambda parent: FocusView(parent, self))
+        self.views.register("reward", lambda parent: RewardView(parent, self))
+        self.views.register("tree", lambda parent: TreeView(parent, self))
         self.show_focus_view()
 
+        root.protocol("WM_DELETE_WINDOW", self._on_close)
+        self._poll_llm_results()
+        # The SDK import and client setup happen after the first frame, off the Tk thread
+        root.after_idle(self._warm_up_llm)
+        if self.archive_keep is not None:
+            # Moving old finished projects out keeps later loads and saves small
+            root.after_idle(self._archive_finished)
+
+    def _warm_up_llm(self):
+        if self.llm_service.available:
+            threading.Thread(target=self.llm_service.warm_up, name="llm-warm-up", daemon=True).start()
+
+    def _archive_finished(self):
+        try:
+            self.state_manager.archive_finished(keep=self.archive_keep)
+        except Exception as e:
+            print(f"Archive Error: {e}")
+
+    def _register_gauges(self):
+        # Read when metrics are exported; no cost otherwise
+        active = metrics()
+        llm = self.llm_service
+        if llm.cache:
+            active.register_gauge("llm.cache.hit_rate", lambda: llm.cache.hit_rate)
+        if self.prefetcher:
+            active.register_gauge("prefetch.hit_rate", lambda: self.prefetcher.hit_rate)
+        active.register_gauge("llm.hedges", lambda: llm.resilience.hedges)
+        active.register_gauge("llm.hedge_wins", lambda: llm.resilience.hedge_wins)
+        active.register_gauge("llm.breaker_state", lambda: llm.resilience.breaker.state)
+        active.register_gauge("llm.time_to_first_step_avg_s",
+                              lambda: sum(llm.time_to_first_step) / len(llm.time_to_first_step)
+                              if llm.time_to_first_step else None)
+        active.register_gauge("state.tasks", lambda: self.state_manager.get_subtree_counts().total)
+
+    def _poll_llm_results(self):
+        # LLM results reach the Tk thread only through this queue
+        self.llm_executor.poll()
+        if isinstance(self.state_manager, StateClient):
+            # So do the daemon's change notifications
+            self.state_manager.poll()
+            if not self.state_manager.connected:
+                self._report_daemon_gone()
+        self.root.after(50, self._poll_llm_results)
+
+    def _on_callback_error(self, exc_type, exc, tb):
+        if isinstance(exc, DaemonGoneError):
+            self._report_daemon_gone()
+            return
+        self._report_callback_error(exc_type, exc, tb)
+
+    def _report_daemon_gone(self):
+        # Every later action fails the same way; say so once
+        if self._daemon_gone_reported:
+            return
+        self._daemon_gone_reported = True
+        messagebox.showerror("Error", self.loc.get("daemon_gone"))
+
+    def _on_close(self):
+        if self.prefetcher:
+            self.prefetcher.shutdown()
+        self.llm_executor.shutdown()
+        self.llm_service.resilience.shutdown()
+        # Make sure write-behind changes reach the disk before we exit
+        self.state_manager.close()
+        self.root.destroy()
+
+    @property
+    def current_view(self):
+        return self.views.current
+
     def show_focus_view(self):
-        self._clear_view()
-        self.current_view = FocusView(self.main_container, self)
-        self.current_view.pack(fill=tk.BOTH, expand=True)
+        self.views.show("focus")
 
     def show_reward_view(self):
-        self._clear_view()
-        self.current_view = RewardView(self.main_container, self)
-        self.current_view.pack(fill=tk.BOTH, expand=True)
-
-    def _clear_view(self):
-        if self.current_view:
-            self.current_view.destroy()
-            self.current_view = None
+        self.views.show("reward")
+
+    def show_tree_view(self):
+        self.views.show("tree")
@@ -21,3 +21,6 @@ def apply_styles(root):
     # Custom classes
     style.configure("Title.TLabel", font=("Helvetica", 24, "bold"), foreground=accent_color)
     style.configure("Reward.TLabel", font=("Helvetica", 18, "italic"), foreground="#A3BE8C")
+    style.configure("Treeview", background=button_bg, fieldbackground=bg_color, foreground=fg_color, rowheight=24)
+    style.configure("Treeview.Heading", background=bg_color, foreground=accent_color)
+    style.map("Treeview", background=[('selected', accent_color)], foreground=[('selected', bg_color)])
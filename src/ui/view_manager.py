@@ -0,0 +1,79 @@
+import time
+import tkinter as tk
+from typing import Callable, Dict, List
+from src.core.metrics import metrics
+
+
+class ViewManager:
+    """
+    Builds each view once and switches between them by packing and
+    unpacking, so a transition only costs the view's refresh() (new label
+    texts, button states) instead of destroying and recreating widgets.
+
+    Views are registered as factories and created on first show. A view
+    may define refresh(), called every time it is shown.
+
+    Each transition is timed twice: "refresh" is the synchronous part on the
+    Tk thread, "frame" lasts until Tk is idle again, i.e. until the new
+    state has been drawn. Both go to metrics as ui.transition.<name>.* and
+    to every listener added with on_transition.
+    """
+
+    def __init__(self, container):
+        self.container = container
+        self.current = None
+        self.current_name = None
+        self._factories: Dict[str, Callable] = {}
+        self._views: Dict[str, tk.Widget] = {}
+        self._listeners: List[Callable[[str, float, float], None]] = []
+
+    def register(self, name: str, factory: Callable):
+        """
+        factory(container) -> view; called on the first show(name).
+        """
+        self._factories[name] = factory
+
+    def on_transition(self, listener: Callable[[str, float, float], None]):
+        """
+        listener(name, refresh_ms, frame_ms) runs after every transition.
+        """
+        self._listeners.append(listener)
+
+    def get(self, name: str):
+        view = self._views.get(name)
+        if view is None:
+            view = self._views[name] = self._factories[name](self.container)
+        return view
+
+    def show(self, name: str):
+        start = time.perf_counter()
+        view = self.get(name)
+        if view is not self.current:
+            if self.current is not None:
+                self.current.pack_forget()
+            view.pack(fill=tk.BOTH, expand=True)
+            self.current, self.current_name = view, name
+        refresh = getattr(view, "refresh", None)
+        if refresh:
+            refresh()
+        refreshed = time.perf_counter()
+        # Idle callbacks run after Tk's own redraw, which is also an idle callback
+        self.container.after_idle(self._transition_done, name, start, refreshed)
+        return view
+
+    def _transition_done(self, name: str, start: float, refreshed: float):
+        refresh_ms = (refreshed - start) * 1000
+        frame_ms = (time.perf_counter() - start) * 1000
+        metrics().observe(f"ui.transition.{name}.refresh", refresh_ms)
+        metrics().observe(f"ui.transition.{name}.frame", frame_ms)
+        for listener in self._listeners:
+            try:
+                listener(name, refresh_ms, frame_ms)
+            except Exception as e:
+                print(f"Transition listener Error: {e}")
+
+    def destroy(self):
+        for view in self._views.values():
+            view.destroy()
+        self._views.clear()
+        self.current = self.current_name = None
@@ -1,14 +1,21 @@
 import tkinter as tk
-import threading
 from tkinter import ttk, simpledialog
+from src.core.metrics import timed
+from src.core.prompt_builder import TaskContext
 from src.core.task_model import TaskStatus
 
 class FocusView(ttk.Frame):
+    """
+    Built once and reused: refresh() moves it to the next actionable task by
+    changing label texts and which frame is packed.
+    """
+
+    @timed("ui.focus_view.build")
     def __init__(self, parent, app):
         super().__init__(parent)
         self.app = app
-        self.task = self.app.state_manager.get_next_actionable_task()
-        
+        self.task = None
+        self._streamed_steps = []
         self._setup_ui()
 
     def _setup_ui(self):
@@ -19,22 +26,59 @@ class FocusView(ttk.Frame):
         container = ttk.Frame(self)
         container.grid(row=0, column=0)
         
-        if not self.task:
-            ttk.Label(container, text=self.app.loc.get("no_tasks"), font=("Helvetica", 16)).pack(pady=20)
-            ttk.Button(container, text=self.app.loc.get("add_task"), command=self._add_task).pack(pady=10)
+        self.empty_frame = ttk.Frame(container)
+        ttk.Label(self.empty_frame, text=self.app.loc.get("no_tasks"), font=("Helvetica", 16)).pack(pady=20)
+        ttk.Button(self.empty_frame, text=self.app.loc.get("add_task"), command=self._add_task).pack(pady=10)
+
+        self.task_frame = ttk.Frame(container)
+        self.title_label = ttk.Label(self.task_frame, font=("Helvetica", 24, "bold"), wraplength=600)
+        self.title_label.pack(pady=20)
+        self.description_label = ttk.Label(self.task_frame, font=("Helvetica", 12), wraplength=600)
+
+        self.button_frame = ttk.Frame(self.task_frame)
+        self.button_frame.pack(pady=30)
+        self.buttons = [
+            ttk.Button(self.button_frame, text=self.app.loc.get("done"), command=self._mark_done),
+            ttk.Button(self.button_frame, text=self.app.loc.get("blocked"), command=self._cant_do),
+            ttk.Button(self.button_frame, text=self.app.loc.get("break_down"), command=self._break_down),
+            ttk.Button(self.button_frame, text=self.app.loc.get("skip"), command=self._skip),
+        ]
+        for button in self.buttons:
+            button.pack(side=tk.LEFT, padx=10)
+        
+        ttk.Button(self.task_frame, text=self.app.loc.get("add_new_task"), command=self._add_task).pack(pady=20)
+        # Below both frames, so it is there with or without tasks
+        ttk.Button(container, text=self.app.loc.get("all_tasks"), command=self.app.show_tree_view).pack(
+            side=tk.BOTTOM, pady=10)
+
+        # Placed over the view while a request runs
+        self.loading_label = ttk.Label(self, font=("Helvetica", 14, "italic"))
+
+    @timed("ui.focus_view.refresh")
+    def refresh(self):
+        task = self.app.state_manager.get_next_actionable_task()
+        if self.task is None or task is None or task.id != self.task.id:
+            # Results for the previous task have nowhere to go
+            self.app.llm_executor.cancel_owner(self)
+            self._set_loading_state(False)
+        self.task = task
+
+        if not task:
+            self.task_frame.pack_forget()
+            self.empty_frame.pack()
         else:
-            ttk.Label(container, text=self.task.title, font=("Helvetica", 24, "bold"), wraplength=600).pack(pady=20)
-            if self.task.description:
-                ttk.Label(container, text=self.task.description, font=("Helvetica", 12), wraplength=600).pack(pady=10)
-            
-            btn_frame = ttk.Frame(container)
-            btn_frame.pack(pady=30)
-            
-            ttk.Button(btn_frame, text=self.app.loc.get("done"), command=self._mark_done).pack(side=tk.LEFT, padx=10)
-            ttk.Button(btn_frame, text=self.app.loc.get("blocked"), command=self._cant_do).pack(side=tk.LEFT, padx=10)
-            ttk.Button(btn_frame, text=self.app.loc.get("skip"), command=self._skip).pack(side=tk.LEFT, padx=10)
-            
-            ttk.Button(container, text=self.app.loc.get("add_new_task"), command=self._add_task).pack(pady=20)
+            self.empty_frame.pack_forget()
+            self.title_label.config(text=task.title)
+            if task.description:
+                self.description_label.config(text=task.description)
+                self.description_label.pack(pady=10, before=self.button_frame)
+            else:
+                self.description_label.pack_forget()
+            self.task_frame.pack()
+
+        if self.app.prefetcher:
+            # Have breakdowns ready for this and the next few tasks
+            self.app.prefetcher.schedule()
 
     def _mark_done(self):
         if self.task:
@@ -52,22 +96,69 @@ class FocusView(ttk.Frame):
 
         self._set_loading_state(True)
         
-        # Run in background thread
-        thread = threading.Thread(target=self._resolve_block_async, args=(self.task.title, reason))
-        thread.daemon = True
-        thread.start()
+        # Runs on the shared LLM loop; the result comes back on the Tk thread
+        # through the app's poll, and is dropped if the task changed by then.
+        llm = self.app.llm_service
+        task_id, title, language = self.task.id, self.task.title, self.app.loc.language
+        context = TaskContext.for_task(self.app.state_manager, self.task)
+        key = llm.resolve_block_key(title, reason, language, context)
+        if llm.streaming:
+            # Steps show up one by one while the model is still writing
+            self.app.llm_executor.submit(
+                key,
+                lambda report: llm.astream_resolve_block(title, reason, language=language, on_step=report,
+                                                         context=context),
+                lambda result: self._handle_block_result(result, task_id),
+                owner=self,
+                on_progress=self._show_step)
+        else:
+            self.app.llm_executor.submit(
+                key,
+                lambda: llm.aresolve_block(title, reason, language=language, context=context),
+                lambda result: self._handle_block_result(result, task_id),
+                owner=self)
 
-    def _resolve_block_async(self, task_title, reason):
-        subtasks = self.app.llm_service.resolve_block(task_title, reason, language=self.app.loc.language)
-        # Schedule update on main thread
-        self.after(0, self._handle_block_result, subtasks)
+    def _break_down(self):
+        if not self.task:
+            return
+
+        # Usually prefetched while the user was looking at the task
+        subtasks = self.app.prefetcher.get(self.task) if self.app.prefetcher else None
+        if subtasks:
+            self.app.prefetcher.invalidate(self.task.id)
+            self._handle_block_result(subtasks, self.task.id)
+            return
+
+        self._set_loading_state(True)
+        llm = self.app.llm_service
+        task_id, title, description = self.task.id, self.task.title, self.task.description
+        context = TaskContext.for_task(self.app.state_manager, self.task)
+        self.app.llm_executor.submit(
+            llm.break_down_key(title, description, context),
+            lambda: llm.abreak_down_task(title, description, context=context),
+            lambda result: self._handle_block_result(result, task_id),
+            owner=self)
 
-    def _handle_block_result(self, subtasks):
+    def _show_step(self, step):
+        self._streamed_steps.append(step["title"])
+        lines = [self.app.loc.get("thinking")]
+        lines += [f"{i}. {title}" for i, title in enumerate(self._streamed_steps, 1)]
+        self.loading_label.config(text="\n".join(lines))
+
+    def destroy(self):
+        self.app.llm_executor.cancel_owner(self)
+        super().destroy()
+
+    def _handle_block_result(self, subtasks, task_id):
+        if not self.task or self.task.id != task_id:
+            return
         self._set_loading_state(False)
         
+        if isinstance(subtasks, Exception):
+            print(f"LLM Error: {subtasks}")
+            subtasks = []
         if subtasks:
-            for st in subtasks:
-                self.app.state_manager.add_task(st["title"], st.get("description", ""), parent_id=self.task.id)
+            self.app.state_manager.add_tasks(subtasks, parent_id=task_id)
             
             # Refresh view
             self.app.show_focus_view()
@@ -75,34 +166,18 @@ class FocusView(ttk.Frame):
             tk.messagebox.showerror("Error", self.app.loc.get("error_resolve"))
 
     def _set_loading_state(self, is_loading):
-        # Find the button frame to disable buttons
-        # In this simple implementation, we might just show a modal or overlay
-        # But let's just use a simple label injection for now as per plan
-        
-        # We need to access the container. In _setup_ui, container is a local var.
-        # Let's make it an instance var or find it.
-        # Actually, let's just rebuild the UI or use a busy cursor for simplicity + a label?
-        # The plan said "disable buttons, show Thinking... label".
-        
-        # Let's assume we can find the children.
-        # A cleaner way for this codebase is to clear the view and show a loading screen, 
-        # or just modify the current view.
-        
+        # No forced redraw: Tk paints the change as soon as this handler returns
+        state = ["disabled"] if is_loading else ["!disabled"]
+        for button in self.buttons:
+            button.state(state)
         if is_loading:
             self.config(cursor="watch")
-            # Create a loading toplevel or just a label if we can find where to put it.
-            # Since we don't have easy access to the container from here without refactoring _setup_ui,
-            # let's just change the cursor and maybe show a message box that is non-blocking? 
-            # No, message box is blocking.
-            # Let's add a loading label to the bottom of self if it doesn't exist.
-            
-            self.loading_label = ttk.Label(self, text=self.app.loc.get("thinking"), font=("Helvetica", 14, "italic"))
+            self._streamed_steps = []
+            self.loading_label.config(text=self.app.loc.get("thinking"))
             self.loading_label.place(relx=0.5, rely=0.9, anchor=tk.CENTER)
-            self.update() # Force update
         else:
             self.config(cursor="")
-            if hasattr(self, 'loading_label'):
-                self.loading_label.destroy()
+            self.loading_label.place_forget()
 
     def _skip(self):
         if self.task:
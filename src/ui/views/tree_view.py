@@ -0,0 +1,268 @@
+import tkinter as tk
+from itertools import islice
+from tkinter import ttk
+from typing import List, Optional, Tuple
+from src.core.metrics import timed
+from src.core.state_manager import OPEN_STATUSES
+from src.core.task_model import Task
+
+# Children are inserted this many at a time, behind a "show more" row
+CHUNK_SIZE = 200
+# Search runs once typing pauses for this long
+SEARCH_DELAY_MS = 150
+SEARCH_RESULTS = 50
+# How often a search waiting for the index to load is retried
+INDEX_POLL_MS = 250
+
+STUB = "#stub"
+MORE = "#more"
+
+
+class TreeView(ttk.Frame):
+    """
+    The whole task hierarchy, built lazily so it opens instantly on any store size.
+
+    Only expanded nodes have items: a collapsed node with children holds a
+    single placeholder, replaced by its children when it is opened. Children
+    are inserted CHUNK_SIZE at a time; the rest sit behind a "show more" row.
+    The items under a node are therefore always a prefix of its children_ids,
+    which is what the next chunk and the targeted updates rely on.
+
+    Changes arrive through StateManager.add_listener and are applied to the
+    affected items only, batched once per idle pass.
+
+    Typing in the search box swaps the tree for a flat list of matches.
+    """
+
+    @timed("ui.tree_view.build")
+    def __init__(self, parent, app):
+        super().__init__(parent)
+        self.app = app
+        self._changes: List[Tuple[str, str, Optional[str]]] = []
+        self._apply_scheduled = False
+        self._search_job = None
+        self._setup_ui()
+        self._load_chunk("")
+        self.app.state_manager.add_listener(self._on_state_change)
+
+    def _setup_ui(self):
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=1)
+
+        search_bar = ttk.Frame(self)
+        search_bar.grid(row=0, column=0, columnspan=2, sticky="ew", pady=(0, 5))
+        search_bar.grid_columnconfigure(0, weight=1)
+        self.query = tk.StringVar()
+        self.query.trace_add("write", lambda *args: self._schedule_search())
+        ttk.Entry(search_bar, textvariable=self.query).grid(row=0, column=0, sticky="ew", padx=(0, 10))
+        self.open_only = tk.BooleanVar(value=False)
+        ttk.Checkbutton(search_bar, text=self.app.loc.get("open_only"), variable=self.open_only,
+                        command=self._schedule_search).grid(row=0, column=1)
+
+        self.tree = self._make_tree()
+        self.tree.grid(row=1, column=0, sticky="nsew")
+        self.results = self._make_tree()
+
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.tree.yview)
+        self.scrollbar.grid(row=1, column=1, sticky="ns")
+        self.tree.configure(yscrollcommand=self.scrollbar.set)
+        self.results.configure(yscrollcommand=self.scrollbar.set)
+
+        ttk.Button(self, text=self.app.loc.get("back"), command=self.app.show_focus_view).grid(
+            row=2, column=0, columnspan=2, pady=10)
+
+        self.tree.bind("<<TreeviewOpen>>", self._on_open)
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
+
+    def _make_tree(self) -> ttk.Treeview:
+        tree = ttk.Treeview(self, columns=("status",), selectmode="browse")
+        tree.heading("#0", text=self.app.loc.get("task"))
+        tree.heading("status", text=self.app.loc.get("status"))
+        tree.column("status", width=120, stretch=False)
+        tree.tag_configure("completed", foreground="#A3BE8C")
+        tree.tag_configure("skipped", foreground="#4C566A")
+        tree.tag_configure("more", foreground="#88C0D0")
+        return tree
+
+    def destroy(self):
+        self.app.state_manager.remove_listener(self._on_state_change)
+        super().destroy()
+
+    # Loading
+
+    def _children_ids(self, parent_key: str):
+        if not parent_key:
+            return self.app.state_manager.root_task_ids
+        task = self.app.state_manager.get_task(parent_key)
+        return task.children_ids if task else ()
+
+    def _loaded_count(self, parent_key: str) -> int:
+        children = self.tree.get_children(parent_key)
+        return len(children) - (1 if children and children[-1] == parent_key + MORE else 0)
+
+    def _insert(self, parent_key: str, task: Optional[Task], index="end"):
+        if task is None:
+            return
+        self.tree.insert(parent_key, index, iid=task.id, text=task.title,
+                         values=(self.app.loc.get(task.status.value),), tags=(task.status.value,))
+        if task.children_ids:
+            self.tree.insert(task.id, "end", iid=task.id + STUB)
+
+    @timed("ui.tree_view.load_chunk")
+    def _load_chunk(self, parent_key: str):
+        """
+        Inserts the next CHUNK_SIZE children of parent_key ("" for the roots).
+        """
+        children_ids = self._children_ids(parent_key)
+        more_iid = parent_key + MORE
+        if self.tree.exists(more_iid):
+            self.tree.delete(more_iid)
+        start = self._loaded_count(parent_key)
+        # One request for the whole chunk; with a daemon each call is a round trip
+        chunk = [task_id for task_id in islice(children_ids, start, start + CHUNK_SIZE)
+                 if not self.tree.exists(task_id)]
+        for task in self.app.state_manager.get_tasks(chunk):
+            self._insert(parent_key, task)
+        self._update_more(parent_key, children_ids)
+
+    def _update_more(self, parent_key: str, children_ids=None):
+        more_iid = parent_key + MORE
+        if children_ids is None:
+            children_ids = self._children_ids(parent_key)
+        remaining = len(children_ids) - self._loaded_count(parent_key)
+        if remaining <= 0:
+            if self.tree.exists(more_iid):
+                self.tree.delete(more_iid)
+            return
+        text = self.app.loc.get("show_more").format(count=remaining)
+        if self.tree.exists(more_iid):
+            self.tree.item(more_iid, text=text)
+        else:
+            self.tree.insert(parent_key, "end", iid=more_iid, text=text, tags=("more",))
+
+    def _is_loaded(self, parent_key: str) -> bool:
+        if not parent_key:
+            return True
+        if not self.tree.exists(parent_key):
+            return False
+        children = self.tree.get_children(parent_key)
+        return not (children and children[0] == parent_key + STUB)
+
+    def _on_open(self, event):
+        task_id = self.tree.focus()
+        if self.tree.exists(task_id + STUB):
+            self.tree.delete(task_id + STUB)
+            self._load_chunk(task_id)
+
+    def _on_select(self, event):
+        for iid in self.tree.selection():
+            if iid.endswith(MORE):
+                self.tree.selection_remove(iid)
+                self._load_chunk(iid[:-len(MORE)])
+
+    # Search
+
+    def _schedule_search(self):
+        if self._search_job:
+            self.after_cancel(self._search_job)
+        self._search_job = self.after(SEARCH_DELAY_MS, self._run_search)
+
+    @timed("ui.tree_view.search")
+    def _run_search(self):
+        self._search_job = None
+        query = self.query.get()
+        if not query.strip():
+            self._show_widget(self.tree)
+            return
+        self.results.delete(*self.results.get_children())
+        self._show_widget(self.results)
+        if not self.app.state_manager.search_ready():
+            # The index loads in the background on first use; ask again shortly
+            self.results.insert("", "end", text=self.app.loc.get("indexing"), tags=("more",))
+            self._search_job = self.after(INDEX_POLL_MS, self._run_search)
+            return
+        statuses = OPEN_STATUSES if self.open_only.get() else None
+        tasks = self.app.state_manager.search(query, statuses=statuses, limit=SEARCH_RESULTS)
+        for task in tasks:
+            self.results.insert("", "end", text=task.title, values=(self.app.loc.get(task.status.value),),
+                                tags=(task.status.value,))
+
+    def _show_widget(self, widget: ttk.Treeview):
+        other = self.results if widget is self.tree else self.tree
+        other.grid_remove()
+        widget.grid(row=1, column=0, sticky="nsew")
+        self.scrollbar.configure(command=widget.yview)
+
+    # Targeted updates
+
+    def _on_state_change(self, event: str, task_id: str, parent_id: Optional[str]):
+        self._changes.append((event, task_id, parent_id))
+        if not self._apply_scheduled:
+            self._apply_scheduled = True
+            self.after_idle(self._apply_changes)
+
+    @timed("ui.tree_view.apply_changes")
+    def _apply_changes(self):
+        changes, self._changes = self._changes, []
+        self._apply_scheduled = False
+        for event, task_id, parent_id in changes:
+            parent_key = parent_id or ""
+            if event == "updated":
+                self._update_item(task_id)
+            elif event == "added":
+                self._child_added(parent_key, task_id)
+            elif event == "deleted":
+                if self.tree.exists(task_id):
+                    self.tree.delete(task_id)
+                if self._is_loaded(parent_key):
+                    self._update_more(parent_key)
+                self._parent_changed(parent_key)
+            elif event in ("moved_front", "moved_end"):
+                self._child_moved(parent_key, task_id, event == "moved_front")
+
+    def _update_item(self, task_id: str):
+        task = self.app.state_manager.get_task(task_id)
+        if task is None or not self.tree.exists(task_id):
+            return
+        self.tree.item(task_id, text=task.title, values=(self.app.loc.get(task.status.value),),
+                       tags=(task.status.value,))
+
+    def _child_added(self, parent_key: str, task_id: str):
+        if not self._is_loaded(parent_key):
+            self._parent_changed(parent_key)
+            return
+        if self.tree.exists(parent_key + MORE):
+            # Appended after the loaded prefix; counted in "show more"
+            self._update_more(parent_key)
+        elif not self.tree.exists(task_id):
+            self._insert(parent_key, self.app.state_manager.get_task(task_id))
+
+    def _child_moved(self, parent_key: str, task_id: str, to_front: bool):
+        if not self._is_loaded(parent_key):
+            return
+        if to_front:
+            if self.tree.exists(task_id):
+                self.tree.move(task_id, parent_key, 0)
+            else:
+                self._insert(parent_key, self.app.state_manager.get_task(task_id), 0)
+        elif self.tree.exists(parent_key + MORE):
+            # Moved past the loaded prefix
+            if self.tree.exists(task_id):
+                self.tree.delete(task_id)
+            self._update_more(parent_key)
+        elif self.tree.exists(task_id):
+            self.tree.move(task_id, parent_key, "end")
+
+    def _parent_changed(self, parent_key: str):
+        """
+        Keeps a collapsed parent's expand arrow in line with whether it has children.
+        """
+        if not parent_key or not self.tree.exists(parent_key):
+            return
+        task = self.app.state_manager.get_task(parent_key)
+        has_children = bool(task and task.children_ids)
+        if self.tree.exists(parent_key + STUB):
+            if not has_children:
+                self.tree.delete(parent_key + STUB)
+        elif has_children and not self.tree.get_children(parent_key):
+            self.tree.insert(parent_key, "end", iid=parent_key + STUB)
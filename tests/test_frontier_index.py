@@ -0,0 +1,69 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+from src.core.state_manager import OPEN_STATUSES, StateManager
+from src.core.task_model import TaskStatus
+
+
+def upcoming_by_scan(manager: StateManager):
+    """
+    Open tasks in DFS post-order, the order get_upcoming_tasks promises.
+    """
+    order = []
+
+    def walk(task_ids):
+        for task_id in task_ids:
+            task = manager.tasks.get(task_id)
+            if task is None or task.status not in OPEN_STATUSES:
+                continue
+            walk(task.children_ids)
+            order.append(task_id)
+    walk(manager.root_task_ids)
+    return order
+
+
+class FrontierTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def check(self, manager: StateManager):
+        expected = upcoming_by_scan(manager)
+        next_task = manager.get_next_actionable_task()
+        self.assertEqual(next_task.id if next_task else None, expected[0] if expected else None)
+        self.assertEqual([task.id for task in manager.get_upcoming_tasks(25)], expected[:25])
+
+    def test_matches_a_full_scan_after_every_change(self):
+        for file_name in ("tasks.json", "tasks.db"):
+            with self.subTest(store=file_name):
+                manager = StateManager(os.path.join(self.directory, file_name))
+                rng = random.Random(2)
+                ids = []
+                for step in range(300):
+                    roll = rng.random()
+                    if roll < 0.35 or not ids:
+                        parent_id = rng.choice(ids + [None]) if ids else None
+                        ids.append(manager.add_task(f"Task {step}", parent_id=parent_id).id)
+                    elif roll < 0.75:
+                        # Mostly finishing, sometimes reopening
+                        status = TaskStatus.COMPLETED if rng.random() < 0.7 else TaskStatus.PENDING
+                        manager.update_task_status(rng.choice(ids), status)
+                    elif roll < 0.9:
+                        manager.move_task(rng.choice(ids), to_front=rng.random() < 0.5)
+                    else:
+                        manager.delete_task(rng.choice(ids))
+                        ids = [task_id for task_id in ids if task_id in manager.tasks]
+                    self.check(manager)
+                manager.close()
+
+                # And from what the store has on disk
+                manager = StateManager(os.path.join(self.directory, file_name))
+                self.check(manager)
+                manager.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
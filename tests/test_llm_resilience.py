@@ -0,0 +1,50 @@
+import asyncio
+import unittest
+
+from src.core.llm_resilience import CircuitBreaker, ResilientCaller
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class CancelledProbeTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(failure_threshold=1, reset_seconds=30, clock=self.clock)
+        self.caller = ResilientCaller(deadline=5, retries=0, hedge_percentile=None, breaker=self.breaker)
+        self.breaker.record_failure()
+        self.clock.now = 31
+
+    def test_cancelled_half_open_probe_frees_the_probe_slot(self):
+        started = asyncio.Event()
+
+        async def hang(timeout):
+            started.set()
+            await asyncio.sleep(60)
+
+        async def probe_and_cancel():
+            task = asyncio.ensure_future(self.caller.acall(hang))
+            await started.wait()
+            self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(probe_and_cancel())
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        # The next call is let through as a new probe, and its success closes the circuit
+        self.assertEqual(asyncio.run(self.caller.acall(self._answer)), "ok")
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    @staticmethod
+    async def _answer(timeout):
+        return "ok"
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+import json
+import unittest
+from types import SimpleNamespace
+
+from src.core.llm_cache import LLMCache
+from src.core.llm_service import LLMService
+
+
+class FakeClient:
+    """
+    Stands in for the OpenAI client; answers every request with `content`.
+    """
+
+    def __init__(self, content: str):
+        self.content = content
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        self.calls += 1
+        return SimpleNamespace(usage=None,
+                               choices=[SimpleNamespace(message=SimpleNamespace(content=self.content))])
+
+
+class MalformedReplyTest(unittest.TestCase):
+    def setUp(self):
+        self.service = LLMService("missing-config.json", cache=LLMCache(path=None))
+
+    def test_steps_without_titles_are_neither_returned_nor_cached(self):
+        self.service.client = FakeClient(json.dumps({"steps": ["a", "b"]}))
+        self.assertEqual(self.service.break_down_task("Clean room"), [])
+        self.assertEqual(self.service.break_down_task("Clean room"), [])
+        # Asked again, since nothing was cached
+        self.assertEqual(self.service.client.calls, 2)
+
+    def test_valid_steps_are_cached(self):
+        steps = [{"title": "Floor", "description": ""}]
+        self.service.client = FakeClient(json.dumps({"steps": steps}))
+        self.assertEqual(self.service.break_down_task("Clean room"), steps)
+        self.assertEqual(self.service.break_down_task("Clean room"), steps)
+        self.assertEqual(self.service.client.calls, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
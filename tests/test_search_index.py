@@ -0,0 +1,82 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+from src.core.search_index import Analyzer
+from src.core.state_manager import StateManager
+from src.core.task_model import TaskStatus
+
+WORDS = "clean cleaning room rooms call calling mom paint painted fence garden taxes filing the and".split()
+QUERIES = ["clean", "cleaning room", "call mom", "paint fence", "taxes", "garden rooms", "the room", "cle", "pa"]
+
+
+def matches_by_scan(manager: StateManager, query: str, statuses=None):
+    """
+    Ids of the tasks holding every query word (its stem or as written), the
+    last one also as a prefix of a term unless the query ends with a space.
+    """
+    analyzer = Analyzer("en")
+    words = [word for word in analyzer.words(query) if word not in analyzer._stopwords]
+    typing = not query.endswith(" ")
+    found = set()
+    for task_id in manager.tasks:
+        task = manager.tasks[task_id]
+        if statuses is not None and task.status not in statuses:
+            continue
+        terms = set(analyzer.terms(task.title)) | set(analyzer.terms(task.description))
+        if all({analyzer.stem(word), word} & terms
+               or (typing and i == len(words) - 1 and any(term.startswith(word) for term in terms))
+               for i, word in enumerate(words)):
+            found.add(task_id)
+    return found
+
+
+class SearchTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.data_file = os.path.join(self.directory, "tasks.json")
+
+    def check(self, manager: StateManager):
+        self.assertTrue(manager.search_ready(wait=True))
+        for query in QUERIES:
+            for statuses in (None, [TaskStatus.PENDING]):
+                found = {task.id for task in manager.search(query, statuses, limit=1000)}
+                self.assertEqual(found, matches_by_scan(manager, query, statuses), (query, statuses))
+
+    def test_matches_a_full_scan(self):
+        manager = StateManager(self.data_file, journaled=True)
+        rng = random.Random(4)
+        ids = []
+        for step in range(200):
+            roll = rng.random()
+            if roll < 0.6 or not ids:
+                title = " ".join(rng.choice(WORDS) for _ in range(3))
+                ids.append(manager.add_task(title, rng.choice(WORDS)).id)
+            elif roll < 0.85:
+                manager.update_task_status(rng.choice(ids), TaskStatus.COMPLETED)
+            else:
+                manager.delete_task(rng.choice(ids))
+                ids = [task_id for task_id in ids if task_id in manager.tasks]
+            if step == 50:
+                # Loaded from here on; later changes are applied as they are flushed
+                self.check(manager)
+        self.check(manager)
+        manager.close()
+
+        # From the saved index and its log
+        manager = StateManager(self.data_file, journaled=True)
+        self.check(manager)
+        manager.close()
+
+        # Rebuilt from the store
+        os.remove(self.data_file + ".search")
+        manager = StateManager(self.data_file, journaled=True)
+        self.check(manager)
+        manager.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
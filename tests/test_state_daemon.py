@@ -0,0 +1,46 @@
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from src.core.state_daemon import StateDaemon
+from src.core.state_manager import StateManager
+
+
+class MalformedRequestTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.manager = StateManager(os.path.join(self.directory, "tasks.json"))
+        self.addCleanup(self.manager.close)
+        self.daemon = StateDaemon(self.manager, os.path.join(self.directory, "state.sock"))
+        self.addCleanup(self.daemon.close)
+
+    def test_errors_are_answered_and_the_connection_stays_open(self):
+        async def exchange():
+            await self.daemon.start()
+            reader, writer = await asyncio.open_unix_connection(self.daemon.socket_path)
+            answers = []
+            for line in [b"not json", b"[1, 2]", b'{"id": 3, "ops": "add_task"}',
+                         b'{"id": 4, "ops": [["add_task"]]}', b'{"id": 5, "ops": [["drop_tables", {}]]}',
+                         b'{"id": 6, "ops": [["add_task", {"title": "Still here"}], ["root_task_ids", {}]]}']:
+                writer.write(line + b"\n")
+                await writer.drain()
+                answers.append(json.loads(await reader.readline()))
+            writer.close()
+            await writer.wait_closed()
+            return answers
+
+        answers = asyncio.run(exchange())
+        for answer in answers[:5]:
+            self.assertIn("error", answer)
+        self.assertEqual([answer["id"] for answer in answers], [None, None, 3, 4, 5, 6])
+        self.assertEqual(answers[3]["failed"], 0)
+        task_row, root_ids = answers[5]["results"]
+        self.assertEqual(root_ids, [task_row[0]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+from src.core.state_manager import StateManager
+from src.core.task_model import TaskStatus
+
+# file name, StateManager keyword arguments
+BACKENDS = {
+    "json": ("tasks.json", {}),
+    "journal": ("tasks.json", {"journaled": True, "compact_every": 50}),
+    "sqlite": ("tasks.db", {}),
+    "binary": ("tasks.snap", {"compact_every": 50}),
+}
+
+
+def tree(manager: StateManager):
+    """
+    The whole store as nested (title, status, children) tuples, in order.
+    """
+    def walk(task_ids):
+        return [(manager.tasks[task_id].title, manager.tasks[task_id].status.value,
+                 walk(manager.tasks[task_id].children_ids)) for task_id in task_ids]
+    return walk(manager.root_task_ids)
+
+
+def mutate(manager: StateManager, steps: int, seed: int = 0):
+    """
+    Random adds, moves, deletes and status changes, with a snapshot halfway.
+    """
+    rng = random.Random(seed)
+    ids = []
+    for step in range(steps):
+        roll = rng.random()
+        if roll < 0.4 or not ids:
+            parent_id = rng.choice(ids + [None] * 3) if ids else None
+            ids.append(manager.add_task(f"Task {step}", parent_id=parent_id).id)
+        elif roll < 0.6:
+            manager.move_task(rng.choice(ids), to_front=rng.random() < 0.5)
+        elif roll < 0.75:
+            manager.delete_task(rng.choice(ids))
+            ids = [task_id for task_id in ids if task_id in manager.tasks]
+        else:
+            manager.update_task_status(rng.choice(ids), rng.choice(list(TaskStatus)))
+        if step == steps // 2:
+            manager.save_state()
+
+
+class BackendRoundTripTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def open(self, backend: str) -> StateManager:
+        file_name, kwargs = BACKENDS[backend]
+        return StateManager(os.path.join(self.directory, backend, file_name), **kwargs)
+
+    def test_reopened_store_matches_memory(self):
+        for backend in BACKENDS:
+            with self.subTest(backend=backend):
+                manager = self.open(backend)
+                mutate(manager, 400)
+                expected = tree(manager)
+                manager.close()
+
+                manager = self.open(backend)
+                self.assertEqual(tree(manager), expected)
+                manager.close()
+
+    def test_children_survive_reopening_under_a_large_parent(self):
+        for backend in BACKENDS:
+            with self.subTest(backend=backend):
+                manager = self.open(backend)
+                parent = manager.add_task("Parent")
+                children = manager.add_tasks([{"title": f"Child {i}"} for i in range(300)], parent_id=parent.id)
+                manager.save_state()
+                for child in children[:100]:
+                    manager.delete_task(child.id)
+                manager.move_task(children[150].id, to_front=True)
+                manager.move_task(children[100].id)
+                expected = tree(manager)
+                manager.close()
+
+                manager = self.open(backend)
+                self.assertEqual(tree(manager), expected)
+                self.assertEqual(list(manager.tasks[parent.id].children_ids)[0], children[150].id)
+                manager.close()
+
+
+class JournalRecoveryTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.data_file = os.path.join(self.directory, "tasks.json")
+
+    def open(self) -> StateManager:
+        return StateManager(self.data_file, journaled=True, compact_every=10 ** 6)
+
+    def test_log_replayed_over_a_snapshot_that_has_it(self):
+        # A crash between writing the snapshot and removing the log
+        manager = self.open()
+        mutate(manager, 200, seed=1)
+        shutil.copy(self.data_file + ".log", self.data_file + ".old")
+        manager.save_state()
+        expected = tree(manager)
+        manager.close()
+        os.replace(self.data_file + ".old", self.data_file + ".log")
+
+        manager = self.open()
+        self.assertEqual(tree(manager), expected)
+        manager.close()
+
+    def test_torn_log_tail_is_dropped(self):
+        manager = self.open()
+        manager.add_task("Kept")
+        manager.close()
+        size = os.path.getsize(self.data_file + ".log")
+        with open(self.data_file + ".log", "ab") as f:
+            f.write(b'{"op": "put", "task": ["half')
+
+        manager = self.open()
+        self.assertEqual(tree(manager), [("Kept", "pending", [])])
+        self.assertEqual(os.path.getsize(self.data_file + ".log"), size)
+        manager.add_task("Next")
+        manager.close()
+
+        manager = self.open()
+        self.assertEqual([title for title, _, _ in tree(manager)], ["Kept", "Next"])
+        manager.close()
+
+    def test_empty_binary_snapshot_falls_back_to_the_log(self):
+        snapshot_file = os.path.join(self.directory, "tasks.snap")
+        manager = StateManager(snapshot_file)
+        manager.add_task("From the log")
+        manager.close()
+        open(snapshot_file, "wb").close()
+
+        manager = StateManager(snapshot_file)
+        self.assertEqual(tree(manager), [("From the log", "pending", [])])
+        manager.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
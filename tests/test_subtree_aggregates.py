@@ -0,0 +1,37 @@
+import os
+import tempfile
+import unittest
+
+from src.core.state_manager import StateManager
+from src.core.task_model import TaskStatus
+
+
+class ReloadTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        # Nothing is written until flush(), so a reload drops later changes
+        self.manager = StateManager(os.path.join(self.directory.name, "tasks.json"), journaled=True,
+                                    write_behind_delay=3600)
+        self.addCleanup(self.manager.close)
+
+    def test_counts_follow_a_reload(self):
+        root = self.manager.add_task("Clean room")
+        self.manager.add_tasks([{"title": "Floor"}, {"title": "Desk"}], parent_id=root.id)
+        self.manager.flush()
+        self.assertEqual(self.manager.get_subtree_counts(root.id).pending, 3)
+
+        # Unsaved changes, counted into the cache, then thrown away
+        self.manager.add_task("Shelf", parent_id=root.id)
+        self.manager.update_task_status(root.id, TaskStatus.COMPLETED)
+        self.assertEqual(self.manager.get_subtree_counts(root.id).total, 4)
+        self.manager.load_state()
+
+        self.assertEqual(self.manager.verify_aggregates(), [])
+        counts = self.manager.get_subtree_counts(root.id)
+        self.assertEqual((counts.pending, counts.completed), (3, 0))
+        self.assertEqual(self.manager.get_subtree_counts().total, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from src.core.state_manager import StateManager
+from src.core.task_archive import TaskArchive
+from src.core.task_model import TaskStatus
+
+
+class ArchiveTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.data_file = os.path.join(self.directory, "tasks.json")
+
+    def finished_project(self, manager: StateManager, title: str):
+        root = manager.add_task(title)
+        steps = manager.add_tasks([{"title": f"{title} step {i}"} for i in range(3)], parent_id=root.id)
+        manager.update_tasks_status([root.id] + [step.id for step in steps], TaskStatus.COMPLETED)
+        return root, steps
+
+    def test_archive_and_restore_round_trip(self):
+        manager = StateManager(self.data_file)
+        done, steps = self.finished_project(manager, "Taxes")
+        open_task = manager.add_task("Still open")
+        self.assertEqual(manager.archive_finished(), 4)
+        self.assertEqual(list(manager.root_task_ids), [open_task.id])
+        manager.close()
+
+        # Found from a fresh archive after reopening
+        manager = StateManager(self.data_file)
+        self.assertIsNone(manager.get_task(steps[1].id))
+        self.assertEqual(manager.get_archived_task(steps[1].id).title, "Taxes step 1")
+        restored = manager.restore_archived(steps[1].id)
+        self.assertEqual(restored.id, done.id)
+        self.assertEqual([manager.get_task(task_id).title for task_id in manager.get_task(done.id).children_ids],
+                         ["Taxes step 0", "Taxes step 1", "Taxes step 2"])
+        self.assertIsNone(manager.get_archived_task(steps[1].id))
+        self.assertEqual(manager.verify_aggregates(), [])
+        manager.close()
+
+        manager = StateManager(self.data_file)
+        self.assertEqual(list(manager.root_task_ids), [open_task.id, done.id])
+        self.assertIsNone(manager.get_archived_task(done.id))
+        manager.close()
+
+    def test_torn_tail_is_truncated(self):
+        manager = StateManager(self.data_file)
+        self.finished_project(manager, "Kept")
+        manager.archive_finished()
+        manager.close()
+        archive_file = self.data_file + ".archive"
+        size = os.path.getsize(archive_file)
+        with open(archive_file, "ab") as f:
+            # A header promising more bytes than were written
+            f.write(b"\x01\xff\x00\x00\x00\xff\x00\x00\x00partial")
+
+        archive = TaskArchive(archive_file)
+        self.assertEqual([archive.get(root_id).title for root_id in archive.root_ids()], ["Kept"])
+        self.assertEqual(os.path.getsize(archive_file), size)
+
+        # Appends after the truncation read back normally
+        manager = StateManager(self.data_file)
+        self.finished_project(manager, "Later")
+        manager.archive_finished()
+        manager.close()
+        archive = TaskArchive(archive_file)
+        self.assertEqual([archive.get(root_id).title for root_id in archive.root_ids()], ["Kept", "Later"])
+        self.assertEqual(len(archive), 8)
+
+
+if __name__ == "__main__":
+    unittest.main()